@@ -52,8 +52,11 @@ class Settings(BaseSettings):
 
     notify_chat_id: int | None = Field(default=None, alias="NOTIFY_CHAT_ID")
     monitor_interval_seconds: int = Field(default=60, alias="MONITOR_INTERVAL_SECONDS")
+    monitor_concurrency: int = Field(default=8, alias="MONITOR_CONCURRENCY")
     standby_refresh_seconds: int = Field(default=120, alias="STANDBY_REFRESH_SECONDS")
     recovery_max_retry: int = Field(default=3, alias="RECOVERY_MAX_RETRY")
+    recovery_batch_size: int = Field(default=1, alias="RECOVERY_BATCH_SIZE")
+    recovery_concurrency: int = Field(default=1, alias="RECOVERY_CONCURRENCY")
 
     app_version: str = Field(default_factory=lambda: _read_app_version())
     update_repository: str = Field(default="moeacgx/TelegramAutoClone", alias="UPDATE_REPOSITORY")
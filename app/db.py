@@ -1,4 +1,6 @@
 ﻿import asyncio
+import random
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
@@ -6,10 +8,18 @@ from typing import Any
 import aiosqlite
 
 
+# 恢复任务失败重试的指数退避：60s 起步翻倍，封顶 1 小时，并加 ±10s 抖动避免同时重试。
+RECOVERY_RETRY_BASE_SECONDS = 60
+RECOVERY_RETRY_MAX_SECONDS = 3600
+RECOVERY_RETRY_JITTER_SECONDS = 10
+
+
 class Database:
     def __init__(self, db_path: str):
         self.db_path = Path(db_path)
         self._write_lock = asyncio.Lock()
+        # 任务组/话题/绑定每次写入后递增，供实时监听的解析缓存判断是否过期。
+        self.binding_version = 0
 
     async def init(self) -> None:
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -55,7 +65,7 @@ class Database:
                     is_standby INTEGER NOT NULL DEFAULT 0,
                     in_use INTEGER NOT NULL DEFAULT 0,
                     consumed_at TEXT,
-                    admin_check_at TEXT,
+                    admin_check_at INTEGER,
                     last_seen_at TEXT NOT NULL,
                     created_at TEXT NOT NULL,
                     updated_at TEXT NOT NULL
@@ -93,12 +103,21 @@ class Database:
                     retry_count INTEGER NOT NULL DEFAULT 0,
                     last_cloned_message_id INTEGER NOT NULL DEFAULT 0,
                     last_error TEXT,
+                    next_retry_at INTEGER,
                     created_at TEXT NOT NULL,
                     updated_at TEXT NOT NULL
                 );
                 """
             )
-            await self._ensure_column(conn, "channels", "admin_check_at", "TEXT")
+            await self._ensure_column(conn, "channels", "admin_check_at", "INTEGER")
+            # 旧版本以 ISO 字符串保存管理员校验时间，统一迁移为 Unix 秒。
+            await conn.execute(
+                """
+                UPDATE channels
+                SET admin_check_at=CAST(strftime('%s', admin_check_at) AS INTEGER)
+                WHERE admin_check_at LIKE '%-%'
+                """
+            )
             await self._ensure_column(conn, "topics", "avatar_path", "TEXT")
             await self._ensure_column(conn, "topics", "avatar_updated_at", "TEXT")
             await self._ensure_column(conn, "source_groups", "md5_mutation_override", "INTEGER")
@@ -108,6 +127,7 @@ class Database:
                 "last_cloned_message_id",
                 "INTEGER NOT NULL DEFAULT 0",
             )
+            await self._ensure_column(conn, "recovery_queue", "next_retry_at", "INTEGER")
             # 清理历史重复活跃任务，避免后续唯一索引创建失败。
             await conn.execute(
                 """
@@ -210,6 +230,28 @@ class Database:
         row = await self._fetch_one("SELECT value FROM settings WHERE key=?", (key,))
         return row["value"] if row else None
 
+    async def set_settings_bulk(self, items: dict[str, str]) -> None:
+        now = self._now()
+        await self._executemany(
+            """
+            INSERT INTO settings(key, value, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                value=excluded.value,
+                updated_at=excluded.updated_at
+            """,
+            [(key, value, now) for key, value in items.items()],
+        )
+
+    async def get_settings_bulk(self, keys: list[str]) -> dict[str, str | None]:
+        # 一次查询读取多个配置项，缺失的键返回 None。
+        if not keys:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        rows = await self._fetch_all(f"SELECT key, value FROM settings WHERE key IN ({placeholders})", tuple(keys))
+        found = {row["key"]: row["value"] for row in rows}
+        return {key: found.get(key) for key in keys}
+
     async def add_or_update_source_group(self, chat_id: int, title: str) -> dict[str, Any]:
         now = self._now()
         await self._execute(
@@ -222,6 +264,7 @@ class Database:
             """,
             (chat_id, title, now, now),
         )
+        self.binding_version += 1
         return await self.get_source_group_by_chat_id(chat_id)
 
     async def get_source_group_by_chat_id(self, chat_id: int) -> dict[str, Any] | None:
@@ -246,6 +289,7 @@ class Database:
             "UPDATE source_groups SET enabled=?, updated_at=? WHERE id=?",
             (1 if enabled else 0, self._now(), source_group_id),
         )
+        self.binding_version += 1
 
     async def set_source_group_md5_override(self, source_group_id: int, override: bool | None) -> None:
         value = None if override is None else (1 if override else 0)
@@ -345,6 +389,7 @@ class Database:
                         released_channels += 1
 
                 await conn.commit()
+                self.binding_version += 1
                 return {
                     "source_groups": counts.get("source_groups", 0),
                     "topics": counts.get("topics", 0),
@@ -355,7 +400,8 @@ class Database:
                     "running_jobs": running_count,
                 }
 
-    async def upsert_topics(self, source_group_id: int, topics: list[dict[str, Any]]) -> None:
+    async def upsert_topics(self, source_group_id: int, topics: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        # 写入后在同一连接内回读该任务组的全部话题并返回，调用方无需再单独查询一次。
         now = self._now()
         rows = [
             (
@@ -367,16 +413,29 @@ class Database:
             )
             for topic in topics
         ]
-        await self._executemany(
-            """
-            INSERT INTO topics(source_group_id, topic_id, title, enabled, created_at, updated_at)
-            VALUES (?, ?, ?, 0, ?, ?)
-            ON CONFLICT(source_group_id, topic_id) DO UPDATE SET
-                title=excluded.title,
-                updated_at=excluded.updated_at
-            """,
-            rows,
-        )
+        async with self._write_lock:
+            async with aiosqlite.connect(self.db_path) as conn:
+                conn.row_factory = aiosqlite.Row
+                if rows:
+                    await conn.executemany(
+                        """
+                        INSERT INTO topics(source_group_id, topic_id, title, enabled, created_at, updated_at)
+                        VALUES (?, ?, ?, 0, ?, ?)
+                        ON CONFLICT(source_group_id, topic_id) DO UPDATE SET
+                            title=excluded.title,
+                            updated_at=excluded.updated_at
+                        """,
+                        rows,
+                    )
+                    await conn.commit()
+                cur = await conn.execute(
+                    "SELECT * FROM topics WHERE source_group_id=? ORDER BY topic_id ASC",
+                    (source_group_id,),
+                )
+                result = [dict(row) for row in await cur.fetchall()]
+                await cur.close()
+        self.binding_version += 1
+        return result
 
     async def list_topics(self, source_group_id: int | None = None) -> list[dict[str, Any]]:
         if source_group_id is None:
@@ -399,6 +458,7 @@ class Database:
             "UPDATE topics SET enabled=?, updated_at=? WHERE source_group_id=? AND topic_id=?",
             (1 if enabled else 0, self._now(), source_group_id, topic_id),
         )
+        self.binding_version += 1
 
     async def set_topic_avatar(
         self,
@@ -435,6 +495,7 @@ class Database:
             """,
             (source_group_id, topic_id, channel_chat_id, now, now),
         )
+        self.binding_version += 1
         await self._execute(
             "UPDATE channels SET in_use=1, is_standby=0, updated_at=? WHERE chat_id=?",
             (now, channel_chat_id),
@@ -450,6 +511,26 @@ class Database:
             (source_group_id, topic_id),
         )
 
+    async def resolve_binding_for_event(self, chat_id: int, topic_id: int) -> dict[str, Any] | None:
+        # 实时监听热路径：一次联表取出任务组/话题/绑定及各自启用状态，三处唯一索引均可覆盖。
+        return await self._fetch_one(
+            """
+            SELECT
+                s.id AS source_group_id,
+                s.title AS source_title,
+                s.enabled AS source_enabled,
+                t.title AS topic_title,
+                t.enabled AS topic_enabled,
+                b.active AS binding_active,
+                b.channel_chat_id AS channel_chat_id
+            FROM source_groups s
+            JOIN topics t ON t.source_group_id=s.id AND t.topic_id=?
+            JOIN topic_bindings b ON b.source_group_id=s.id AND b.topic_id=t.topic_id
+            WHERE s.chat_id=?
+            """,
+            (topic_id, chat_id),
+        )
+
     async def list_bindings(self, source_group_id: int | None = None) -> list[dict[str, Any]]:
         sql = """
         SELECT
@@ -490,6 +571,7 @@ class Database:
             "UPDATE topic_bindings SET active=?, updated_at=? WHERE source_group_id=? AND topic_id=?",
             (1 if active else 0, self._now(), source_group_id, topic_id),
         )
+        self.binding_version += 1
 
     async def unbind_topic(self, source_group_id: int, topic_id: int) -> dict[str, Any] | None:
         now = self._now()
@@ -528,6 +610,7 @@ class Database:
                     )
 
                 await conn.commit()
+                self.binding_version += 1
                 return {
                     "source_group_id": int(row["source_group_id"]),
                     "topic_id": int(row["topic_id"]),
@@ -540,6 +623,22 @@ class Database:
             "UPDATE topic_bindings SET active=0, updated_at=? WHERE channel_chat_id=?",
             (self._now(), channel_chat_id),
         )
+        self.binding_version += 1
+
+    _UPSERT_CHANNEL_SQL = """
+        INSERT INTO channels(
+            chat_id, title, is_standby, in_use, consumed_at,
+            admin_check_at, last_seen_at, created_at, updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(chat_id) DO UPDATE SET
+            title=excluded.title,
+            is_standby=excluded.is_standby,
+            in_use=excluded.in_use,
+            admin_check_at=COALESCE(excluded.admin_check_at, channels.admin_check_at),
+            last_seen_at=excluded.last_seen_at,
+            updated_at=excluded.updated_at
+        """
 
     async def upsert_channel(
         self,
@@ -548,25 +647,12 @@ class Database:
         is_standby: bool,
         in_use: bool = False,
         consumed: bool = False,
-        admin_check_at: str | None = None,
+        admin_check_at: int | None = None,
     ) -> dict[str, Any]:
         now = self._now()
         consumed_at = now if consumed else None
         await self._execute(
-            """
-            INSERT INTO channels(
-                chat_id, title, is_standby, in_use, consumed_at,
-                admin_check_at, last_seen_at, created_at, updated_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(chat_id) DO UPDATE SET
-                title=excluded.title,
-                is_standby=excluded.is_standby,
-                in_use=excluded.in_use,
-                admin_check_at=COALESCE(excluded.admin_check_at, channels.admin_check_at),
-                last_seen_at=excluded.last_seen_at,
-                updated_at=excluded.updated_at
-            """,
+            self._UPSERT_CHANNEL_SQL,
             (
                 chat_id,
                 title,
@@ -581,9 +667,37 @@ class Database:
         )
         return await self.get_channel(chat_id)
 
+    async def bulk_upsert_channels(
+        self,
+        rows: list[tuple[int, str, bool, bool, int | None]],
+    ) -> None:
+        """rows: (chat_id, title, is_standby, in_use, admin_check_at)，单次事务写入。"""
+        now = self._now()
+        await self._executemany(
+            self._UPSERT_CHANNEL_SQL,
+            [
+                (
+                    chat_id,
+                    title,
+                    1 if is_standby else 0,
+                    1 if in_use else 0,
+                    None,
+                    admin_check_at,
+                    now,
+                    now,
+                    now,
+                )
+                for chat_id, title, is_standby, in_use, admin_check_at in rows
+            ],
+        )
+
     async def get_channel(self, chat_id: int) -> dict[str, Any] | None:
         return await self._fetch_one("SELECT * FROM channels WHERE chat_id=?", (chat_id,))
 
+    async def get_channels_map(self) -> dict[int, dict[str, Any]]:
+        rows = await self._fetch_all("SELECT * FROM channels")
+        return {int(row["chat_id"]): row for row in rows}
+
     async def list_channels(self) -> list[dict[str, Any]]:
         return await self._fetch_all("SELECT * FROM channels ORDER BY id DESC")
 
@@ -601,6 +715,12 @@ class Database:
     async def delete_channel(self, chat_id: int) -> None:
         await self._execute("DELETE FROM channels WHERE chat_id=?", (chat_id,))
 
+    async def bulk_delete_channels(self, chat_ids: list[int]) -> None:
+        await self._executemany(
+            "DELETE FROM channels WHERE chat_id=?",
+            [(chat_id,) for chat_id in chat_ids],
+        )
+
     async def clear_standby_channels(self) -> None:
         # 清空备用池时同步清理所有未占用频道缓存，避免旧缓存在后续校验中回灌。
         await self._execute("DELETE FROM channels WHERE in_use=0")
@@ -632,40 +752,46 @@ class Database:
         channel_chat_id: int,
         reason: str,
     ) -> None:
-        now = self._now()
-        existing = await self._fetch_all(
-            """
-            SELECT id
-            FROM banned_channels
-            WHERE source_group_id=? AND topic_id=? AND channel_chat_id=?
-            ORDER BY id DESC
-            """,
-            (source_group_id, topic_id, channel_chat_id),
-        )
-        if existing:
-            keep_id = int(existing[0]["id"])
-            await self._execute(
-                """
-                UPDATE banned_channels
-                SET reason=?, detected_at=?
-                WHERE id=?
-                """,
-                (reason, now, keep_id),
-            )
-            for row in existing[1:]:
-                await self._execute(
-                    "DELETE FROM banned_channels WHERE id=?",
-                    (int(row["id"]),),
-                )
-            return
+        await self.add_banned_channels_bulk([(source_group_id, topic_id, channel_chat_id, reason)])
 
-        await self._execute(
-            """
-            INSERT INTO banned_channels(source_group_id, topic_id, channel_chat_id, reason, detected_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (source_group_id, topic_id, channel_chat_id, reason, now),
-        )
+    async def add_banned_channels_bulk(self, rows: list[tuple[int, int, int, str]]) -> None:
+        # rows: (source_group_id, topic_id, channel_chat_id, reason)，同一连接内处理后一次提交。
+        if not rows:
+            return
+        now = self._now()
+        async with self._write_lock:
+            async with aiosqlite.connect(self.db_path) as conn:
+                for source_group_id, topic_id, channel_chat_id, reason in rows:
+                    cur = await conn.execute(
+                        """
+                        SELECT id
+                        FROM banned_channels
+                        WHERE source_group_id=? AND topic_id=? AND channel_chat_id=?
+                        ORDER BY id DESC
+                        """,
+                        (source_group_id, topic_id, channel_chat_id),
+                    )
+                    existing_ids = [int(row[0]) for row in await cur.fetchall()]
+                    await cur.close()
+                    if existing_ids:
+                        await conn.execute(
+                            "UPDATE banned_channels SET reason=?, detected_at=? WHERE id=?",
+                            (reason, now, existing_ids[0]),
+                        )
+                        if len(existing_ids) > 1:
+                            await conn.executemany(
+                                "DELETE FROM banned_channels WHERE id=?",
+                                [(banned_id,) for banned_id in existing_ids[1:]],
+                            )
+                        continue
+                    await conn.execute(
+                        """
+                        INSERT INTO banned_channels(source_group_id, topic_id, channel_chat_id, reason, detected_at)
+                        VALUES (?, ?, ?, ?, ?)
+                        """,
+                        (source_group_id, topic_id, channel_chat_id, reason, now),
+                    )
+                await conn.commit()
 
     async def list_banned_channels(self) -> list[dict[str, Any]]:
         return await self._fetch_all(
@@ -785,57 +911,60 @@ class Database:
         old_channel_chat_id: int,
         reason: str,
     ) -> tuple[int, bool]:
+        results = await self.enqueue_recoveries_bulk([(source_group_id, topic_id, old_channel_chat_id, reason)])
+        return results[0]
+
+    @staticmethod
+    async def _find_active_recovery_id(conn: aiosqlite.Connection, source_group_id: int, topic_id: int) -> int | None:
+        cur = await conn.execute(
+            """
+            SELECT id FROM recovery_queue
+            WHERE source_group_id=? AND topic_id=?
+              AND status IN ('pending','running','stopping','waiting_standby')
+            ORDER BY id DESC
+            LIMIT 1
+            """,
+            (source_group_id, topic_id),
+        )
+        row = await cur.fetchone()
+        await cur.close()
+        return int(row[0]) if row else None
+
+    async def enqueue_recoveries_bulk(self, rows: list[tuple[int, int, int, str]]) -> list[tuple[int, bool]]:
+        # rows: (source_group_id, topic_id, old_channel_chat_id, reason)；按输入顺序返回 (queue_id, created)。
+        if not rows:
+            return []
         now = self._now()
+        results: list[tuple[int, bool]] = []
         async with self._write_lock:
             async with aiosqlite.connect(self.db_path) as conn:
-                conn.row_factory = aiosqlite.Row
-                existing_cur = await conn.execute(
-                    """
-                    SELECT id FROM recovery_queue
-                    WHERE source_group_id=? AND topic_id=?
-                      AND status IN ('pending','running','stopping','waiting_standby')
-                    ORDER BY id DESC
-                    LIMIT 1
-                    """,
-                    (source_group_id, topic_id),
-                )
-                existing = await existing_cur.fetchone()
-                await existing_cur.close()
-                if existing:
-                    return int(existing["id"]), False
-
-                try:
-                    cur = await conn.execute(
-                        """
-                        INSERT INTO recovery_queue(
-                            source_group_id, topic_id, old_channel_chat_id, reason,
-                            status, retry_count, last_cloned_message_id, created_at, updated_at
+                for source_group_id, topic_id, old_channel_chat_id, reason in rows:
+                    existing_id = await self._find_active_recovery_id(conn, source_group_id, topic_id)
+                    if existing_id is not None:
+                        results.append((existing_id, False))
+                        continue
+
+                    try:
+                        cur = await conn.execute(
+                            """
+                            INSERT INTO recovery_queue(
+                                source_group_id, topic_id, old_channel_chat_id, reason,
+                                status, retry_count, last_cloned_message_id, created_at, updated_at
+                            )
+                            VALUES (?, ?, ?, ?, 'pending', 0, 0, ?, ?)
+                            """,
+                            (source_group_id, topic_id, old_channel_chat_id, reason, now, now),
                         )
-                        VALUES (?, ?, ?, ?, 'pending', 0, 0, ?, ?)
-                        """,
-                        (source_group_id, topic_id, old_channel_chat_id, reason, now, now),
-                    )
-                    queue_id = int(cur.lastrowid)
-                    await cur.close()
-                    await conn.commit()
-                    return queue_id, True
-                except aiosqlite.IntegrityError:
-                    # 并发场景下唯一索引兜底，返回已存在任务。
-                    existing_cur = await conn.execute(
-                        """
-                        SELECT id FROM recovery_queue
-                        WHERE source_group_id=? AND topic_id=?
-                          AND status IN ('pending','running','stopping','waiting_standby')
-                        ORDER BY id DESC
-                        LIMIT 1
-                        """,
-                        (source_group_id, topic_id),
-                    )
-                    existing = await existing_cur.fetchone()
-                    await existing_cur.close()
-                    if existing:
-                        return int(existing["id"]), False
-                    raise
+                        results.append((int(cur.lastrowid), True))
+                        await cur.close()
+                    except aiosqlite.IntegrityError:
+                        # 并发场景下唯一索引兜底，返回已存在任务。
+                        existing_id = await self._find_active_recovery_id(conn, source_group_id, topic_id)
+                        if existing_id is None:
+                            raise
+                        results.append((existing_id, False))
+                await conn.commit()
+        return results
 
     async def enqueue_recovery(
         self,
@@ -955,6 +1084,7 @@ class Database:
                 retry_count=?,
                 last_cloned_message_id=?,
                 last_error=?,
+                next_retry_at=NULL,
                 updated_at=?
             WHERE id=?
             """,
@@ -1074,7 +1204,14 @@ class Database:
                 await cur.close()
                 return int(rowcount if rowcount is not None and rowcount >= 0 else 0)
 
-    async def claim_next_recovery(self) -> dict[str, Any] | None:
+    async def claim_next_recovery(self, now_ts: int | None = None) -> dict[str, Any] | None:
+        jobs = await self.claim_next_recoveries(1, now_ts=now_ts)
+        return jobs[0] if jobs else None
+
+    async def claim_next_recoveries(self, limit: int, now_ts: int | None = None) -> list[dict[str, Any]]:
+        # 同一事务内按队列顺序选出至多 limit 个可执行任务并一次性置为 running。
+        if now_ts is None:
+            now_ts = int(time.time())
         async with self._write_lock:
             async with aiosqlite.connect(self.db_path) as conn:
                 conn.row_factory = aiosqlite.Row
@@ -1086,42 +1223,35 @@ class Database:
                     JOIN source_groups s ON s.id = q.source_group_id
                     WHERE q.status IN ('pending','waiting_standby')
                       AND s.enabled = 1
+                      AND (q.next_retry_at IS NULL OR q.next_retry_at <= ?)
                     ORDER BY q.id ASC
-                    LIMIT 1
-                    """
+                    LIMIT ?
+                    """,
+                    (now_ts, max(1, int(limit))),
                 )
-                row = await cur.fetchone()
+                queue_ids = [int(row["id"]) for row in await cur.fetchall()]
                 await cur.close()
-                if not row:
+                if not queue_ids:
                     await conn.commit()
-                    return None
+                    return []
 
-                queue_id = int(row["id"])
-                now = self._now()
-                update_cur = await conn.execute(
-                    """
+                placeholders = ",".join("?" for _ in queue_ids)
+                await conn.execute(
+                    f"""
                     UPDATE recovery_queue
                     SET status='running', updated_at=?
-                    WHERE id=? AND status IN ('pending','waiting_standby')
+                    WHERE id IN ({placeholders}) AND status IN ('pending','waiting_standby')
                     """,
-                    (now, queue_id),
+                    (self._now(), *queue_ids),
                 )
-                changed = int(
-                    update_cur.rowcount if update_cur.rowcount is not None and update_cur.rowcount >= 0 else 0
-                )
-                await update_cur.close()
-                if changed == 0:
-                    await conn.commit()
-                    return None
-
                 data_cur = await conn.execute(
-                    "SELECT * FROM recovery_queue WHERE id=?",
-                    (queue_id,),
+                    f"SELECT * FROM recovery_queue WHERE id IN ({placeholders}) AND status='running' ORDER BY id ASC",
+                    tuple(queue_ids),
                 )
-                data_row = await data_cur.fetchone()
+                data_rows = await data_cur.fetchall()
                 await data_cur.close()
                 await conn.commit()
-                return dict(data_row) if data_row else None
+                return [dict(row) for row in data_rows]
 
     async def claim_recovery_by_id(self, queue_id: int) -> dict[str, Any] | None:
         async with self._write_lock:
@@ -1247,13 +1377,16 @@ class Database:
     ) -> None:
         now = self._now()
         if retry_count + 1 < max_retry:
+            delay = min(RECOVERY_RETRY_BASE_SECONDS * 2 ** max(0, retry_count), RECOVERY_RETRY_MAX_SECONDS)
+            delay += random.uniform(-RECOVERY_RETRY_JITTER_SECONDS, RECOVERY_RETRY_JITTER_SECONDS)
+            next_retry_at = int(time.time() + max(0.0, delay))
             await self._execute(
                 """
                 UPDATE recovery_queue
-                SET status='pending', retry_count=?, last_error=?, updated_at=?
+                SET status='pending', retry_count=?, last_error=?, next_retry_at=?, updated_at=?
                 WHERE id=?
                 """,
-                (retry_count + 1, error_text[:500], now, queue_id),
+                (retry_count + 1, error_text[:500], next_retry_at, now, queue_id),
             )
         else:
             await self._execute(
@@ -1291,6 +1424,12 @@ class Database:
             """
         )
 
+    async def get_bound_channel_ids(self) -> set[int]:
+        rows = await self._fetch_all(
+            "SELECT DISTINCT channel_chat_id FROM topic_bindings WHERE active=1"
+        )
+        return {int(row["channel_chat_id"]) for row in rows}
+
     async def get_binding_by_channel(self, channel_chat_id: int) -> list[dict[str, Any]]:
         return await self._fetch_all(
             "SELECT * FROM topic_bindings WHERE channel_chat_id=? AND active=1",
@@ -48,7 +48,11 @@ async def lifespan(app: FastAPI):
     await telegram.start()
 
     topic_service = TopicService(db, telegram, settings_obj.topic_avatar_dir)
-    channel_service = ChannelService(db, telegram)
+    channel_service = ChannelService(
+        db,
+        telegram,
+        access_check_concurrency=settings_obj.monitor_concurrency,
+    )
     bot_channel_sync_service = BotChannelSyncService(db, settings_obj)
     clone_settings_service = CloneSettingsService(db)
     clone_service = CloneService(
@@ -130,10 +134,21 @@ async def lifespan(app: FastAPI):
     async def recovery_loop():
         while True:
             try:
-                if not (await telegram.is_bot_authorized()) or not (await telegram.is_user_authorized()):
+                bot_authorized, user_authorized = await asyncio.gather(
+                    telegram.is_bot_authorized(),
+                    telegram.is_user_authorized(),
+                )
+                if not bot_authorized or not user_authorized:
                     await asyncio.sleep(2)
                     continue
-                processed = await recovery_worker.run_once()
+                results = await recovery_worker.run_batch(
+                    settings_obj.recovery_batch_size,
+                    settings_obj.recovery_concurrency,
+                )
+                for result in results:
+                    if isinstance(result, BaseException):
+                        logger.error("recovery_loop 任务异常: %s", result)
+                processed = any(result is True for result in results)
                 if not processed:
                     await asyncio.sleep(2)
             except Exception as exc:
@@ -1,4 +1,4 @@
-﻿from fastapi import APIRouter, HTTPException, Request
+﻿from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel, Field
 
 from app.deps import get_state
@@ -63,6 +63,15 @@ async def create_qr(request: Request):
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
+@router.get("/qr/{session_id}.png")
+async def get_qr_image(session_id: str, request: Request):
+    state = get_state(request)
+    png = state.telegram.get_qr_png(session_id)
+    if png is None:
+        raise HTTPException(status_code=404, detail="二维码不存在或已过期")
+    return Response(content=png, media_type="image/png", headers={"Cache-Control": "no-store"})
+
+
 @router.get("/qr/poll/{session_id}")
 async def poll_qr(session_id: str, request: Request):
     state = get_state(request)
@@ -33,6 +33,19 @@ async def add_source_group(payload: AddSourceGroupRequest, request: Request):
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
+@router.post("/sync-topics")
+async def sync_all_topics(request: Request):
+    state = get_state(request)
+    groups = await state.topic_service.list_source_groups()
+    results = await state.topic_service.bulk_sync_topics([int(item["id"]) for item in groups])
+    return {
+        "ok": True,
+        "results": results,
+        "synced": sum(1 for item in results if item["ok"]),
+        "failed": sum(1 for item in results if not item["ok"]),
+    }
+
+
 @router.post("/{source_group_id}/sync-topics")
 async def sync_topics(source_group_id: int, request: Request):
     state = get_state(request)
@@ -1,6 +1,6 @@
 import asyncio
 import json
-from datetime import datetime, timezone
+import time
 from typing import Any
 from urllib import request as urlrequest
 
@@ -40,7 +40,9 @@ class BotChannelSyncService:
 
         max_update_id = offset
         tracked_channels = 0
-        now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        now_ts = int(time.time())
+        final_states: dict[int, tuple[str, str]] = {}
+        bound_ids = await self.db.get_bound_channel_ids()
 
         for item in updates:
             update_id = int(item.get("update_id", 0))
@@ -61,25 +63,26 @@ class BotChannelSyncService:
 
             title = (chat.get("title") or str(chat_id)).strip()
             status = ((payload.get("new_chat_member") or {}).get("status") or "").lower()
-            active_bindings = await self.db.get_binding_by_channel(chat_id)
-            is_admin = status in {"administrator", "creator"}
-            is_left = status in {"left", "kicked"}
-
-            if (is_left or not is_admin) and not active_bindings:
-                await self.db.delete_channel(chat_id)
-                tracked_channels += 1
-                continue
-
-            await self.db.upsert_channel(
-                chat_id=chat_id,
-                title=title,
-                # 备用池来源只认 Bot 事件：被设置为管理员即候选备用频道。
-                is_standby=is_admin and not bool(active_bindings),
-                in_use=bool(active_bindings),
-                admin_check_at=now_iso,
+            state = self._classify(
+                is_admin=status in {"administrator", "creator"},
+                is_left=status in {"left", "kicked"},
+                has_bindings=chat_id in bound_ids,
             )
+            # 同一频道可能在一批更新里出现多次，只保留最后一次状态，保证与逐条写入一致。
+            final_states[chat_id] = (state, title)
             tracked_channels += 1
 
+        deletes: list[int] = []
+        upserts: list[tuple[int, str, bool, bool, int | None]] = []
+        for chat_id, (state, title) in final_states.items():
+            if state == "delete":
+                deletes.append(chat_id)
+                continue
+            # 备用池来源只认 Bot 事件：被设置为管理员即候选备用频道。
+            upserts.append((chat_id, title, state == "standby", state == "inuse", now_ts))
+        await self.db.bulk_delete_channels(deletes)
+        await self.db.bulk_upsert_channels(upserts)
+
         await self.db.set_setting(self._offset_key, str(max_update_id))
         return {
             "ok": True,
@@ -87,6 +90,14 @@ class BotChannelSyncService:
             "tracked_channels": tracked_channels,
         }
 
+    @staticmethod
+    def _classify(is_admin: bool, is_left: bool, has_bindings: bool) -> str:
+        if (is_left or not is_admin) and not has_bindings:
+            return "delete"
+        if is_admin and not has_bindings:
+            return "standby"
+        return "inuse"
+
     async def _fetch_updates(self, offset: int, timeout_seconds: int) -> list[dict[str, Any]]:
         return await asyncio.to_thread(
             self._fetch_updates_sync,
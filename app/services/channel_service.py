@@ -3,6 +3,8 @@ import json
 import logging
 from pathlib import Path
 import re
+import time
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from typing import Any
 from urllib import error as urlerror
@@ -19,83 +21,142 @@ from app.services.telegram_manager import TelegramManager
 
 logger = logging.getLogger(__name__)
 
+ADMIN_CHECK_CONCURRENCY = 8
+CHANNEL_ACCESS_CONCURRENCY = 8
+
+
+@dataclass(slots=True)
+class RefreshReport:
+    scanned_channels: int = 0
+    discovered: int = 0
+    removed: int = 0
+    checked_permissions: int = 0
+    skipped_permission_checks: int = 0
+    standby_count: int = 0
+    warning: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        if self.warning is None:
+            data.pop("warning")
+        return data
+
 
 class ChannelService:
-    def __init__(self, db: Database, telegram: TelegramManager):
+    def __init__(
+        self,
+        db: Database,
+        telegram: TelegramManager,
+        admin_recheck_interval: int = 600,
+        access_check_concurrency: int = CHANNEL_ACCESS_CONCURRENCY,
+    ):
         self.db = db
         self.telegram = telegram
+        self.admin_recheck_interval = max(0, int(admin_recheck_interval))
+        # 监控扫描与接口调用共用同一信号量，限制同时进行的 Bot 探测数量，避免瞬时请求风暴。
+        self._access_semaphore = asyncio.Semaphore(max(1, int(access_check_concurrency)))
+
+    def _needs_admin_recheck(self, channel_row: dict[str, Any] | None) -> bool:
+        if not channel_row:
+            return True
+        try:
+            checked_at = int(channel_row.get("admin_check_at") or 0)
+        except (TypeError, ValueError):
+            checked_at = 0
+        return (time.time() - checked_at) >= self.admin_recheck_interval
 
     async def _is_bot_admin(self, chat_id: int) -> bool:
         try:
-            bot_entity = await self.telegram.bot_client.get_entity(chat_id)
+            bot_entity = await self.telegram.get_cached_entity(chat_id)
             permissions = await self.telegram.bot_client.get_permissions(bot_entity, "me")
             return bool(permissions and permissions.is_admin)
+        except tg_errors.FloodWaitError:
+            raise
         except Exception:
             return False
 
+    async def _check_bot_admin_limited(self, semaphore: asyncio.Semaphore, chat_id: int) -> bool | None:
+        async with semaphore:
+            for _ in range(2):
+                try:
+                    return await self._is_bot_admin(chat_id)
+                except tg_errors.FloodWaitError as flood:
+                    logger.warning(
+                        "备用频道权限校验触发 FloodWait，等待 %ss 后重试: channel=%s",
+                        int(flood.seconds),
+                        chat_id,
+                    )
+                    await asyncio.sleep(int(flood.seconds) + 1)
+        # 连续限流时结果未知，返回 None 由调用方保留原记录。
+        return None
+
     async def refresh_standby_channels(self) -> dict[str, Any]:
+        report = RefreshReport()
         if not await self.telegram.is_bot_authorized():
-            return {
-                "scanned_channels": 0,
-                "discovered": 0,
-                "checked_permissions": 0,
-                "skipped_permission_checks": 0,
-                "standby_count": len(await self.db.list_standby_channels()),
-                "warning": "Bot 未登录，无法校验备用频道权限",
-            }
+            report.standby_count = len(await self.db.list_standby_channels())
+            report.warning = "Bot 未登录，无法校验备用频道权限"
+            return report.to_dict()
 
-        await self.telegram.ensure_bot_connected()
-
-        removed = 0
-        scanned_channels = 0
-        checked_permissions = 0
-        now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        deletes: list[int] = []
+        upserts: list[tuple[int, str, bool, bool, int | None]] = []
+        now_ts = int(time.time())
         standby_channels = await self.db.list_standby_channels()
+        bound_ids = await self.db.get_bound_channel_ids()
 
         # 仅校验当前备用池，不从历史 channels 缓存扩容。
+        to_check = [
+            int(channel_row["chat_id"])
+            for channel_row in standby_channels
+            if self._needs_admin_recheck(channel_row)
+        ]
+        semaphore = asyncio.Semaphore(ADMIN_CHECK_CONCURRENCY)
+        check_results = await asyncio.gather(
+            *[self._check_bot_admin_limited(semaphore, chat_id) for chat_id in to_check]
+        )
+        admin_results = dict(zip(to_check, check_results))
+
         for channel_row in standby_channels:
-            scanned_channels += 1
+            report.scanned_channels += 1
             chat_id = int(channel_row["chat_id"])
             title = str(channel_row.get("title") or chat_id)
-            checked_permissions += 1
-            is_admin = await self._is_bot_admin(chat_id)
-
-            active_bindings = await self.db.get_binding_by_channel(chat_id)
-            if not is_admin:
-                if active_bindings:
-                    await self.db.upsert_channel(
-                        chat_id=chat_id,
-                        title=title,
-                        is_standby=False,
-                        in_use=True,
-                        admin_check_at=now_iso,
-                    )
-                else:
-                    await self.db.delete_channel(chat_id)
-                    removed += 1
+            admin_check_at: int | None = None
+            if chat_id in admin_results:
+                report.checked_permissions += 1
+                is_admin = admin_results[chat_id]
+                if is_admin is None:
+                    continue
+                admin_check_at = now_ts
+            else:
+                # 管理员校验仍在有效期内，沿用上次结果且不刷新 admin_check_at。
+                report.skipped_permission_checks += 1
+                is_admin = True
+
+            active_bindings = chat_id in bound_ids
+            if not is_admin and not active_bindings:
+                deletes.append(chat_id)
                 continue
 
-            await self.db.upsert_channel(
-                chat_id=chat_id,
-                title=title,
-                is_standby=not bool(active_bindings),
-                in_use=bool(active_bindings),
-                admin_check_at=now_iso,
+            upserts.append(
+                (
+                    chat_id,
+                    title,
+                    is_admin and not active_bindings,
+                    active_bindings,
+                    admin_check_at,
+                )
             )
 
-        return {
-            "scanned_channels": scanned_channels,
-            "discovered": len(await self.db.list_standby_channels()),
-            "removed": removed,
-            "checked_permissions": checked_permissions,
-            "skipped_permission_checks": 0,
-            "standby_count": len(await self.db.list_standby_channels()),
-        }
+        # 写入集中在循环结束后一次性提交，避免每个频道一次数据库往返。
+        await self.db.bulk_delete_channels(deletes)
+        await self.db.bulk_upsert_channels(upserts)
+        report.removed = len(deletes)
+        report.standby_count = len(await self.db.list_standby_channels())
+        report.discovered = report.standby_count
+        return report.to_dict()
 
     async def add_standby_channels_batch(self, refs_text: str) -> dict[str, Any]:
         if not await self.telegram.is_bot_authorized():
             raise RuntimeError("Bot 未登录，无法添加备用频道")
-        await self.telegram.ensure_bot_connected()
 
         refs = [line.strip() for line in (refs_text or "").splitlines() if line.strip()]
         if not refs:
@@ -107,11 +168,13 @@ class ChannelService:
                 "standby_count": len(await self.db.list_standby_channels()),
             }
 
-        now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        now_ts = int(time.time())
         added = 0
         updated = 0
         failed: list[dict[str, str]] = []
         visited: set[str] = set()
+        channels_map = await self.db.get_channels_map()
+        bound_ids = await self.db.get_bound_channel_ids()
 
         for ref in refs:
             if ref in visited:
@@ -128,14 +191,14 @@ class ChannelService:
                 if not await self._is_bot_admin(chat_id):
                     raise ValueError("Bot 不是该频道管理员，请先在 Telegram 里设置 Bot 为管理员")
 
-                active_bindings = await self.db.get_binding_by_channel(chat_id)
-                existed = await self.db.get_channel(chat_id)
-                await self.db.upsert_channel(
+                active_bindings = chat_id in bound_ids
+                existed = chat_id in channels_map
+                channels_map[chat_id] = await self.db.upsert_channel(
                     chat_id=chat_id,
                     title=title,
-                    is_standby=not bool(active_bindings),
-                    in_use=bool(active_bindings),
-                    admin_check_at=now_iso,
+                    is_standby=not active_bindings,
+                    in_use=active_bindings,
+                    admin_check_at=now_ts,
                 )
                 if existed:
                     updated += 1
@@ -256,7 +319,7 @@ class ChannelService:
         return Path(self.telegram.settings.topic_avatar_dir) / safe_name
 
     async def rename_channel(self, channel_chat_id: int, new_title: str) -> None:
-        entity = await self.telegram.bot_client.get_entity(channel_chat_id)
+        entity = await self.telegram.get_cached_entity(channel_chat_id)
         try:
             await self.telegram.bot_client(
                 functions.channels.EditTitleRequest(
@@ -267,6 +330,7 @@ class ChannelService:
         except Exception as exc:
             if not self._is_not_modified_error(exc):
                 raise RuntimeError(self._friendly_channel_profile_error(exc, "标题")) from exc
+        self.telegram.invalidate_entity(channel_chat_id)
         await self.db.mark_channel_last_seen(channel_chat_id, title=(new_title or "未命名话题")[:128])
 
     async def set_channel_avatar(self, channel_chat_id: int, avatar_path: str) -> None:
@@ -278,7 +342,7 @@ class ChannelService:
         if not raw_bytes:
             raise RuntimeError("频道头像文件为空，请重新上传")
 
-        entity = await self.telegram.bot_client.get_entity(channel_chat_id)
+        entity = await self.telegram.get_cached_entity(channel_chat_id)
         try:
             uploaded = await self.telegram.bot_client.upload_file(raw_bytes, file_name=avatar_file.name)
             await self.telegram.bot_client(
@@ -562,7 +626,8 @@ class ChannelService:
 
     async def check_channel_access(self, channel_chat_id: int) -> tuple[bool, str | None]:
         # 用户要求：以 Bot 实发测试消息+立即删除来判定频道是否可用。
-        bot_ok, bot_title, bot_error = await self._probe_bot_send_then_delete(channel_chat_id)
+        async with self._access_semaphore:
+            bot_ok, bot_title, bot_error = await self._probe_bot_send_then_delete(channel_chat_id)
         if not bot_ok:
             return False, bot_error or "Bot 无法访问目标频道"
 
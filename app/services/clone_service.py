@@ -2,8 +2,10 @@ import asyncio
 import copy
 import logging
 import mimetypes
+import os
+import shutil
 import tempfile
-from collections import deque
+from collections import OrderedDict, deque
 from collections.abc import Awaitable, Callable
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -18,9 +20,33 @@ from app.services.clone_runtime_settings import CloneRuntimeSettings, CloneSetti
 from app.services.fast_telethon_transfer import fast_upload_file
 from app.services.media_md5_mutator import mutate_media_file_md5
 from app.services.telegram_manager import TelegramManager
+from app.services.token_bucket import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+# 不需要改 MD5 的小文件直接在内存中中转，省去一次落盘与回读。
+IN_MEMORY_MEDIA_MAX_BYTES = 16 * 1024 * 1024
+# Telegram 单次 forwardMessages 最多 100 条。
+FORWARD_BATCH_SIZE = 100
+# 历史按 id 升序遍历，相册成员彼此相邻，只需记住最近处理过的相册 id。
+PROCESSED_GROUPS_MAX = 10000
+
+
+def _drop_page_cache(file_path: str) -> None:
+    # 媒体上传完成后不会再读，通知内核释放其页缓存，避免大文件挤占热数据；DONTNEED 作用于文件本身，另开 fd 即可。
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
 
 @dataclass(slots=True)
 class PreparedMediaItem:
@@ -33,6 +59,7 @@ class PreparedMediaItem:
     supports_streaming: bool
     caption: str | None
     caption_entities: list[Any] | None
+    file_bytes: bytes | None = None
 
 
 @dataclass(slots=True)
@@ -43,7 +70,7 @@ class HistoryCloneUnit:
     skipped_count: int
     runtime_settings: CloneRuntimeSettings
     prepared_media_items: list[PreparedMediaItem] = field(default_factory=list)
-    temp_dir_obj: Any | None = None
+    work_dir: str | None = None
     needs_prefetch_download: bool = False
 
     @property
@@ -63,6 +90,8 @@ class CloneService:
         self.db = db
         self.settings_service = settings_service or CloneSettingsService(db)
         self.download_temp_dir = str(download_temp_dir or "").strip() or None
+        # 发送节流：替代固定 sleep，按 FloodWait 情况自适应调整速率。
+        self._send_limiter = TokenBucket()
 
     def _create_temp_dir(self) -> tempfile.TemporaryDirectory:
         base_dir = self.download_temp_dir
@@ -70,6 +99,12 @@ class CloneService:
             Path(base_dir).mkdir(parents=True, exist_ok=True)
         return tempfile.TemporaryDirectory(prefix="tg_clone_", dir=base_dir)
 
+    @staticmethod
+    def _release_unit_work_dir(unit: HistoryCloneUnit) -> None:
+        if unit.work_dir is not None:
+            shutil.rmtree(unit.work_dir, ignore_errors=True)
+            unit.work_dir = None
+
     @staticmethod
     def extract_topic_id(message: Message) -> int | None:
         reply_to = getattr(message, "reply_to", None)
@@ -88,11 +123,20 @@ class CloneService:
         return None
 
     @classmethod
-    def in_topic(cls, message: Message, topic_id: int) -> bool:
+    def in_topic(cls, message: Message, topic_id: int, mid: int | None = None) -> bool:
+        # 话题内消息绝大多数带 reply_to_top_id，命中时直接比较，不走完整的提取分支。
+        reply_to = getattr(message, "reply_to", None)
+        if reply_to is not None:
+            top_id = getattr(reply_to, "reply_to_top_id", None)
+            if top_id:
+                return top_id == topic_id
         msg_topic_id = cls.extract_topic_id(message)
-        if msg_topic_id is None and int(getattr(message, "id", 0)) == int(topic_id):
-            return True
-        return int(msg_topic_id or 0) == int(topic_id)
+        if msg_topic_id is None:
+            # 调用方已取出消息 id 时直接复用，避免热循环里重复 getattr/int 转换。
+            if mid is None:
+                mid = int(getattr(message, "id", 0) or 0)
+            return mid == int(topic_id)
+        return msg_topic_id == int(topic_id)
 
     @staticmethod
     def is_cloneable(message: Message) -> bool:
@@ -132,8 +176,10 @@ class CloneService:
                     target_channel,
                     message_ids,
                 )
+                self._send_limiter.on_success()
                 return True
             except FloodWaitError as flood:
+                self._send_limiter.on_flood_wait()
                 logger.warning(
                     "无引用转发触发 FloodWait: source=%s target=%s ids=%s wait=%ss",
                     source_chat_id,
@@ -175,8 +221,10 @@ class CloneService:
                     formatting_entities=entities,
                 )
                 logger.info("文本复制成功: msg_id=%s target=%s", message_id, target_channel)
+                self._send_limiter.on_success()
                 return True
             except FloodWaitError as flood:
+                self._send_limiter.on_flood_wait()
                 logger.warning(
                     "文本复制触发 FloodWait: msg_id=%s target=%s wait=%ss",
                     message_id,
@@ -197,6 +245,7 @@ class CloneService:
         target_channel: int,
         runtime_settings: CloneRuntimeSettings,
         on_error: Callable[[Exception], None] | None = None,
+        temp_dir: str | None = None,
     ) -> bool:
         if not self.is_cloneable(message):
             return False
@@ -208,11 +257,13 @@ class CloneService:
                     target_channel=target_channel,
                     runtime_settings=runtime_settings,
                     on_error=on_error,
+                    temp_dir=temp_dir,
                 )
             return await self._copy_single_message_with_direct_fallback(
                 message=message,
                 target_channel=target_channel,
                 on_error=on_error,
+                temp_dir=temp_dir,
             )
 
         return await self._send_text_message(message, target_channel, on_error=on_error)
@@ -222,6 +273,7 @@ class CloneService:
         message: Message,
         target_channel: int,
         on_error: Callable[[Exception], None] | None = None,
+        temp_dir: str | None = None,
     ) -> bool:
         message_id = int(getattr(message, "id", 0) or 0)
         caption = (getattr(message, "message", None) or getattr(message, "text", None)) or None
@@ -237,6 +289,7 @@ class CloneService:
                         formatting_entities=caption_entities,
                     )
                     logger.info("媒体复制成功(直传媒体对象): msg_id=%s target=%s", message_id, target_channel)
+                    self._send_limiter.on_success()
                     return True
                 except Exception as direct_send_exc:
                     logger.warning(
@@ -251,8 +304,10 @@ class CloneService:
                         target_channel=target_channel,
                         runtime_settings=fallback_settings,
                         on_error=on_error,
+                        temp_dir=temp_dir,
                     )
             except FloodWaitError as flood:
+                self._send_limiter.on_flood_wait()
                 logger.warning(
                     "复制发送触发 FloodWait: msg_id=%s target=%s wait=%ss",
                     message_id,
@@ -274,6 +329,7 @@ class CloneService:
         source_chat_id: int | None = None,
         raise_on_send_error: bool = False,
         source_group_id: int | None = None,
+        temp_dir: str | None = None,
     ) -> bool:
         if not self.is_cloneable(message):
             return False
@@ -301,6 +357,7 @@ class CloneService:
             target_channel,
             runtime_settings=runtime_settings,
             on_error=capture_error,
+            temp_dir=temp_dir,
         )
         if copied:
             return True
@@ -315,26 +372,29 @@ class CloneService:
         topic_id: int,
         reference_message: Message,
         search_window: int = 80,
-    ) -> list[Message]:
+    ) -> tuple[list[Message], int]:
+        # 返回按 id 排序的相册消息及其最大 id，调用方无需再遍历一次求断点。
         grouped_id = getattr(reference_message, "grouped_id", None)
         if not grouped_id:
-            return [reference_message]
+            return [reference_message], int(reference_message.id)
         if not self.in_topic(reference_message, topic_id):
-            return []
+            return [], 0
 
         min_id = max(0, int(reference_message.id) - search_window)
         max_id = int(reference_message.id) + search_window
         collected: dict[int, Message] = {int(reference_message.id): reference_message}
+        window_fetched = False
         try:
-            async for msg in self.telegram.user_client.iter_messages(
+            # 按明确的 id 区间批量拉取，比分页迭代更少请求；不存在的 id 返回 None。
+            window_messages = await self.telegram.user_client.get_messages(
                 source_chat_id,
-                min_id=min_id,
-                max_id=max_id,
-                limit=search_window * 4,
-            ):
-                if getattr(msg, "grouped_id", None) != grouped_id:
+                ids=list(range(max(1, min_id), max_id + 1)),
+            )
+            for msg in window_messages or []:
+                if msg is None or getattr(msg, "grouped_id", None) != grouped_id:
                     continue
                 collected[int(msg.id)] = msg
+            window_fetched = True
         except Exception as exc:
             logger.warning(
                 "收集相册消息失败，使用已收集结果继续: source=%s grouped_id=%s ref_msg_id=%s reason=%s",
@@ -344,7 +404,8 @@ class CloneService:
                 str(exc),
             )
 
-        if len(collected) <= 1:
+        # 相册最多 10 条，窗口拉取成功时已覆盖整组；只有窗口拉取失败才扩大范围扫描。
+        if len(collected) <= 1 and not window_fetched:
             try:
                 scanned = 0
                 found_any = False
@@ -359,7 +420,8 @@ class CloneService:
             except Exception as exc:
                 logger.warning("扩大范围收集相册失败: source=%s grouped_id=%s reason=%s", source_chat_id, int(grouped_id), str(exc))
 
-        return sorted(collected.values(), key=lambda x: int(x.id))
+        ordered_ids = sorted(collected)
+        return [collected[mid] for mid in ordered_ids], ordered_ids[-1]
 
     async def _clone_media_group_no_reference(
         self,
@@ -367,6 +429,7 @@ class CloneService:
         source_chat_id: int,
         target_channel: int,
         runtime_settings: CloneRuntimeSettings,
+        temp_dir: str | None = None,
     ) -> int:
         if not messages:
             return 0
@@ -376,6 +439,7 @@ class CloneService:
                 messages=messages,
                 target_channel=target_channel,
                 runtime_settings=runtime_settings,
+                temp_dir=temp_dir,
             )
             return len(messages) if ok else 0
 
@@ -405,13 +469,18 @@ class CloneService:
             )
             if single_forwarded:
                 success += 1
-                await asyncio.sleep(0.03)
+                await self._send_limiter.acquire()
                 continue
 
-            ok = await self._copy_single_message(msg, target_channel, runtime_settings=runtime_settings)
+            ok = await self._copy_single_message(
+                msg,
+                target_channel,
+                runtime_settings=runtime_settings,
+                temp_dir=temp_dir,
+            )
             if ok:
                 success += 1
-            await asyncio.sleep(0.03)
+            await self._send_limiter.acquire()
         logger.info("相册逐条处理完成: source=%s target=%s success=%s total=%s", source_chat_id, target_channel, success, len(messages))
         return success
 
@@ -422,25 +491,28 @@ class CloneService:
         effective_start_message_id: int,
         source_group_id: int | None = None,
     ):
-        processed_groups: set[int] = set()
+        processed_groups: OrderedDict[int, None] = OrderedDict()
         async for message in self.telegram.user_client.iter_messages(
             source_chat_id,
             reverse=True,
             min_id=effective_start_message_id,
         ):
-            if not self.in_topic(message, topic_id):
+            # 每条消息只取一次 id/grouped_id，后续判断复用局部变量。
+            grouped_id = int(getattr(message, "grouped_id", None) or 0)
+            # 同一相册的后续成员已随首条消息整组处理，先判重可省去话题判断与设置读取。
+            if grouped_id and grouped_id in processed_groups:
+                continue
+            current_message_id = int(getattr(message, "id", 0) or 0)
+            if not self.in_topic(message, topic_id, mid=current_message_id):
                 continue
 
             runtime_settings = await self._load_runtime_settings(source_group_id)
-            grouped_id = getattr(message, "grouped_id", None)
-            current_message_id = int(getattr(message, "id", 0) or 0)
             if grouped_id:
-                grouped_id = int(grouped_id)
-                if grouped_id in processed_groups:
-                    continue
-                processed_groups.add(grouped_id)
+                processed_groups[grouped_id] = None
+                if len(processed_groups) > PROCESSED_GROUPS_MAX:
+                    processed_groups.popitem(last=False)
 
-                group_messages = await self._collect_media_group_messages(
+                group_messages, group_max_id = await self._collect_media_group_messages(
                     source_chat_id=source_chat_id,
                     topic_id=topic_id,
                     reference_message=message,
@@ -453,7 +525,7 @@ class CloneService:
                 cloneable_messages = [m for m in group_messages if self.is_cloneable(m)]
                 yield HistoryCloneUnit(
                     messages=cloneable_messages,
-                    checkpoint_message_id=max(int(m.id) for m in group_messages),
+                    checkpoint_message_id=group_max_id,
                     total_count=len(group_messages),
                     skipped_count=len(group_messages) - len(cloneable_messages),
                     runtime_settings=runtime_settings,
@@ -470,27 +542,27 @@ class CloneService:
                     needs_prefetch_download=runtime_settings.md5_mutation_enabled and bool(getattr(message, "media", None)),
                 )
 
-    async def _prepare_history_unit(self, unit: HistoryCloneUnit) -> HistoryCloneUnit:
+    async def _prepare_history_unit(self, unit: HistoryCloneUnit, temp_root: str) -> HistoryCloneUnit:
         if not unit.needs_prefetch_download or not unit.messages:
             return unit
 
-        temp_dir_obj = self._create_temp_dir()
-        unit.temp_dir_obj = temp_dir_obj
+        work_dir = Path(temp_root) / f"unit_{unit.checkpoint_message_id}"
+        work_dir.mkdir(parents=True, exist_ok=True)
+        unit.work_dir = str(work_dir)
         try:
             for index, message in enumerate(unit.messages):
                 if not getattr(message, "media", None):
                     continue
                 prepared_item = await self._download_media_item(
                     message=message,
-                    temp_root=temp_dir_obj.name,
+                    temp_root=unit.work_dir,
                     item_index=index,
                     runtime_settings=unit.runtime_settings,
                 )
                 unit.prepared_media_items.append(prepared_item)
             return unit
         except Exception:
-            temp_dir_obj.cleanup()
-            unit.temp_dir_obj = None
+            self._release_unit_work_dir(unit)
             raise
 
     async def _download_media_item(
@@ -500,13 +572,23 @@ class CloneService:
         item_index: int,
         runtime_settings: CloneRuntimeSettings,
     ) -> PreparedMediaItem:
-        item_dir = Path(temp_root) / f"item_{item_index + 1}_{int(getattr(message, 'id', 0) or 0)}"
+        message_id = int(getattr(message, "id", 0) or 0)
+        item_dir = Path(temp_root) / f"item_{item_index + 1}_{message_id}"
         item_dir.mkdir(parents=True, exist_ok=True)
+        document = getattr(getattr(message, "media", None), "document", None)
 
-        file_path = await self.telegram.user_client.download_media(message, file=str(item_dir))
-        if not file_path:
-            raise RuntimeError(f"下载媒体失败: msg_id={int(getattr(message, 'id', 0) or 0)}")
-        file_path = str(file_path)
+        file_bytes: bytes | None = None
+        media_size = self._media_size(message, document)
+        if not runtime_settings.md5_mutation_enabled and 0 < media_size <= IN_MEMORY_MEDIA_MAX_BYTES:
+            file_bytes = await self.telegram.user_client.download_media(message, file=bytes)
+            if not file_bytes:
+                raise RuntimeError(f"下载媒体失败: msg_id={message_id}")
+            file_path = str(item_dir / self._media_file_name(message, document))
+        else:
+            downloaded_path = await self.telegram.user_client.download_media(message, file=str(item_dir))
+            if not downloaded_path:
+                raise RuntimeError(f"下载媒体失败: msg_id={message_id}")
+            file_path = str(downloaded_path)
 
         thumb_path: str | None = None
         try:
@@ -516,7 +598,6 @@ class CloneService:
         except Exception:
             thumb_path = None
 
-        document = getattr(getattr(message, "media", None), "document", None)
         mime_type = str(getattr(document, "mime_type", "") or "").strip() or None
         if mime_type is None:
             mime_type = mimetypes.guess_type(file_path)[0]
@@ -533,8 +614,31 @@ class CloneService:
             supports_streaming=bool(getattr(message, "video", False)),
             caption=(getattr(message, "message", None) or getattr(message, "text", None)) or None,
             caption_entities=getattr(message, "entities", None),
+            file_bytes=file_bytes,
         )
 
+    @staticmethod
+    def _media_size(message: Message, document: Any) -> int:
+        size = getattr(document, "size", None)
+        if size is None:
+            size = getattr(getattr(message, "file", None), "size", None)
+        try:
+            return int(size or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    @classmethod
+    def _media_file_name(cls, message: Message, document: Any) -> str:
+        name = str(getattr(getattr(message, "file", None), "name", None) or "").strip()
+        if name:
+            return Path(name).name
+        if cls._is_photo_message(message):
+            extension = ".jpg"
+        else:
+            mime_type = str(getattr(document, "mime_type", "") or "").strip()
+            extension = mimetypes.guess_extension(mime_type) or ""
+        return f"media_{int(getattr(message, 'id', 0) or 0)}{extension}"
+
     @staticmethod
     def _clone_document_attributes(document: Any) -> list[Any]:
         if not document or not getattr(document, "attributes", None):
@@ -554,15 +658,24 @@ class CloneService:
         target_channel: int,
         runtime_settings: CloneRuntimeSettings,
         on_error: Callable[[Exception], None] | None = None,
+        temp_dir: str | None = None,
     ) -> bool:
-        temp_dir_obj = self._create_temp_dir()
+        # 传入 temp_dir 时复用话题级临时目录，只为本次复制建子目录；否则单独创建临时目录。
+        temp_dir_obj: tempfile.TemporaryDirectory | None = None
+        if temp_dir:
+            first_id = int(getattr(messages[0], "id", 0) or 0) if messages else 0
+            work_root = str(Path(temp_dir) / f"copy_{first_id}")
+            Path(work_root).mkdir(parents=True, exist_ok=True)
+        else:
+            temp_dir_obj = self._create_temp_dir()
+            work_root = temp_dir_obj.name
         try:
             prepared_items: list[PreparedMediaItem] = []
             for index, message in enumerate(messages):
                 prepared_items.append(
                     await self._download_media_item(
                         message=message,
-                        temp_root=temp_dir_obj.name,
+                        temp_root=work_root,
                         item_index=index,
                         runtime_settings=runtime_settings,
                     )
@@ -583,7 +696,10 @@ class CloneService:
             )
             return False
         finally:
-            temp_dir_obj.cleanup()
+            if temp_dir_obj is not None:
+                temp_dir_obj.cleanup()
+            else:
+                shutil.rmtree(work_root, ignore_errors=True)
 
     async def _send_prepared_media_items(
         self,
@@ -595,35 +711,23 @@ class CloneService:
             return False
 
         message_ids = [int(getattr(item.message, "id", 0) or 0) for item in prepared_items]
+        # 发送参数（含已上传的媒体）整组只构建一次，FloodWait 重试时直接复用，不再重复上传。
+        send_kwargs: dict[str, Any] | None = None
         for _ in range(2):
             try:
-                media_inputs = []
-                for item in prepared_items:
-                    media_inputs.append(await self._build_input_media(item))
-
-                if len(media_inputs) == 1:
-                    item = prepared_items[0]
-                    await self.telegram.user_client.send_file(
-                        entity=target_channel,
-                        file=media_inputs[0],
-                        caption=item.caption,
-                        formatting_entities=item.caption_entities,
-                    )
-                else:
-                    await self.telegram.user_client.send_file(
-                        entity=target_channel,
-                        file=media_inputs,
-                        caption=[item.caption or "" for item in prepared_items],
-                        formatting_entities=[item.caption_entities or [] for item in prepared_items],
-                    )
+                if send_kwargs is None:
+                    send_kwargs = await self._build_send_kwargs(prepared_items, target_channel)
+                await self.telegram.user_client.send_file(**send_kwargs)
                 logger.info(
                     "媒体复制成功(下载重传): ids=%s target=%s count=%s",
                     message_ids,
                     target_channel,
                     len(prepared_items),
                 )
+                self._send_limiter.on_success()
                 return True
             except FloodWaitError as flood:
+                self._send_limiter.on_flood_wait()
                 logger.warning(
                     "下载上传触发 FloodWait: ids=%s target=%s wait=%ss",
                     message_ids,
@@ -638,8 +742,32 @@ class CloneService:
                 return False
         return False
 
+    async def _build_send_kwargs(self, prepared_items: list[PreparedMediaItem], target_channel: int) -> dict[str, Any]:
+        media_inputs = [await self._build_input_media(item) for item in prepared_items]
+        if len(media_inputs) == 1:
+            item = prepared_items[0]
+            return {
+                "entity": target_channel,
+                "file": media_inputs[0],
+                "caption": item.caption,
+                "formatting_entities": item.caption_entities,
+            }
+        return {
+            "entity": target_channel,
+            "file": media_inputs,
+            "caption": [item.caption or "" for item in prepared_items],
+            "formatting_entities": [item.caption_entities or [] for item in prepared_items],
+        }
+
     async def _build_input_media(self, item: PreparedMediaItem):
-        uploaded_file = await fast_upload_file(self.telegram.user_client, item.file_path)
+        if item.file_bytes is not None:
+            uploaded_file = await self.telegram.user_client.upload_file(
+                item.file_bytes,
+                file_name=Path(item.file_path).name,
+            )
+        else:
+            uploaded_file = await fast_upload_file(self.telegram.user_client, item.file_path)
+            _drop_page_cache(item.file_path)
         if item.is_photo:
             return InputMediaUploadedPhoto(file=uploaded_file)
 
@@ -665,7 +793,13 @@ class CloneService:
                     attr.supports_streaming = True
         return normalized
 
-    async def _consume_history_unit(self, unit: HistoryCloneUnit, source_chat_id: int, target_channel: int) -> int:
+    async def _consume_history_unit(
+        self,
+        unit: HistoryCloneUnit,
+        source_chat_id: int,
+        target_channel: int,
+        temp_root: str | None = None,
+    ) -> int:
         try:
             if not unit.messages:
                 return 0
@@ -684,6 +818,7 @@ class CloneService:
                     source_chat_id=source_chat_id,
                     target_channel=target_channel,
                     runtime_settings=unit.runtime_settings,
+                    temp_dir=temp_root,
                 )
                 return ok_count
             else:
@@ -691,13 +826,20 @@ class CloneService:
                     unit.messages[0],
                     target_channel,
                     runtime_settings=unit.runtime_settings,
+                    temp_dir=temp_root,
                 )
 
             return len(unit.messages) if ok else 0
         finally:
-            if unit.temp_dir_obj is not None:
-                unit.temp_dir_obj.cleanup()
-                unit.temp_dir_obj = None
+            self._release_unit_work_dir(unit)
+
+    @staticmethod
+    def _is_forward_batchable(unit: HistoryCloneUnit) -> bool:
+        return (
+            not unit.needs_prefetch_download
+            and not unit.runtime_settings.md5_mutation_enabled
+            and len(unit.messages) <= 1
+        )
 
     async def clone_topic_history(
         self,
@@ -720,6 +862,9 @@ class CloneService:
         pending_units: deque[HistoryCloneUnit] = deque()
         pending_tasks: deque[asyncio.Task[HistoryCloneUnit]] = deque()
         pending_prefetch_count = 0
+        # 整个话题克隆共用一个临时根目录，各单元在其下建子目录，结束时统一清理。
+        temp_dir_obj = self._create_temp_dir()
+        temp_root = temp_dir_obj.name
 
         logger.info(
             "开始克隆话题历史: source=%s topic=%s target=%s request_start=%s effective_start=%s",
@@ -730,16 +875,53 @@ class CloneService:
             effective_start_message_id,
         )
 
-        async def consume_next_pending() -> None:
-            nonlocal cloned, skipped, total, checkpoint_message_id, pending_checkpoint_count, processed_units, pending_prefetch_count
-            unit = pending_units.popleft()
-            task = pending_tasks.popleft()
-            if unit.needs_prefetch_download:
-                pending_prefetch_count -= 1
-            prepared_unit = await task
+        forward_batch: list[HistoryCloneUnit] = []
+        # 断点写入交给后台任务，单槽队列只保留最新断点，避免数据库写入阻塞克隆循环。
+        checkpoint_queue: asyncio.Queue[int | None] = asyncio.Queue(maxsize=1)
+        checkpoint_writer: asyncio.Task[None] | None = None
+
+        async def write_checkpoints() -> None:
+            while True:
+                message_id = await checkpoint_queue.get()
+                if message_id is None:
+                    return
+                await progress_hook(message_id)
+
+        def raise_checkpoint_error() -> None:
+            # 断点写入失败（含手动停止时 save_checkpoint 抛出的异常）立即中断克隆，而不是拖到结束才发现。
+            if checkpoint_writer is not None and checkpoint_writer.done() and not checkpoint_writer.cancelled():
+                error = checkpoint_writer.exception()
+                if error is not None:
+                    raise error
+
+        def submit_checkpoint(message_id: int) -> None:
+            nonlocal checkpoint_writer
+            raise_checkpoint_error()
+            if checkpoint_writer is None:
+                checkpoint_writer = asyncio.create_task(write_checkpoints())
+            try:
+                checkpoint_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            checkpoint_queue.put_nowait(message_id)
+
+        async def stop_checkpoint_writer() -> BaseException | None:
+            if checkpoint_writer is None:
+                return None
+            if not checkpoint_writer.done():
+                # 哨兵排在待写断点之后，确保最后一个断点先落库；写入任务若中途异常退出则不再等待入队。
+                put_sentinel = asyncio.create_task(checkpoint_queue.put(None))
+                await asyncio.wait({put_sentinel, checkpoint_writer}, return_when=asyncio.FIRST_COMPLETED)
+                if not put_sentinel.done():
+                    put_sentinel.cancel()
+                    await asyncio.gather(put_sentinel, return_exceptions=True)
+            results = await asyncio.gather(checkpoint_writer, return_exceptions=True)
+            return results[0] if isinstance(results[0], BaseException) else None
+
+        async def record_unit(prepared_unit: HistoryCloneUnit, ok_count: int) -> None:
+            nonlocal cloned, skipped, total, checkpoint_message_id, pending_checkpoint_count, processed_units
             total += prepared_unit.total_count
             skipped += prepared_unit.skipped_count
-            ok_count = await self._consume_history_unit(prepared_unit, source_chat_id, target_channel)
             if ok_count != prepared_unit.cloneable_count:
                 unit_type = "相册" if len(prepared_unit.messages) > 1 else "单条"
                 raise RuntimeError(
@@ -751,8 +933,10 @@ class CloneService:
             processed_units += 1
 
             if progress_hook and pending_checkpoint_count >= 5:
-                await progress_hook(checkpoint_message_id)
+                submit_checkpoint(checkpoint_message_id)
                 pending_checkpoint_count = 0
+            else:
+                raise_checkpoint_error()
 
             if processed_units % 20 == 0:
                 logger.info(
@@ -766,6 +950,36 @@ class CloneService:
                     checkpoint_message_id,
                 )
 
+        async def consume_next_pending() -> None:
+            nonlocal pending_prefetch_count
+            unit = pending_units.popleft()
+            task = pending_tasks.popleft()
+            if unit.needs_prefetch_download:
+                pending_prefetch_count -= 1
+            prepared_unit = await task
+            ok_count = await self._consume_history_unit(prepared_unit, source_chat_id, target_channel, temp_root)
+            await record_unit(prepared_unit, ok_count)
+
+        async def flush_forward_batch() -> None:
+            if not forward_batch:
+                return
+            batch = list(forward_batch)
+            forward_batch.clear()
+            message_ids = [int(unit.messages[0].id) for unit in batch if unit.messages]
+            forwarded = bool(message_ids) and await self._forward_ids_no_reference(
+                source_chat_id=source_chat_id,
+                target_channel=target_channel,
+                message_ids=message_ids,
+            )
+            for unit in batch:
+                if forwarded or not unit.messages:
+                    ok_count = unit.cloneable_count
+                else:
+                    # 批量转发失败时逐条回退为复制，保持原有的失败判定与断点语义。
+                    ok_count = await self._consume_history_unit(unit, source_chat_id, target_channel, temp_root)
+                await record_unit(unit, ok_count)
+            await self._send_limiter.acquire()
+
         try:
             async for unit in self._iter_history_units(
                 source_chat_id=source_chat_id,
@@ -776,7 +990,18 @@ class CloneService:
                 if should_stop and await should_stop():
                     raise RuntimeError("任务已手动停止")
 
-                task = asyncio.create_task(self._prepare_history_unit(unit))
+                if self._is_forward_batchable(unit):
+                    # 先消费完已排队的单元，保证目标频道中的消息顺序不变。
+                    while pending_tasks:
+                        await consume_next_pending()
+                        await self._send_limiter.acquire()
+                    forward_batch.append(unit)
+                    if len(forward_batch) >= FORWARD_BATCH_SIZE:
+                        await flush_forward_batch()
+                    continue
+                await flush_forward_batch()
+
+                task = asyncio.create_task(self._prepare_history_unit(unit, temp_root))
                 pending_units.append(unit)
                 pending_tasks.append(task)
                 if unit.needs_prefetch_download:
@@ -784,7 +1009,7 @@ class CloneService:
 
                 if not unit.needs_prefetch_download:
                     await consume_next_pending()
-                    await asyncio.sleep(0.03)
+                    await self._send_limiter.acquire()
                     continue
 
                 limit = max(1, int(unit.runtime_settings.download_group_concurrency))
@@ -792,23 +1017,26 @@ class CloneService:
                     if should_stop and await should_stop():
                         raise RuntimeError("任务已手动停止")
                     await consume_next_pending()
-                    await asyncio.sleep(0.03)
+                    await self._send_limiter.acquire()
 
+            await flush_forward_batch()
             while pending_tasks:
                 if should_stop and await should_stop():
                     raise RuntimeError("任务已手动停止")
                 await consume_next_pending()
-                await asyncio.sleep(0.03)
+                await self._send_limiter.acquire()
         finally:
             for task in pending_tasks:
                 task.cancel()
             if pending_tasks:
                 await asyncio.gather(*pending_tasks, return_exceptions=True)
             for unit in pending_units:
-                if unit.temp_dir_obj is not None:
-                    unit.temp_dir_obj.cleanup()
-                    unit.temp_dir_obj = None
+                self._release_unit_work_dir(unit)
+            temp_dir_obj.cleanup()
+            checkpoint_error = await stop_checkpoint_writer()
 
+        if checkpoint_error is not None:
+            raise checkpoint_error
         if progress_hook and checkpoint_message_id > 0:
             await progress_hook(checkpoint_message_id)
 
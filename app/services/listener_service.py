@@ -1,4 +1,6 @@
 import logging
+import time
+from typing import Any
 
 from telethon import events
 
@@ -9,6 +11,16 @@ from app.services.telegram_manager import TelegramManager
 
 logger = logging.getLogger(__name__)
 
+RESOLVE_CACHE_TTL_SECONDS = 30.0
+RESOLVE_CACHE_MAX = 4096
+_NOTIFY_UNAVAILABLE = (
+    "⚠️ 实时克隆发现频道失效\n"
+    "任务组: {source_title} (id={source_group_id})\n"
+    "话题: {topic_title} (topic_id={topic_id})\n"
+    "旧频道: {channel_title} ({channel_chat_id})\n"
+    "已进入恢复队列 #{queue_id}"
+)
+
 
 class ListenerService:
     def __init__(self, db: Database, telegram: TelegramManager, clone_service: CloneService):
@@ -17,6 +29,23 @@ class ListenerService:
         self.clone_service = clone_service
         self._registered = False
         self._handler_ref = None
+        # (chat_id, topic_id) -> (数据库绑定版本, 缓存时间, 解析结果)；未绑定的话题也缓存为 None。
+        self._resolve_cache: dict[tuple[int, int], tuple[int, float, dict[str, Any] | None]] = {}
+
+    async def _resolve_binding(self, chat_id: int, topic_id: int) -> dict[str, Any] | None:
+        key = (chat_id, topic_id)
+        version = self.db.binding_version
+        now = time.monotonic()
+        cached = self._resolve_cache.get(key)
+        if cached is not None and cached[0] == version and now - cached[1] < RESOLVE_CACHE_TTL_SECONDS:
+            return cached[2]
+
+        resolved = await self.db.resolve_binding_for_event(chat_id, topic_id)
+        if len(self._resolve_cache) >= RESOLVE_CACHE_MAX:
+            self._resolve_cache.clear()
+        # 记录查询前的版本号：查询期间若有写入，下次访问会因版本不一致而重新查询。
+        self._resolve_cache[key] = (version, now, resolved)
+        return resolved
 
     async def start(self) -> None:
         if self._registered:
@@ -42,32 +71,28 @@ class ListenerService:
             if chat_id == 0:
                 return
 
-            source_group = await self.db.get_source_group_by_chat_id(chat_id)
-            if not source_group or int(source_group.get("enabled", 0)) != 1:
-                return
-
             message = event.message
             topic_id = self.clone_service.extract_topic_id(message)
             if topic_id is None:
                 topic_id = int(getattr(message, "id", 0) or 0)
             if topic_id == 0:
                 return
-
-            source_group_id = int(source_group["id"])
             topic_id = int(topic_id)
 
-            topic = await self.db.get_topic(source_group_id, topic_id)
-            if not topic or int(topic.get("enabled", 0)) != 1:
+            resolved = await self._resolve_binding(chat_id, topic_id)
+            if not resolved:
                 return
-
-            binding = await self.db.get_binding(source_group_id, topic_id)
-            if not binding or int(binding.get("active", 0)) != 1:
+            # 联表结果均为 INTEGER 列，直接比较，无需再做 int() 转换。
+            if resolved["source_enabled"] != 1 or resolved["topic_enabled"] != 1 or resolved["binding_active"] != 1:
                 return
 
+            source_group_id = resolved["source_group_id"]
+            channel_chat_id = resolved["channel_chat_id"]
+
             try:
                 cloned = await self.clone_service.clone_message_no_reference(
                     message=message,
-                    target_channel=int(binding["channel_chat_id"]),
+                    target_channel=channel_chat_id,
                     raise_on_send_error=True,
                     source_group_id=source_group_id,
                 )
@@ -84,13 +109,13 @@ class ListenerService:
                 await self.db.add_banned_channel(
                     source_group_id=source_group_id,
                     topic_id=topic_id,
-                    channel_chat_id=int(binding["channel_chat_id"]),
+                    channel_chat_id=channel_chat_id,
                     reason=str(exc),
                 )
                 queue_id, created = await self.db.enqueue_recovery_with_status(
                     source_group_id=source_group_id,
                     topic_id=topic_id,
-                    old_channel_chat_id=int(binding["channel_chat_id"]),
+                    old_channel_chat_id=channel_chat_id,
                     reason=str(exc),
                 )
                 if not created:
@@ -98,18 +123,22 @@ class ListenerService:
                         "监听到失效频道但恢复任务已存在，跳过重复通知: source_group_id=%s topic_id=%s channel=%s queue_id=%s",
                         source_group_id,
                         topic_id,
-                        binding["channel_chat_id"],
+                        channel_chat_id,
                         queue_id,
                     )
                     return
-                channel_row = await self.db.get_channel(int(binding["channel_chat_id"]))
-                channel_title = str((channel_row or {}).get("title") or binding["channel_chat_id"])
+                channel_row = await self.db.get_channel(channel_chat_id)
+                channel_title = str((channel_row or {}).get("title") or channel_chat_id)
                 await self.telegram.send_notification(
-                    f"⚠️ 实时克隆发现频道失效\n"
-                    f"任务组: {source_group.get('title', source_group_id)} (id={source_group_id})\n"
-                    f"话题: {topic.get('title', topic_id)} (topic_id={topic_id})\n"
-                    f"旧频道: {channel_title} ({binding['channel_chat_id']})\n"
-                    f"已进入恢复队列 #{queue_id}"
+                    _NOTIFY_UNAVAILABLE.format(
+                        source_title=resolved.get("source_title") or source_group_id,
+                        source_group_id=source_group_id,
+                        topic_title=resolved.get("topic_title") or topic_id,
+                        topic_id=topic_id,
+                        channel_title=channel_title,
+                        channel_chat_id=channel_chat_id,
+                        queue_id=queue_id,
+                    )
                 )
 
         except Exception as exc:
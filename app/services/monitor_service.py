@@ -1,4 +1,7 @@
-﻿import logging
+﻿import asyncio
+import logging
+import re
+
 from telethon import errors as tg_errors
 
 from app.db import Database
@@ -7,30 +10,49 @@ from app.services.telegram_manager import TelegramManager
 
 logger = logging.getLogger(__name__)
 
+_NOTIFY_UNAVAILABLE = (
+    "⚠️ 检测到频道失效\n"
+    "任务组: {source_title} (id={source_group_id})\n"
+    "话题: {topic_title} (topic_id={topic_id})\n"
+    "旧频道: {channel_title} ({channel_chat_id})\n"
+    "已进入恢复队列 #{queue_id}"
+)
+# 连续失败次数 -> 探测间隔轮数：0-2 次每轮，3-9 次每 2 轮，10-29 次每 4 轮，30 次以上每 8 轮。
+FAILURE_BACKOFF_LADDER = ((30, 8), (10, 4), (3, 2))
+
+
+_UNAVAILABLE_ERRORS = (
+    tg_errors.ChannelPrivateError,
+    tg_errors.ChannelInvalidError,
+    tg_errors.ChannelPublicGroupNaError,
+    tg_errors.ChatAdminRequiredError,
+)
+# 最常见的是上述类型本身，先按精确类型做哈希查找，子类再走 isinstance。
+_UNAVAILABLE_ERROR_TYPES = frozenset(_UNAVAILABLE_ERRORS)
+# 关键字合并为一个预编译正则，一次扫描完成匹配；关键字均为 ASCII，忽略大小写匹配免去 lower() 复制。
+_UNAVAILABLE_TEXT_RE = re.compile(
+    "|".join(
+        re.escape(word)
+        for word in (
+            "channelprivateerror",
+            "channelinvaliderror",
+            "chatadminrequirederror",
+            "chat_write_forbidden",
+            "forbidden",
+            "private channel",
+            "have no rights",
+            "violates the telegram terms of service",
+            "couldn't be displayed on your device",
+        )
+    ),
+    re.IGNORECASE,
+)
+
 
 def is_channel_unavailable_error(exc: Exception) -> bool:
-    unavailable_errors = (
-        tg_errors.ChannelPrivateError,
-        tg_errors.ChannelInvalidError,
-        tg_errors.ChannelPublicGroupNaError,
-        tg_errors.ChatAdminRequiredError,
-    )
-    if isinstance(exc, unavailable_errors):
+    if type(exc) in _UNAVAILABLE_ERROR_TYPES or isinstance(exc, _UNAVAILABLE_ERRORS):
         return True
-
-    text = str(exc).lower()
-    keywords = [
-        "channelprivateerror",
-        "channelinvaliderror",
-        "chatadminrequirederror",
-        "chat_write_forbidden",
-        "forbidden",
-        "private channel",
-        "have no rights",
-        "violates the telegram terms of service",
-        "couldn't be displayed on your device",
-    ]
-    return any(word in text for word in keywords)
+    return _UNAVAILABLE_TEXT_RE.search(str(exc)) is not None
 
 
 class MonitorService:
@@ -45,24 +67,70 @@ class MonitorService:
         self.telegram = telegram
         self.channel_service = channel_service
         self.interval_seconds = interval_seconds
+        self._scan_cycle = 0
+        self._failure_streaks: dict[int, int] = {}
+
+    def _is_check_due(self, channel_chat_id: int) -> bool:
+        streak = self._failure_streaks.get(channel_chat_id, 0)
+        for min_streak, every_cycles in FAILURE_BACKOFF_LADDER:
+            if streak >= min_streak:
+                return self._scan_cycle % every_cycles == 0
+        return True
+
+    def _record_check_result(self, channel_chat_id: int, result: object) -> None:
+        if isinstance(result, tuple) and result[0]:
+            self._failure_streaks.pop(channel_chat_id, None)
+        else:
+            self._failure_streaks[channel_chat_id] = self._failure_streaks.get(channel_chat_id, 0) + 1
 
     async def scan_once(self) -> dict[str, int]:
-        scanned = 0
-        skipped_source_disabled = 0
         transient_errors = 0
-        unavailable = 0
+        skipped_backoff = 0
         enqueued = 0
         already_queued = 0
         bindings = await self.db.list_active_bindings()
-        for binding in bindings:
-            scanned += 1
-            if int(binding.get("source_enabled", 0)) != 1:
-                skipped_source_disabled += 1
+        scanned = len(bindings)
+        # SQLite INTEGER 列已按 int 返回，这里直接比较与取值，不再逐行 int() 转换。
+        enabled_bindings = [b for b in bindings if b.get("source_enabled") == 1]
+        skipped_source_disabled = scanned - len(enabled_bindings)
+        unavailable_bindings: list[tuple[dict, str]] = []
+
+        # 多个话题可能绑定同一频道，每个频道只探测一次，结果回填给其下所有绑定。
+        all_channel_ids = dict.fromkeys(b["channel_chat_id"] for b in enabled_bindings)
+        # 持续失败的频道按阶梯降低探测频率，恢复成功后立即回到每轮探测。
+        channel_ids = [cid for cid in all_channel_ids if self._is_check_due(cid)]
+        self._scan_cycle += 1
+        for cid in list(self._failure_streaks):
+            if cid not in all_channel_ids:
+                self._failure_streaks.pop(cid, None)
+        # 频道探测并发执行（由 ChannelService 的共享信号量限流防 FloodWait），结果按原顺序逐条落库与通知。
+        results = await asyncio.gather(
+            *[self.channel_service.check_channel_access(channel_id) for channel_id in channel_ids],
+            return_exceptions=True,
+        )
+        results_by_channel = dict(zip(channel_ids, results))
+        for channel_id, result in results_by_channel.items():
+            self._record_check_result(channel_id, result)
+        for binding in enabled_bindings:
+            channel_id = binding["channel_chat_id"]
+            if channel_id not in results_by_channel:
+                skipped_backoff += 1
+                continue
+            result = results_by_channel[channel_id]
+            if isinstance(result, Exception):
+                transient_errors += 1
+                logger.warning(
+                    "巡检探测异常，跳过失效判定: source_group_id=%s topic_id=%s channel=%s reason=%s",
+                    binding["source_group_id"],
+                    binding["topic_id"],
+                    binding["channel_chat_id"],
+                    str(result),
+                )
                 continue
+            if isinstance(result, BaseException):
+                raise result
 
-            ok, error_text = await self.channel_service.check_channel_access(
-                int(binding["channel_chat_id"])
-            )
+            ok, error_text = result
             if ok:
                 continue
 
@@ -77,52 +145,60 @@ class MonitorService:
                 )
                 continue
 
-            unavailable += 1
-            await self.db.add_banned_channel(
-                source_group_id=int(binding["source_group_id"]),
-                topic_id=int(binding["topic_id"]),
-                channel_chat_id=int(binding["channel_chat_id"]),
-                reason=error_text or "频道不可访问",
-            )
-            queue_id, created = await self.db.enqueue_recovery_with_status(
-                source_group_id=int(binding["source_group_id"]),
-                topic_id=int(binding["topic_id"]),
-                old_channel_chat_id=int(binding["channel_chat_id"]),
-                reason=error_text or "频道不可访问",
-            )
+            unavailable_bindings.append((binding, error_text or "频道不可访问"))
+
+        unavailable = len(unavailable_bindings)
+        # 失效记录与入队各用一次批量写入，减少逐条提交的数据库往返。
+        # 批量写入与通知复用同一组字段。
+        unavailable_rows = [
+            (b["source_group_id"], b["topic_id"], b["channel_chat_id"], reason)
+            for b, reason in unavailable_bindings
+        ]
+        await self.db.add_banned_channels_bulk(unavailable_rows)
+        queue_results = await self.db.enqueue_recoveries_bulk(unavailable_rows)
+
+        notifications: list[str] = []
+        for (binding, _reason), (source_group_id, topic_id, channel_chat_id, _), (queue_id, created) in zip(
+            unavailable_bindings, unavailable_rows, queue_results
+        ):
             if not created:
                 already_queued += 1
                 logger.info(
                     "失效频道已在恢复队列中，跳过重复通知: source_group_id=%s topic_id=%s channel=%s queue_id=%s",
-                    binding["source_group_id"],
-                    binding["topic_id"],
-                    binding["channel_chat_id"],
+                    source_group_id,
+                    topic_id,
+                    channel_chat_id,
                     queue_id,
                 )
                 continue
-            source_title = str(binding.get("source_title") or f"source_group_id={binding['source_group_id']}")
-            topic_title = str(binding.get("topic_title") or f"topic_id={binding['topic_id']}")
-            channel_title = str(binding.get("channel_title") or f"频道{binding['channel_chat_id']}")
-            await self.telegram.send_notification(
-                f"⚠️ 检测到频道失效\n"
-                f"任务组: {source_title} (id={binding['source_group_id']})\n"
-                f"话题: {topic_title} (topic_id={binding['topic_id']})\n"
-                f"旧频道: {channel_title} ({binding['channel_chat_id']})\n"
-                f"已进入恢复队列 #{queue_id}"
+            notifications.append(
+                _NOTIFY_UNAVAILABLE.format(
+                    source_title=binding.get("source_title") or f"source_group_id={source_group_id}",
+                    source_group_id=source_group_id,
+                    topic_title=binding.get("topic_title") or f"topic_id={topic_id}",
+                    topic_id=topic_id,
+                    channel_title=binding.get("channel_title") or f"频道{channel_chat_id}",
+                    channel_chat_id=channel_chat_id,
+                    queue_id=queue_id,
+                )
             )
             enqueued += 1
             logger.warning(
                 "检测到失效频道，已入队: source_group_id=%s topic_id=%s channel=%s queue_id=%s",
-                binding["source_group_id"],
-                binding["topic_id"],
-                binding["channel_chat_id"],
+                source_group_id,
+                topic_id,
+                channel_chat_id,
                 queue_id,
             )
 
+        for text in notifications:
+            await self.telegram.send_notification(text)
+
         return {
             "scanned": scanned,
             "skipped_source_disabled": skipped_source_disabled,
             "transient_errors": transient_errors,
+            "skipped_backoff": skipped_backoff,
             "unavailable": unavailable,
             "enqueued": enqueued,
             "already_queued": already_queued,
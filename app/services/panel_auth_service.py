@@ -5,6 +5,9 @@ from typing import Any
 
 from fastapi import Response
 
+# 同一会话令牌会在多次请求间重复校验，缓存按过期时间戳计算出的签名，超限时整体清空。
+SIGNATURE_CACHE_MAX = 256
+
 
 class PanelAuthService:
     cookie_name = "panel_session"
@@ -13,6 +16,21 @@ class PanelAuthService:
         self._password = str(getattr(settings, "panel_password", ""))
         self._ttl_seconds = int(getattr(settings, "panel_session_ttl_seconds", 86400))
         self._key = self._password.encode("utf-8")
+        # 预先完成密钥派生，每次签名只需 copy 后 update，省去重复的 ipad/opad 计算。
+        self._mac_proto = hmac.new(self._key, b"", hashlib.sha256)
+        self._signature_cache: dict[str, str] = {}
+
+    def _sign(self, exp_raw: str) -> str:
+        cached = self._signature_cache.get(exp_raw)
+        if cached is not None:
+            return cached
+        mac = self._mac_proto.copy()
+        mac.update(exp_raw.encode("utf-8"))
+        signature = mac.hexdigest()
+        if len(self._signature_cache) >= SIGNATURE_CACHE_MAX:
+            self._signature_cache.clear()
+        self._signature_cache[exp_raw] = signature
+        return signature
 
     def verify_password(self, raw_password: str) -> bool:
         if raw_password is None:
@@ -23,35 +41,24 @@ class PanelAuthService:
         now_ts = int(current_ts if current_ts is not None else time.time())
         exp_ts = now_ts + self._ttl_seconds
         exp_raw = str(exp_ts)
-        signature = hmac.new(
-            self._key,
-            exp_raw.encode("utf-8"),
-            hashlib.sha256,
-        ).hexdigest()
+        signature = self._sign(exp_raw)
         return f"{exp_raw}.{signature}"
 
     def verify_session_token(self, token: str | None, current_ts: int | None = None) -> bool:
         if not token:
             return False
 
-        parts = token.split(".", 1)
-        if len(parts) != 2:
-            return False
-
-        exp_raw, signature = parts
-        if not exp_raw.isdigit() or not signature:
+        exp_raw, sep, signature = token.partition(".")
+        if not sep or not signature or not exp_raw.isdigit():
             return False
 
-        expected = hmac.new(
-            self._key,
-            exp_raw.encode("utf-8"),
-            hashlib.sha256,
-        ).hexdigest()
-        if not hmac.compare_digest(signature, expected):
+        # 过期令牌无需再算签名，直接拒绝；未过期的令牌一律走完整 HMAC 与常量时间比较。
+        now_ts = int(current_ts if current_ts is not None else time.time())
+        if int(exp_raw) < now_ts:
             return False
 
-        now_ts = int(current_ts if current_ts is not None else time.time())
-        return int(exp_raw) >= now_ts
+        expected = self._sign(exp_raw)
+        return hmac.compare_digest(signature, expected)
 
     def set_session_cookie(self, response: Response, token: str) -> None:
         response.set_cookie(
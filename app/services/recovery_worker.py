@@ -1,5 +1,6 @@
 ﻿import asyncio
 import logging
+from collections import OrderedDict
 
 from app.config import Settings
 from app.db import Database
@@ -9,6 +10,28 @@ from app.services.telegram_manager import TelegramManager
 
 logger = logging.getLogger(__name__)
 
+CHANNEL_TITLE_CACHE_MAX = 1024
+_NOTIFY_DONE = (
+    "✅ 频道恢复完成\n"
+    "任务组: {source_title} (id={source_group_id})\n"
+    "话题: {topic_title} (topic_id={topic_id})\n"
+    "旧频道: {old_channel_title} ({old_channel_id})\n"
+    "新频道: {new_channel_title} ({new_channel_id})\n"
+    "克隆统计: {summary}"
+)
+_NOTIFY_STOPPED = (
+    "⏹️ 频道恢复任务已停止\nqueue_id={queue_id}\n"
+    "任务组: {source_title} (id={source_group_id})\n"
+    "话题: {topic_title} (topic_id={topic_id})\n"
+    "checkpoint={last_id}"
+)
+_NOTIFY_FAILED = (
+    "❌ 频道恢复失败\nqueue_id={queue_id}\n"
+    "任务组: {source_title} (id={source_group_id})\n"
+    "话题: {topic_title} (topic_id={topic_id})\n"
+    "错误: {error_text}"
+)
+
 
 class RecoveryWorker:
     def __init__(
@@ -26,18 +49,35 @@ class RecoveryWorker:
         self.settings = settings
         # 单实例内全局串行锁：确保恢复任务严格按队列一个一个执行。
         self._run_lock = asyncio.Lock()
+        self._assign_lock = asyncio.Lock()
+        # 频道标题仅用于通知文案，按 LRU 缓存；频道资料同步改名后失效对应条目。
+        self._title_cache: OrderedDict[int, str] = OrderedDict()
+
+    def invalidate_channel_title(self, channel_chat_id: int) -> None:
+        self._title_cache.pop(int(channel_chat_id), None)
 
     async def _get_channel_title(self, channel_chat_id: int) -> str:
+        cached = self._title_cache.get(channel_chat_id)
+        if cached is not None:
+            self._title_cache.move_to_end(channel_chat_id)
+            return cached
+
         row = await self.db.get_channel(channel_chat_id)
         title = str((row or {}).get("title") or "").strip()
-        if title:
-            return title
-        try:
-            entity = await self.telegram.bot_client.get_entity(channel_chat_id)
-            return str(getattr(entity, "title", channel_chat_id))
-        except Exception:
+        if not title:
+            try:
+                entity = await self.telegram.get_cached_entity(channel_chat_id)
+                title = str(getattr(entity, "title", "") or "").strip()
+            except Exception:
+                title = ""
+        if not title:
             return str(channel_chat_id)
 
+        self._title_cache[channel_chat_id] = title
+        if len(self._title_cache) > CHANNEL_TITLE_CACHE_MAX:
+            self._title_cache.popitem(last=False)
+        return title
+
     async def run_once(self, queue_id: int | None = None) -> bool:
         async with self._run_lock:
             if queue_id is None:
@@ -46,156 +86,212 @@ class RecoveryWorker:
                 job = await self.db.claim_recovery_by_id(queue_id)
             if not job:
                 return False
+            return await self._process_job(job)
 
-            queue_id = int(job["id"])
-            source_group: dict | None = None
-            topic: dict | None = None
-            try:
-                source_group_id = int(job["source_group_id"])
-                topic_id = int(job["topic_id"])
-                old_channel_id = int(job["old_channel_chat_id"])
-                start_message_id = int(job.get("last_cloned_message_id") or 0)
-
-                source_group = await self.db.get_source_group_by_id(source_group_id)
-                if not source_group:
-                    raise RuntimeError("任务组不存在")
-                source_title = str(source_group.get("title") or source_group_id)
-
-                topic = await self.db.get_topic(source_group_id, topic_id)
-                if not topic:
-                    raise RuntimeError("话题不存在")
-                topic_title = str(topic.get("title") or topic_id)
-
-                assigned_channel = job.get("new_channel_chat_id")
-                if assigned_channel:
-                    new_channel_id = int(assigned_channel)
-                else:
+    async def run_batch(self, batch_size: int, concurrency: int = 1) -> list[bool | BaseException]:
+        # 每个工作协程处理完手头任务才认领下一个，置为 running 的任务数不超过 concurrency；
+        # 整批至多处理 batch_size 个，concurrency=1 时仍按队列顺序逐个执行。
+        async with self._run_lock:
+            remaining = max(1, int(batch_size))
+            results: list[bool | BaseException] = []
+
+            async def drain() -> None:
+                nonlocal remaining
+                while remaining > 0:
+                    remaining -= 1
+                    job = await self.db.claim_next_recovery()
+                    if not job:
+                        return
+                    try:
+                        results.append(await self._process_job(job))
+                    except Exception as exc:
+                        results.append(exc)
+
+            workers = min(max(1, int(concurrency)), remaining)
+            outcomes = await asyncio.gather(*[drain() for _ in range(workers)], return_exceptions=True)
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+            return results
+
+    async def _process_job(self, job: dict) -> bool:
+        # 队列行来自 SQLite INTEGER 列，取值即为 int。
+        queue_id = job["id"]
+        source_group: dict | None = None
+        topic: dict | None = None
+        try:
+            source_group_id = job["source_group_id"]
+            topic_id = job["topic_id"]
+            old_channel_id = job["old_channel_chat_id"]
+            start_message_id = job.get("last_cloned_message_id") or 0
+
+            source_group, topic = await asyncio.gather(
+                self.db.get_source_group_by_id(source_group_id),
+                self.db.get_topic(source_group_id, topic_id),
+            )
+            if not source_group:
+                raise RuntimeError("任务组不存在")
+            source_title = str(source_group.get("title") or source_group_id)
+
+            if not topic:
+                raise RuntimeError("话题不存在")
+            topic_title = str(topic.get("title") or topic_id)
+
+            assigned_channel = job.get("new_channel_chat_id")
+            if assigned_channel:
+                new_channel_id = assigned_channel
+            else:
+                # 并发处理多个任务时，取备用频道与占用必须串行，避免两个任务拿到同一频道。
+                async with self._assign_lock:
                     standby_channel = await self.db.get_next_available_standby_channel()
                     if not standby_channel:
                         raise RuntimeError("没有可用备用频道")
 
-                    new_channel_id = int(standby_channel["chat_id"])
+                    new_channel_id = standby_channel["chat_id"]
 
                     await self.db.consume_standby_channel(new_channel_id)
-                    await self.db.detach_channel_bindings(old_channel_id)
-                    await self.db.upsert_binding(
+                # 解绑与重新绑定作用于同一绑定行，必须先后执行；队列记录与之无关，可并发写入。
+                await self.db.detach_channel_bindings(old_channel_id)
+                await asyncio.gather(
+                    self.db.upsert_binding(
                         source_group_id=source_group_id,
                         topic_id=topic_id,
                         channel_chat_id=new_channel_id,
-                    )
-                    await self.db.mark_recovery_assigned_channel(queue_id, new_channel_id)
+                    ),
+                    self.db.mark_recovery_assigned_channel(queue_id, new_channel_id),
+                )
 
-                if new_channel_id != old_channel_id:
-                    await self.channel_service.apply_topic_profile(
-                        channel_chat_id=new_channel_id,
-                        topic_title=str(topic.get("title") or topic_id),
-                        topic_avatar_path=str(topic.get("avatar_path") or ""),
-                    )
-                else:
-                    logger.info(
-                        "恢复任务命中同频道(old==new)，跳过频道资料同步: queue_id=%s topic_id=%s channel=%s",
-                        queue_id,
-                        topic_id,
-                        new_channel_id,
-                    )
+            if new_channel_id != old_channel_id:
+                await self.channel_service.apply_topic_profile(
+                    channel_chat_id=new_channel_id,
+                    topic_title=str(topic.get("title") or topic_id),
+                    topic_avatar_path=str(topic.get("avatar_path") or ""),
+                )
+                self.invalidate_channel_title(new_channel_id)
+            else:
+                logger.info(
+                    "恢复任务命中同频道(old==new)，跳过频道资料同步: queue_id=%s topic_id=%s channel=%s",
+                    queue_id,
+                    topic_id,
+                    new_channel_id,
+                )
 
-                old_channel_title = await self._get_channel_title(old_channel_id)
-                new_channel_title = await self._get_channel_title(new_channel_id)
+            old_channel_title, new_channel_title = await asyncio.gather(
+                self._get_channel_title(old_channel_id),
+                self._get_channel_title(new_channel_id),
+            )
 
-                async def check_should_stop() -> bool:
-                    return await self.db.is_recovery_stop_requested(queue_id)
+            async def check_should_stop() -> bool:
+                return await self.db.is_recovery_stop_requested(queue_id)
 
-                async def save_checkpoint(last_message_id: int) -> None:
-                    if await check_should_stop():
-                        raise RuntimeError("任务已手动停止")
-                    await self.db.update_recovery_progress(queue_id, last_message_id)
+            async def save_checkpoint(last_message_id: int) -> None:
+                if await check_should_stop():
+                    raise RuntimeError("任务已手动停止")
+                await self.db.update_recovery_progress(queue_id, last_message_id)
 
-                clone_stats = await self.clone_service.clone_topic_history(
-                    source_chat_id=int(source_group["chat_id"]),
-                    topic_id=topic_id,
-                    target_channel=new_channel_id,
-                    start_message_id=start_message_id,
-                    progress_hook=save_checkpoint,
-                    should_stop=check_should_stop,
-                    source_group_id=source_group_id,
-                )
-                resumed_from = int(clone_stats.get("started_min_id") or start_message_id)
+            clone_stats = await self.clone_service.clone_topic_history(
+                source_chat_id=source_group["chat_id"],
+                topic_id=topic_id,
+                target_channel=new_channel_id,
+                start_message_id=start_message_id,
+                progress_hook=save_checkpoint,
+                should_stop=check_should_stop,
+                source_group_id=source_group_id,
+            )
+            resumed_from = int(clone_stats.get("started_min_id") or start_message_id)
 
-                summary = (
-                    f"恢复完成, cloned={clone_stats['cloned']}, "
-                    f"total={clone_stats['total']}, skipped={clone_stats['skipped']}, "
-                    f"resumed_from={resumed_from}"
-                )
-                await self.db.mark_recovery_done(
-                    queue_id=queue_id,
-                    new_channel_chat_id=new_channel_id,
+            summary = (
+                f"恢复完成, cloned={clone_stats['cloned']}, "
+                f"total={clone_stats['total']}, skipped={clone_stats['skipped']}, "
+                f"resumed_from={resumed_from}"
+            )
+            await self.db.mark_recovery_done(
+                queue_id=queue_id,
+                new_channel_chat_id=new_channel_id,
+                summary=summary,
+                last_cloned_message_id=int(clone_stats.get("last_cloned_message_id") or start_message_id),
+            )
+            await self.telegram.send_notification(
+                _NOTIFY_DONE.format(
+                    source_title=source_title,
+                    source_group_id=source_group_id,
+                    topic_title=topic_title,
+                    topic_id=topic_id,
+                    old_channel_title=old_channel_title,
+                    old_channel_id=old_channel_id,
+                    new_channel_title=new_channel_title,
+                    new_channel_id=new_channel_id,
                     summary=summary,
-                    last_cloned_message_id=int(clone_stats.get("last_cloned_message_id") or start_message_id),
-                )
-                await self.telegram.send_notification(
-                    f"✅ 频道恢复完成\n"
-                    f"任务组: {source_title} (id={source_group_id})\n"
-                    f"话题: {topic_title} (topic_id={topic_id})\n"
-                    f"旧频道: {old_channel_title} ({old_channel_id})\n"
-                    f"新频道: {new_channel_title} ({new_channel_id})\n"
-                    f"克隆统计: {summary}"
                 )
+            )
 
-                # 恢复成功后自动清理：封禁记录与已完成队列项。
-                await self.db.remove_banned_channel(
+            # 恢复成功后自动清理：封禁记录与已完成队列项。
+            await asyncio.gather(
+                self.db.remove_banned_channel(
                     source_group_id=source_group_id,
                     topic_id=topic_id,
                     channel_chat_id=old_channel_id,
-                )
-                await self.db.delete_recovery_task(queue_id)
-                return True
-
-            except Exception as exc:
-                error_text = str(exc)
-                if ("任务已手动停止" in error_text) or (await self.db.is_recovery_stop_requested(queue_id)):
-                    row = await self.db.get_recovery_by_id(queue_id)
-                    last_id = int((row or {}).get("last_cloned_message_id") or 0)
-                    source_title = str((source_group or {}).get("title") or job["source_group_id"])
-                    topic_title = str((topic or {}).get("title") or job["topic_id"])
-                    await self.db.mark_recovery_stopped(
-                        queue_id=queue_id,
-                        summary=error_text or "任务已手动停止",
-                        last_cloned_message_id=last_id,
-                    )
-                    await self.telegram.send_notification(
-                        f"⏹️ 频道恢复任务已停止\nqueue_id={queue_id}\n"
-                        f"任务组: {source_title} (id={job['source_group_id']})\n"
-                        f"话题: {topic_title} (topic_id={job['topic_id']})\n"
-                        f"checkpoint={last_id}"
-                    )
-                    return True
+                ),
+                self.db.delete_recovery_task(queue_id),
+            )
+            return True
 
-                if "没有可用备用频道" in error_text:
-                    await self.db.mark_recovery_waiting_standby(
+        except Exception as exc:
+            error_text = str(exc)
+            job_source_group_id = job["source_group_id"]
+            job_topic_id = job["topic_id"]
+            if ("任务已手动停止" in error_text) or (await self.db.is_recovery_stop_requested(queue_id)):
+                row = await self.db.get_recovery_by_id(queue_id)
+                last_id = (row or {}).get("last_cloned_message_id") or 0
+                source_title = (source_group or {}).get("title") or job_source_group_id
+                topic_title = (topic or {}).get("title") or job_topic_id
+                await self.db.mark_recovery_stopped(
+                    queue_id=queue_id,
+                    summary=error_text or "任务已手动停止",
+                    last_cloned_message_id=last_id,
+                )
+                await self.telegram.send_notification(
+                    _NOTIFY_STOPPED.format(
                         queue_id=queue_id,
-                        summary="等待备用频道补充后自动继续",
+                        source_title=source_title,
+                        source_group_id=job_source_group_id,
+                        topic_title=topic_title,
+                        topic_id=job_topic_id,
+                        last_id=last_id,
                     )
-                    logger.info(
-                        "恢复任务等待备用频道(queue_id=%s, source_group_id=%s, topic_id=%s)",
-                        queue_id,
-                        job["source_group_id"],
-                        job["topic_id"],
-                    )
-                    return False
+                )
+                return True
 
-                logger.exception("恢复任务失败(queue_id=%s): %s", queue_id, exc)
-                source_title = str((source_group or {}).get("title") or job["source_group_id"])
-                topic_title = str((topic or {}).get("title") or job["topic_id"])
-                await self.db.mark_recovery_failed(
+            if "没有可用备用频道" in error_text:
+                await self.db.mark_recovery_waiting_standby(
                     queue_id=queue_id,
-                    retry_count=int(job.get("retry_count", 0)),
-                    error_text=error_text,
-                    max_retry=self.settings.recovery_max_retry,
+                    summary="等待备用频道补充后自动继续",
                 )
-                await self.telegram.send_notification(
-                    f"❌ 频道恢复失败\nqueue_id={queue_id}\n"
-                    f"任务组: {source_title} (id={job['source_group_id']})\n"
-                    f"话题: {topic_title} (topic_id={job['topic_id']})\n"
-                    f"错误: {error_text[:300]}"
+                logger.info(
+                    "恢复任务等待备用频道(queue_id=%s, source_group_id=%s, topic_id=%s)",
+                    queue_id,
+                    job_source_group_id,
+                    job_topic_id,
                 )
-                return True
+                return False
+
+            logger.exception("恢复任务失败(queue_id=%s): %s", queue_id, exc)
+            source_title = (source_group or {}).get("title") or job_source_group_id
+            topic_title = (topic or {}).get("title") or job_topic_id
+            await self.db.mark_recovery_failed(
+                queue_id=queue_id,
+                retry_count=job.get("retry_count") or 0,
+                error_text=error_text,
+                max_retry=self.settings.recovery_max_retry,
+            )
+            await self.telegram.send_notification(
+                _NOTIFY_FAILED.format(
+                    queue_id=queue_id,
+                    source_title=source_title,
+                    source_group_id=job_source_group_id,
+                    topic_title=topic_title,
+                    topic_id=job_topic_id,
+                    error_text=error_text[:300],
+                )
+            )
+            return True
@@ -1,34 +1,88 @@
 ﻿import asyncio
-import base64
 import io
 import logging
+import re
 import sqlite3
+import time
 import uuid
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 import qrcode
 from telethon import TelegramClient
 from telethon import errors as tg_errors
-from telethon.sessions import SQLiteSession
 
 from app.config import Settings
 
-logger = logging.getLogger(__name__)
+try:
+    # segno 直接输出 PNG 字节且不依赖 PIL，速度明显快于 qrcode；未安装时回退到 qrcode。
+    import segno  # type: ignore
+except ImportError:  # pragma: no cover - 取决于部署环境
+    segno = None
+from app.services.telegram_session import AsyncSQLiteSession
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# 状态轮询频繁调用 get_me，结果短时缓存；网络获取设置超时，避免轮询接口被长时间挂起。
+ME_CACHE_TTL_SECONDS = 30.0
+GET_ME_TIMEOUT_SECONDS = 5
+QR_LOGIN_TTL_SECONDS = 300
+QR_RESET_REUSE_SECONDS = 2.0
+
+# 通知走有界队列由后台任务发送：窗口内的多条通知合并成一条消息，队列满时丢弃新通知。
+NOTIFY_QUEUE_MAX = 256
+NOTIFY_COALESCE_SECONDS = 0.1
+NOTIFY_MESSAGE_MAX_CHARS = 4096
+NOTIFY_DRAIN_TIMEOUT_SECONDS = 5
+
+_BROKEN_SESSION_RE = re.compile(
+    "no such table: sessions|file is not a database|database disk image is malformed",
+    re.IGNORECASE,
+)
+_MISSING_SESSIONS_TABLE_RE = re.compile("no such table: sessions", re.IGNORECASE)
+
+# 验证码登录的已知错误 -> 响应模板；按异常类型直接查表，返回副本避免调用方改动共享模板。
+_SIGN_IN_CODE_ERRORS: dict[type[Exception], dict[str, Any]] = {
+    tg_errors.AuthKeyUnregisteredError: {
+        "ok": False,
+        "need_password": False,
+        "relogin_required": True,
+        "error": "当前会话已失效，请重新发送验证码或重新扫码登录",
+    },
+    tg_errors.SessionPasswordNeededError: {"ok": False, "need_password": True, "error": "账号开启了二步验证，请输入密码"},
+    tg_errors.PhoneCodeInvalidError: {"ok": False, "need_password": False, "error": "验证码错误"},
+    tg_errors.PhoneCodeExpiredError: {"ok": False, "need_password": False, "error": "验证码已过期，请重新发送"},
+}
+_SIGN_IN_CODE_ERROR_TYPES = tuple(_SIGN_IN_CODE_ERRORS)
+
+# t.me 链接一次匹配：私密链接 c/<internal_id> 取数字 ID，其余取第一段路径作为用户名。
+_TME_LINK_RE = re.compile(r"t\.me/+(?:c/(?P<internal_id>\d+)(?=[/?]|$)|(?P<name>[^/?]*))", re.IGNORECASE)
+_INT_REF_RE = re.compile(r"-?\d+")
+# resolve_chat 结果按 (是否用户客户端, 规范化引用) 做 LRU + TTL 缓存。
+RESOLVE_CHAT_CACHE_TTL_SECONDS = 300
+RESOLVE_CHAT_CACHE_MAX = 512
+
+
+@dataclass(slots=True)
 class PendingQRLogin:
     session_id: str
-    created_at: datetime
+    # time.monotonic() 时间戳，过期判断只需一次浮点比较。
+    created_at: float
     qr_login: Any
     need_password: bool = False
     status: str = "pending"
     error: str | None = None
     relogin_required: bool = False
     wait_task: asyncio.Task[Any] | None = None
+    # 监听任务结束（状态已确定）时置位，所有轮询方共用这一个事件等待。
+    state_event: asyncio.Event = field(default_factory=asyncio.Event)
+    # 二维码 PNG 原始字节，随扫码会话一起清理，由独立接口以 image/png 直接返回。
+    qr_png: bytes = b""
+    # 到期自动清理的定时器；会话被提前移除时一并取消。
+    expire_handle: asyncio.TimerHandle | None = None
 
 
 class TelegramManager:
@@ -39,22 +93,34 @@ class TelegramManager:
         self._user_session_name = str(self._session_dir / "user")
         self._bot_session_name = str(self._session_dir / "bot")
 
+        # 会话数据常驻内存，实体与授权信息经 aiosqlite 异步落盘，避免同步 sqlite3 阻塞事件循环。
         self.user_client = TelegramClient(
-            self._user_session_name,
+            AsyncSQLiteSession(self._user_session_name),
             settings.api_id,
             settings.api_hash,
         )
         self.bot_client = TelegramClient(
-            self._bot_session_name,
+            AsyncSQLiteSession(self._bot_session_name),
             settings.api_id,
             settings.api_hash,
         )
 
         self._pending_phone_hash: dict[str, str] = {}
         self._pending_qr: dict[str, PendingQRLogin] = {}
-        self._user_session_lock = asyncio.Lock()
+        # 重置会话独占一把锁；扫码登录按 session_id 各自加锁，不同扫码会话互不阻塞。
+        self._reset_lock = asyncio.Lock()
+        self._qr_locks: dict[str, asyncio.Lock] = {}
+        self._qr_expiry_tasks: set[asyncio.Task[None]] = set()
+        self._last_reset_at = float("-inf")
         self._started = False
         self._user_connect_error: str | None = None
+        self._entity_cache: dict[int, tuple[Any, float]] = {}
+        self._entity_cache_ttl_seconds = 600
+        self._resolved_chat_cache: OrderedDict[tuple[bool, str | int], tuple[Any, float]] = OrderedDict()
+        self._user_me_cache: tuple[Any, float] | None = None
+        self._bot_me_cache: tuple[Any, float] | None = None
+        self._notify_queue: asyncio.Queue[str] | None = None
+        self._notify_worker: asyncio.Task[None] | None = None
 
     async def start(self) -> None:
         if self._started:
@@ -94,13 +160,18 @@ class TelegramManager:
             await self.bot_client.connect()
             logger.warning("未配置 BOT_TOKEN，Bot 客户端仅连接未授权")
 
+        self._notify_queue = asyncio.Queue(maxsize=NOTIFY_QUEUE_MAX)
+        self._notify_worker = asyncio.create_task(self._notification_worker(self._notify_queue))
         self._started = True
 
     async def stop(self) -> None:
         if not self._started:
             return
+        await self._stop_notification_worker()
         await self.user_client.disconnect()
         await self.bot_client.disconnect()
+        self._user_me_cache = None
+        self._bot_me_cache = None
         self._started = False
 
     async def ensure_user_connected(self) -> None:
@@ -134,20 +205,27 @@ class TelegramManager:
 
     @staticmethod
     def _is_broken_session_storage(exc: Exception) -> bool:
-        if isinstance(exc, sqlite3.OperationalError):
-            text = str(exc).lower()
-            return (
-                "no such table: sessions" in text
-                or "file is not a database" in text
-                or "database disk image is malformed" in text
-            )
-        text = str(exc).lower()
-        return "no such table: sessions" in text
+        # sqlite3 错误识别全部损坏特征，其他异常只认缺表；忽略大小写匹配，免去 lower() 复制。
+        pattern = _BROKEN_SESSION_RE if isinstance(exc, sqlite3.OperationalError) else _MISSING_SESSIONS_TABLE_RE
+        return pattern.search(str(exc)) is not None
+
+    def _qr_lock(self, session_id: str) -> asyncio.Lock:
+        # 锁随扫码会话创建与清理；未知会话给一把临时锁，避免无效 session_id 撑大字典。
+        return self._qr_locks.get(session_id) or asyncio.Lock()
+
+    def _expire_pending_qr(self, session_id: str) -> None:
+        # 由 call_later 触发：扫码会话到期即移除，不依赖客户端轮询或手动 cleanup。
+        task = asyncio.create_task(self._drop_pending_qr(session_id))
+        self._qr_expiry_tasks.add(task)
+        task.add_done_callback(self._qr_expiry_tasks.discard)
 
     async def _drop_pending_qr(self, session_id: str) -> None:
+        self._qr_locks.pop(session_id, None)
         pending = self._pending_qr.pop(session_id, None)
         if not pending:
             return
+        if pending.expire_handle:
+            pending.expire_handle.cancel()
         task = pending.wait_task
         if task and not task.done():
             task.cancel()
@@ -156,11 +234,14 @@ class TelegramManager:
     async def _clear_pending_qr(self) -> None:
         tasks: list[asyncio.Task[Any]] = []
         for pending in self._pending_qr.values():
+            if pending.expire_handle:
+                pending.expire_handle.cancel()
             task = pending.wait_task
             if task and not task.done():
                 task.cancel()
                 tasks.append(task)
         self._pending_qr.clear()
+        self._qr_locks.clear()
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -193,32 +274,53 @@ class TelegramManager:
                 pending.status = "failed"
                 pending.error = str(exc)
             logger.error("扫码登录监听异常(session=%s): %s", session_id, exc)
+        finally:
+            pending.state_event.set()
+
+    async def _get_user_me(self) -> Any:
+        now = time.monotonic()
+        if self._user_me_cache and self._user_me_cache[1] > now:
+            return self._user_me_cache[0]
+        async with asyncio.timeout(GET_ME_TIMEOUT_SECONDS):
+            me = await self.user_client.get_me()
+        self._user_me_cache = (me, now + ME_CACHE_TTL_SECONDS) if me else None
+        return me
+
+    async def _get_bot_me(self) -> Any:
+        now = time.monotonic()
+        if self._bot_me_cache and self._bot_me_cache[1] > now:
+            return self._bot_me_cache[0]
+        async with asyncio.timeout(GET_ME_TIMEOUT_SECONDS):
+            me = await self.bot_client.get_me()
+        self._bot_me_cache = (me, now + ME_CACHE_TTL_SECONDS) if me else None
+        return me
 
     async def get_auth_status(self) -> dict[str, Any]:
-        user_authorized = False
-        bot_authorized = False
-        user_me = None
-        bot_me = None
         user_error = self._user_connect_error
-        bot_error: str | None = None
 
-        try:
-            user_authorized = await self.is_user_authorized()
-            if user_authorized:
-                user_me = await self.user_client.get_me()
-        except Exception as exc:
-            user_authorized = False
-            user_error = str(exc)
-            logger.warning("获取 user 授权状态失败: %s", exc)
+        async def user_status() -> tuple[bool, Any, str | None]:
+            try:
+                if not await self.is_user_authorized():
+                    return False, None, user_error
+                return True, await self._get_user_me(), user_error
+            except Exception as exc:
+                logger.warning("获取 user 授权状态失败: %s", exc)
+                return False, None, str(exc)
 
-        try:
-            bot_authorized = await self.is_bot_authorized()
-            if bot_authorized:
-                bot_me = await self.bot_client.get_me()
-        except Exception as exc:
-            bot_authorized = False
-            bot_error = str(exc)
-            logger.warning("获取 bot 授权状态失败: %s", exc)
+        async def bot_status() -> tuple[bool, Any, str | None]:
+            try:
+                if not await self.is_bot_authorized():
+                    return False, None, None
+                return True, await self._get_bot_me(), None
+            except Exception as exc:
+                logger.warning("获取 bot 授权状态失败: %s", exc)
+                return False, None, str(exc)
+
+        # user 与 bot 两条查询互不依赖，并发执行，总耗时取两者中较慢的一个。
+        (user_authorized, user_me, user_error), (bot_authorized, bot_me, bot_error) = await asyncio.gather(
+            user_status(),
+            bot_status(),
+        )
 
         return {
             "user_authorized": user_authorized,
@@ -255,20 +357,13 @@ class TelegramManager:
                 await self.user_client.sign_in(password=password)
             else:
                 await self.user_client.sign_in(phone=phone, code=code, phone_code_hash=phone_hash)
+            self._user_me_cache = None
             return {"ok": True, "need_password": False}
-        except tg_errors.AuthKeyUnregisteredError:
-            return {
-                "ok": False,
-                "need_password": False,
-                "relogin_required": True,
-                "error": "当前会话已失效，请重新发送验证码或重新扫码登录",
-            }
-        except tg_errors.SessionPasswordNeededError:
-            return {"ok": False, "need_password": True, "error": "账号开启了二步验证，请输入密码"}
-        except tg_errors.PhoneCodeInvalidError:
-            return {"ok": False, "need_password": False, "error": "验证码错误"}
-        except tg_errors.PhoneCodeExpiredError:
-            return {"ok": False, "need_password": False, "error": "验证码已过期，请重新发送"}
+        except _SIGN_IN_CODE_ERROR_TYPES as exc:
+            template = _SIGN_IN_CODE_ERRORS.get(type(exc))
+            if template is None:
+                template = next(value for cls, value in _SIGN_IN_CODE_ERRORS.items() if isinstance(exc, cls))
+            return dict(template)
         except Exception as exc:
             if not self._is_broken_session_storage(exc):
                 raise
@@ -292,6 +387,10 @@ class TelegramManager:
                 "error": "请先生成二维码并扫码，再提交二级密码",
             }
 
+        async with self._qr_lock(session_id):
+            return await self._sign_in_pending_qr(password, session_id)
+
+    async def _sign_in_pending_qr(self, password: str, session_id: str) -> dict[str, Any]:
         pending = self._pending_qr.get(session_id)
         if not pending:
             return {
@@ -300,7 +399,7 @@ class TelegramManager:
                 "error": "二维码会话不存在或已过期，请重新生成二维码",
             }
 
-        if pending.created_at < datetime.utcnow() - timedelta(minutes=5):
+        if time.monotonic() - pending.created_at > QR_LOGIN_TTL_SECONDS:
             await self._drop_pending_qr(session_id)
             return {
                 "ok": False,
@@ -311,8 +410,9 @@ class TelegramManager:
         if pending.status == "pending" and pending.wait_task:
             # 监听任务在二维码生成时已启动；这里等待结果，避免用户手动检查扫码状态。
             try:
-                await asyncio.wait_for(asyncio.shield(pending.wait_task), timeout=20)
-            except asyncio.TimeoutError:
+                async with asyncio.timeout(20):
+                    await pending.state_event.wait()
+            except TimeoutError:
                 return {
                     "ok": False,
                     "need_password": True,
@@ -320,6 +420,7 @@ class TelegramManager:
                 }
 
         if pending.status == "authorized":
+            self._user_me_cache = None
             await self._drop_pending_qr(session_id)
             return {"ok": True, "need_password": False}
 
@@ -343,6 +444,7 @@ class TelegramManager:
 
         try:
             await self.user_client.sign_in(password=password)
+            self._user_me_cache = None
             await self._drop_pending_qr(session_id)
             return {"ok": True, "need_password": False}
         except tg_errors.AuthKeyUnregisteredError:
@@ -368,8 +470,11 @@ class TelegramManager:
             }
 
     async def reset_user_session(self) -> None:
-        async with self._user_session_lock:
+        async with self._reset_lock:
             self._pending_phone_hash.clear()
+            self._user_me_cache = None
+            for key in [key for key in self._resolved_chat_cache if key[0]]:
+                del self._resolved_chat_cache[key]
             await self._clear_pending_qr()
 
             try:
@@ -379,32 +484,45 @@ class TelegramManager:
                 logger.warning("断开用户客户端失败: %s", exc)
 
             try:
-                self.user_client.session.close()
+                self.user_client.session.discard()
             except Exception:
                 pass
 
-            try:
-                self.user_client.session.delete()
-            except Exception as exc:
-                logger.warning("删除 Telethon 会话失败: %s", exc)
-
-            session_base = Path(f"{self._user_session_name}.session")
-            for suffix in ("", "-journal", "-wal", "-shm"):
-                path = Path(f"{session_base}{suffix}")
-                try:
-                    if path.exists():
-                        path.unlink()
-                except Exception as exc:
-                    logger.warning("删除会话文件失败(%s): %s", path, exc)
+            await asyncio.to_thread(self._purge_session_files, f"{self._user_session_name}.session")
 
             # 保留同一个 TelegramClient 实例，重置其 session 存储，避免事件处理器丢失。
-            self.user_client.session = SQLiteSession(self._user_session_name)
+            self.user_client.session = AsyncSQLiteSession(self._user_session_name)
             await self.user_client.connect()
             self._user_connect_error = None
+            self._last_reset_at = time.monotonic()
+
+    async def _qr_needs_session_reset(self) -> bool:
+        # 刚重置过的会话必然干净；仅有未扫码二维码的未登录会话也可直接复用，无需断开重连与删文件。
+        if time.monotonic() - self._last_reset_at < QR_RESET_REUSE_SECONDS:
+            return False
+        if any(pending.status != "pending" for pending in self._pending_qr.values()):
+            return True
+        try:
+            return await self.is_user_authorized()
+        except Exception:
+            return True
+
+    @staticmethod
+    def _purge_session_files(session_base: str) -> None:
+        # 直接 unlink(missing_ok=True)，不存在的文件无需先 stat。
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            path = Path(f"{session_base}{suffix}")
+            try:
+                path.unlink(missing_ok=True)
+            except Exception as exc:
+                logger.warning("删除会话文件失败(%s): %s", path, exc)
 
     async def create_qr_login(self) -> dict[str, Any]:
-        # 每次重新生成二维码都自动重置旧 user 会话，避免手动删除 session 文件。
-        await self.reset_user_session()
+        # 已登录或扫码流程已推进过的会话自动重置，避免手动删除 session 文件；干净会话只作废旧二维码。
+        if await self._qr_needs_session_reset():
+            await self.reset_user_session()
+        else:
+            await self._clear_pending_qr()
         try:
             qr_login = await self.user_client.qr_login()
         except Exception as exc:
@@ -415,42 +533,64 @@ class TelegramManager:
         session_id = str(uuid.uuid4())
         pending = PendingQRLogin(
             session_id=session_id,
-            created_at=datetime.utcnow(),
+            created_at=time.monotonic(),
             qr_login=qr_login,
             need_password=False,
         )
         self._pending_qr[session_id] = pending
+        self._qr_locks[session_id] = asyncio.Lock()
         pending.wait_task = asyncio.create_task(self._watch_qr_login(session_id))
+        pending.expire_handle = asyncio.get_running_loop().call_later(
+            QR_LOGIN_TTL_SECONDS,
+            self._expire_pending_qr,
+            session_id,
+        )
 
         qr_url = qr_login.url
-        img = qrcode.make(qr_url)
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        qr_image_base64 = base64.b64encode(buffer.getvalue()).decode("ascii")
+        # 二维码绘制与 PNG 编码是纯 CPU 同步操作，放到线程池执行，避免阻塞事件循环。
+        pending.qr_png = await asyncio.to_thread(self._render_qr_png, qr_url)
 
         return {
             "ok": True,
             "session_id": session_id,
             "qr_url": qr_url,
-            "qr_image_base64": qr_image_base64,
         }
 
+    def get_qr_png(self, session_id: str) -> bytes | None:
+        pending = self._pending_qr.get(session_id)
+        if not pending or not pending.qr_png:
+            return None
+        return pending.qr_png
+
+    @staticmethod
+    def _render_qr_png(qr_url: str) -> bytes:
+        buffer = io.BytesIO()
+        if segno is not None:
+            # 纠错级别与模块尺寸对齐 qrcode.make 的默认值（M 级、box_size=10、border=4）。
+            segno.make(qr_url, error="m").save(buffer, kind="png", scale=10, border=4)
+            return buffer.getvalue()
+        img = qrcode.make(qr_url)
+        img.save(buffer, format="PNG")
+        return buffer.getvalue()
+
     async def check_qr_login(self, session_id: str, timeout_seconds: int = 1) -> dict[str, Any]:
         pending = self._pending_qr.get(session_id)
         if not pending:
             return {"ok": False, "status": "expired", "error": "二维码会话不存在或已过期"}
 
-        if pending.created_at < datetime.utcnow() - timedelta(minutes=5):
+        if time.monotonic() - pending.created_at > QR_LOGIN_TTL_SECONDS:
             await self._drop_pending_qr(session_id)
             return {"ok": False, "status": "expired", "error": "二维码已过期，请重新生成"}
 
         if pending.status == "pending" and pending.wait_task:
             try:
-                await asyncio.wait_for(asyncio.shield(pending.wait_task), timeout=timeout_seconds)
-            except asyncio.TimeoutError:
+                async with asyncio.timeout(timeout_seconds):
+                    await pending.state_event.wait()
+            except TimeoutError:
                 pass
 
         if pending.status == "authorized":
+            self._user_me_cache = None
             await self._drop_pending_qr(session_id)
             return {"ok": True, "status": "authorized"}
 
@@ -480,6 +620,7 @@ class TelegramManager:
         return {"ok": False, "status": "failed", "error": pending.error or "扫码登录失败"}
 
     @staticmethod
+    @lru_cache(maxsize=512)
     def normalize_chat_ref(chat_ref: str | int) -> str | int:
         if isinstance(chat_ref, int):
             return chat_ref
@@ -487,24 +628,16 @@ class TelegramManager:
         if not text:
             raise ValueError("chat_ref 不能为空")
 
-        lowered = text.lower()
-        if "t.me/" in lowered:
-            link_path = text.split("t.me/", 1)[1].strip("/")
-            if "?" in link_path:
-                link_path = link_path.split("?", 1)[0]
-
+        match = _TME_LINK_RE.search(text)
+        if match:
             # 支持私密消息链接: https://t.me/c/<internal_id>/<topic_id>/<msg_id>
             # 其中 internal_id 对应超级群/频道的无 -100 前缀 ID。
-            if link_path.startswith("c/"):
-                parts = link_path.split("/")
-                if len(parts) >= 2 and parts[1].isdigit():
-                    return int(f"-100{parts[1]}")
-
-            text = link_path
-            if "/" in text:
-                text = text.split("/", 1)[0]
+            internal_id = match.group("internal_id")
+            if internal_id:
+                return int(f"-100{internal_id}")
+            text = match.group("name")
 
-        if text.lstrip("-").isdigit():
+        if _INT_REF_RE.fullmatch(text):
             return int(text)
 
         if not text.startswith("@"):
@@ -513,25 +646,113 @@ class TelegramManager:
 
     async def resolve_chat(self, chat_ref: str | int, prefer_user: bool = True):
         normalized = self.normalize_chat_ref(chat_ref)
+        cache_key = (prefer_user, normalized)
+        cached = self._resolved_chat_cache.get(cache_key)
+        now = time.monotonic()
+        if cached and cached[1] > now:
+            self._resolved_chat_cache.move_to_end(cache_key)
+            return cached[0]
+
         if prefer_user:
             await self.ensure_user_connected()
-            return await self.user_client.get_entity(normalized)
-        await self.ensure_bot_connected()
-        return await self.bot_client.get_entity(normalized)
+            entity = await self.user_client.get_entity(normalized)
+        else:
+            await self.ensure_bot_connected()
+            entity = await self.bot_client.get_entity(normalized)
+
+        self._resolved_chat_cache[cache_key] = (entity, now + RESOLVE_CHAT_CACHE_TTL_SECONDS)
+        self._resolved_chat_cache.move_to_end(cache_key)
+        while len(self._resolved_chat_cache) > RESOLVE_CHAT_CACHE_MAX:
+            self._resolved_chat_cache.popitem(last=False)
+        return entity
+
+    async def get_cached_entity(self, chat_id: int):
+        chat_id = int(chat_id)
+        cached = self._entity_cache.get(chat_id)
+        now = time.monotonic()
+        if cached and cached[1] > now:
+            return cached[0]
+        entity = await self.bot_client.get_entity(chat_id)
+        self._entity_cache[chat_id] = (entity, now + self._entity_cache_ttl_seconds)
+        return entity
+
+    def invalidate_entity(self, chat_id: int) -> None:
+        self._entity_cache.pop(int(chat_id), None)
 
     async def send_notification(self, message: str) -> None:
         if not self.settings.notify_chat_id:
             return
-        await self.ensure_bot_connected()
+        if self._notify_queue is None:
+            # 未启动（或已停止）时没有后台发送任务，退回直接发送。
+            await self._deliver_notification(message)
+            return
+        try:
+            self._notify_queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning("通知队列已满，丢弃通知: %s", message[:100])
+
+    async def _deliver_notification(self, message: str) -> None:
         try:
+            await self.ensure_bot_connected()
             await self.bot_client.send_message(self.settings.notify_chat_id, message)
         except Exception as exc:
             logger.error("发送通知失败: %s", exc)
 
+    async def _notification_worker(self, queue: asyncio.Queue[str]) -> None:
+        while True:
+            messages = [await queue.get()]
+            try:
+                await asyncio.sleep(NOTIFY_COALESCE_SECONDS)
+                while not queue.empty():
+                    messages.append(queue.get_nowait())
+                for batch in self._batch_notifications(messages):
+                    await self._deliver_notification(batch)
+            finally:
+                for _ in messages:
+                    queue.task_done()
+
+    @staticmethod
+    def _batch_notifications(messages: list[str]) -> list[str]:
+        # 按 Telegram 单条消息长度上限分批合并，超长的单条通知原样发送。
+        batches: list[str] = []
+        current = ""
+        for message in messages:
+            if current and len(current) + 2 + len(message) > NOTIFY_MESSAGE_MAX_CHARS:
+                batches.append(current)
+                current = ""
+            current = f"{current}\n\n{message}" if current else message
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _stop_notification_worker(self) -> None:
+        queue, worker = self._notify_queue, self._notify_worker
+        self._notify_queue = None
+        self._notify_worker = None
+        if queue is None or worker is None:
+            return
+        try:
+            async with asyncio.timeout(NOTIFY_DRAIN_TIMEOUT_SECONDS):
+                await queue.join()
+        except TimeoutError:
+            logger.warning("停止时仍有 %s 条通知未发送", queue.qsize())
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
     async def cleanup(self) -> None:
-        now = datetime.utcnow()
-        expired = [
-            sid for sid, data in self._pending_qr.items() if data.created_at < now - timedelta(minutes=5)
-        ]
-        for sid in expired:
-            await self._drop_pending_qr(sid)
+        cutoff = time.monotonic() - QR_LOGIN_TTL_SECONDS
+        tasks: list[asyncio.Task[Any]] = []
+        for sid, pending in self._pending_qr.items():
+            if pending.created_at >= cutoff:
+                continue
+            self._qr_locks.pop(sid, None)
+            if pending.expire_handle:
+                pending.expire_handle.cancel()
+            task = pending.wait_task
+            if task and not task.done():
+                task.cancel()
+                tasks.append(task)
+        # 一次性重建字典并统一等待所有被取消的监听任务，而不是逐个 await。
+        self._pending_qr = {sid: pending for sid, pending in self._pending_qr.items() if pending.created_at >= cutoff}
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any
+
+import aiosqlite
+from telethon.sessions import MemorySession, SQLiteSession
+
+logger = logging.getLogger(__name__)
+
+# 实体写入的合并窗口：窗口内的多次实体更新只落盘一次。
+SESSION_FLUSH_DELAY_SECONDS = 1.0
+
+# WAL 允许读写并发，NORMAL 同步级别在 WAL 下仍保证一致性；busy_timeout 让偶发锁冲突等待而非立即报错。
+_SESSION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+)
+
+# 与 Telethon SQLiteSession（版本 7）保持同一表结构，便于双向兼容已有 .session 文件。
+_SESSION_SCHEMA_VERSION = 7
+_SESSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS version (version integer primary key);
+CREATE TABLE IF NOT EXISTS sessions (
+    dc_id integer primary key,
+    server_address text,
+    port integer,
+    auth_key blob,
+    takeout_id integer
+);
+CREATE TABLE IF NOT EXISTS entities (
+    id integer primary key,
+    hash integer not null,
+    username text,
+    phone integer,
+    name text,
+    date integer
+);
+CREATE TABLE IF NOT EXISTS sent_files (
+    md5_digest blob,
+    file_size integer,
+    type integer,
+    id integer,
+    hash integer,
+    primary key(md5_digest, file_size, type)
+);
+CREATE TABLE IF NOT EXISTS update_state (
+    id integer primary key,
+    pts integer,
+    qts integer,
+    date integer,
+    seq integer
+);
+"""
+
+
+class AsyncSQLiteSession(MemorySession):
+    """运行期完全在内存中读写的会话，落盘通过 aiosqlite 异步完成。"""
+
+    def __init__(self, session_name: str):
+        super().__init__()
+        self.filename = session_name if session_name.endswith(".session") else f"{session_name}.session"
+        self.save_entities = True
+        # 按实体 id 去重，_entities 作为只读视图供 MemorySession 的查询方法遍历。
+        self._entity_rows: dict[int, tuple[Any, ...]] = {}
+        self._entities = self._entity_rows.values()
+        self._pending_entities: dict[int, tuple[Any, ...]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+        self._load()
+
+    def _load(self) -> None:
+        # 仅在启动时同步读取一次；借用 SQLiteSession 完成旧版本升级，损坏文件的异常照常抛出。
+        if not os.path.exists(self.filename):
+            return
+        legacy = SQLiteSession(self.filename)
+        try:
+            self._dc_id = legacy.dc_id
+            self._server_address = legacy.server_address
+            self._port = legacy.port
+            self._auth_key = legacy.auth_key
+            self._takeout_id = legacy.takeout_id
+            self._update_states = dict(legacy.get_update_states())
+            cursor = legacy._cursor()
+            try:
+                for row in cursor.execute("select id, hash, username, phone, name from entities"):
+                    self._entity_rows[row[0]] = tuple(row)
+            finally:
+                cursor.close()
+        finally:
+            legacy.close()
+
+    def clone(self, to_instance=None):
+        cloned = super().clone(to_instance or MemorySession())
+        cloned.save_entities = self.save_entities
+        return cloned
+
+    def process_entities(self, tlo):
+        if not self.save_entities:
+            return
+        rows = self._entities_to_rows(tlo)
+        if not rows:
+            return
+        for row in rows:
+            self._entity_rows[row[0]] = row
+            self._pending_entities[row[0]] = row
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task and not self._flush_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_task = loop.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(SESSION_FLUSH_DELAY_SECONDS)
+        try:
+            await self.flush()
+        except Exception as exc:
+            logger.warning("会话实体写入失败(%s): %s", self.filename, exc)
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            now_ts = int(time.time())
+            entity_rows = [row + (now_ts,) for row in self._pending_entities.values()]
+            self._pending_entities.clear()
+            state_rows = [
+                (entity_id, state.pts, state.qts, int(state.date.timestamp()), state.seq)
+                for entity_id, state in list(self._update_states.items())
+            ]
+            try:
+                async with aiosqlite.connect(self.filename) as conn:
+                    for pragma in _SESSION_PRAGMAS:
+                        await conn.execute(pragma)
+                    await conn.executescript(_SESSION_SCHEMA)
+                    async with conn.execute("SELECT 1 FROM version") as cur:
+                        has_version = await cur.fetchone() is not None
+                    if not has_version:
+                        await conn.execute("INSERT INTO version VALUES (?)", (_SESSION_SCHEMA_VERSION,))
+                    await conn.execute("DELETE FROM sessions")
+                    await conn.execute(
+                        "INSERT OR REPLACE INTO sessions VALUES (?,?,?,?,?)",
+                        (
+                            self._dc_id,
+                            self._server_address,
+                            self._port,
+                            self._auth_key.key if self._auth_key else b"",
+                            self._takeout_id,
+                        ),
+                    )
+                    if entity_rows:
+                        await conn.executemany("INSERT OR REPLACE INTO entities VALUES (?,?,?,?,?,?)", entity_rows)
+                    if state_rows:
+                        await conn.executemany("INSERT OR REPLACE INTO update_state VALUES (?,?,?,?,?)", state_rows)
+                    await conn.commit()
+            except BaseException:
+                # 写入失败或被取消时把实体放回待写队列，下次保存时重试。
+                for row in entity_rows:
+                    self._pending_entities.setdefault(row[0], row[:-1])
+                raise
+
+    def discard(self) -> None:
+        # 重置会话前丢弃尚未落盘的数据，避免延迟写入把旧会话写回。
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        self._pending_entities.clear()
+
+    async def save(self) -> None:
+        await self.flush()
+
+    async def close(self) -> None:
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        self._flush_task = None
+        await self.flush()
+
+    async def delete(self) -> None:
+        self.discard()
+        try:
+            await asyncio.to_thread(os.remove, self.filename)
+        except OSError:
+            pass
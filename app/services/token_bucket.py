@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """AIMD 令牌桶：成功时加性提速，FloodWait 时乘性降速，用于替代固定发送间隔。"""
+
+    def __init__(
+        self,
+        capacity: int = 3,
+        refill_rate: float = 30.0,
+        min_rate: float = 1.0,
+        max_rate: float = 30.0,
+        increase_step: float = 0.5,
+        decrease_factor: float = 0.5,
+    ):
+        self.capacity = max(1, int(capacity))
+        self.min_rate = max(0.1, float(min_rate))
+        self.max_rate = max(self.min_rate, float(max_rate))
+        self.refill_rate = min(self.max_rate, max(self.min_rate, float(refill_rate)))
+        self.increase_step = max(0.0, float(increase_step))
+        self.decrease_factor = min(1.0, max(0.1, float(decrease_factor)))
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(float(self.capacity), self._tokens + elapsed * self.refill_rate)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.refill_rate)
+
+    def on_success(self) -> None:
+        self.refill_rate = min(self.max_rate, self.refill_rate + self.increase_step)
+
+    def on_flood_wait(self) -> None:
+        self.refill_rate = max(self.min_rate, self.refill_rate * self.decrease_factor)
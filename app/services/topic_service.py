@@ -1,8 +1,9 @@
 import asyncio
 import io
 import logging
+from collections import deque
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from PIL import Image, ImageOps, UnidentifiedImageError
 from telethon import functions
@@ -12,6 +13,27 @@ from telethon.utils import get_peer_id
 from app.db import Database
 from app.services.telegram_manager import TelegramManager
 
+# 按 topic_id 兜底回查时同时在途的批次上限（每批 100 个 id）。
+TOPIC_BY_ID_CONCURRENCY = 6
+# 批量同步多个任务组时同时进行的任务组数；所有任务组共用同一个 user 客户端，需限制总并发以免触发 FloodWait。
+SYNC_TOPICS_GROUP_CONCURRENCY = 4
+
+
+def _resolve_topic_request_builders() -> tuple[Callable[..., Any] | None, Callable[..., Any] | None]:
+    # 论坛话题接口在新版 Telethon 位于 messages（参数 peer），旧版位于 channels（参数 channel）；
+    # 启动时探测一次，之后直接用构造函数生成请求，不再逐次判断命名空间。
+    namespace, peer_key = functions.messages, "peer"
+    if getattr(namespace, "GetForumTopicsRequest", None) is None:
+        namespace, peer_key = functions.channels, "channel"
+
+    def builder(name: str) -> Callable[..., Any] | None:
+        request_cls = getattr(namespace, name, None)
+        if request_cls is None:
+            return None
+        return lambda chat_id, **kwargs: request_cls(**{peer_key: chat_id}, **kwargs)
+
+    return builder("GetForumTopicsRequest"), builder("GetForumTopicsByIDRequest")
+
 
 class TopicService:
     def __init__(self, db: Database, telegram: TelegramManager, topic_avatar_dir: str):
@@ -20,6 +42,8 @@ class TopicService:
         self.logger = logging.getLogger(__name__)
         self.topic_avatar_dir = Path(topic_avatar_dir)
         self.topic_avatar_dir.mkdir(parents=True, exist_ok=True)
+        self._make_get_topics, self._make_get_topics_by_id = _resolve_topic_request_builders()
+        self._group_sync_semaphore = asyncio.Semaphore(SYNC_TOPICS_GROUP_CONCURRENCY)
 
     def _topic_avatar_filename(self, source_group_id: int, topic_id: int) -> str:
         return f"{int(source_group_id)}_{int(topic_id)}.jpg"
@@ -54,57 +78,32 @@ class TopicService:
             image.save(output, format="JPEG", quality=85, optimize=True)
             return output.getvalue()
 
-    async def _get_topics_by_ids(
-        self,
-        request_cls: Any,
-        use_messages_namespace: bool,
-        source_chat_id: int,
-        topic_ids: list[int],
-    ) -> list[Any]:
-        if not topic_ids:
+    async def _get_topics_by_ids(self, source_chat_id: int, topic_ids: list[int]) -> list[Any]:
+        if not topic_ids or self._make_get_topics_by_id is None:
             return []
-        if use_messages_namespace:
-            request = request_cls(
-                peer=source_chat_id,
-                topics=topic_ids,
-            )
-        else:
-            request = request_cls(
-                channel=source_chat_id,
-                topics=topic_ids,
-            )
+        request = self._make_get_topics_by_id(source_chat_id, topics=topic_ids)
         response = await self.telegram.user_client(request)
         return list(response.topics or [])
 
-    async def _get_topics_by_ids_resilient(
-        self,
-        request_cls: Any,
-        use_messages_namespace: bool,
-        source_chat_id: int,
-        topic_ids: list[int],
-    ) -> list[Any]:
+    async def _get_topics_by_ids_resilient(self, source_chat_id: int, topic_ids: list[int]) -> list[Any]:
         if not topic_ids:
             return []
 
         result: list[Any] = []
-        queue: list[list[int]] = [list(topic_ids)]
+        queue: deque[list[int]] = deque([list(topic_ids)])
         while queue:
-            batch = queue.pop(0)
+            batch = queue.popleft()
             try:
-                chunk = await self._get_topics_by_ids(
-                    request_cls=request_cls,
-                    use_messages_namespace=use_messages_namespace,
-                    source_chat_id=source_chat_id,
-                    topic_ids=batch,
-                )
+                chunk = await self._get_topics_by_ids(source_chat_id=source_chat_id, topic_ids=batch)
                 result.extend(chunk)
             except Exception as exc:
                 if len(batch) == 1:
                     self.logger.warning("topic_id=%s 回查失败，已跳过: %s", batch[0], exc)
                     continue
                 mid = len(batch) // 2
-                queue.insert(0, batch[mid:])
-                queue.insert(0, batch[:mid])
+                # 先压入右半，保证左半先处理。
+                queue.appendleft(batch[mid:])
+                queue.appendleft(batch[:mid])
         return result
 
     async def add_source_group(self, chat_ref: str | int) -> dict[str, Any]:
@@ -125,65 +124,64 @@ class TopicService:
         client = self.telegram.user_client
 
         topic_map: dict[int, dict[str, Any]] = {}
-        seen_pages: set[tuple[int, int]] = set()
+        seen_pages: set[tuple[int, int, int]] = set()
         offset_topic = 0
         offset_id = 0
+        offset_date = None
 
-        get_topics_request_cls = getattr(functions.messages, "GetForumTopicsRequest", None)
-        get_topics_by_id_cls = getattr(functions.messages, "GetForumTopicsByIDRequest", None)
-        use_messages_namespace = True
-        if get_topics_request_cls is None:
-            get_topics_request_cls = getattr(functions.channels, "GetForumTopicsRequest", None)
-            get_topics_by_id_cls = getattr(functions.channels, "GetForumTopicsByIDRequest", None)
-            use_messages_namespace = False
-        if get_topics_request_cls is None:
+        make_get_topics = self._make_get_topics
+        if make_get_topics is None:
             raise RuntimeError("当前 Telethon 版本不支持论坛话题同步接口")
 
+        # 兜底回查所需的已有话题与分页拉取互不依赖，先行发起数据库读取与网络请求重叠；
+        # Telethon 不支持按 id 回查时根本用不到已有话题，也就不读库。
+        existing_topics_task = (
+            asyncio.create_task(self.db.list_topics(source_group_id))
+            if self._make_get_topics_by_id is not None
+            else None
+        )
+
         try:
-            for _ in range(100):
-                page_key = (int(offset_topic), int(offset_id))
+            # 不设页数上限：按 (offset_date, offset_id, offset_topic) 续页，直到末页、偏移重复或本页没有新话题。
+            while True:
+                page_key = (int(offset_topic), int(offset_id), int(offset_date.timestamp()) if offset_date else 0)
                 if page_key in seen_pages:
                     break
                 seen_pages.add(page_key)
 
-                if use_messages_namespace:
-                    request = get_topics_request_cls(
-                        peer=source_chat_id,
-                        offset_date=None,
-                        offset_id=int(offset_id),
-                        offset_topic=offset_topic,
-                        limit=100,
-                        q="",
-                    )
-                else:
-                    request = get_topics_request_cls(
-                        channel=source_chat_id,
-                        offset_date=None,
-                        offset_id=int(offset_id),
-                        offset_topic=offset_topic,
-                        limit=100,
-                        q="",
-                    )
+                request = make_get_topics(
+                    source_chat_id,
+                    offset_date=offset_date,
+                    offset_id=int(offset_id),
+                    offset_topic=offset_topic,
+                    limit=100,
+                    q="",
+                )
                 response = await client(request)
                 chunk = response.topics or []
                 if not chunk:
                     break
 
+                known_count = len(topic_map)
                 for topic in chunk:
                     topic_id = int(topic.id)
                     topic_title = str(getattr(topic, "title", "") or topic_id)
                     topic_map[topic_id] = {"topic_id": topic_id, "title": topic_title}
 
-                if len(chunk) < 100:
+                if len(chunk) < 100 or len(topic_map) == known_count:
                     break
                 last_topic = chunk[-1]
-                next_offset_topic = int(getattr(last_topic, "id", 0) or 0)
-                next_offset_id = int(getattr(last_topic, "top_message", 0) or 0)
-
-                if next_offset_topic == int(offset_topic) and next_offset_id == int(offset_id):
-                    break
-                offset_topic = next_offset_topic
-                offset_id = next_offset_id
+                offset_topic = int(getattr(last_topic, "id", 0) or 0)
+                offset_id = int(getattr(last_topic, "top_message", 0) or 0)
+                # offset_date 取末个话题置顶消息的日期，与 offset_id 一起定位下一页。
+                offset_date = next(
+                    (
+                        getattr(message, "date", None)
+                        for message in (getattr(response, "messages", None) or [])
+                        if int(getattr(message, "id", 0) or 0) == offset_id
+                    ),
+                    None,
+                )
         except Exception as exc:
             self.logger.warning(
                 "论坛话题分页拉取失败，降级到按 topic_id 回查: source_group_id=%s chat_id=%s err=%s",
@@ -192,27 +190,50 @@ class TopicService:
                 exc,
             )
 
-        # 兜底：对数据库已有 topic_id 逐批回查，确保改名后的标题一定能刷新。
-        existing_topics = await self.db.list_topics(source_group_id)
-        existing_ids = sorted({int(row["topic_id"]) for row in existing_topics})
-        if get_topics_by_id_cls is not None:
-            for idx in range(0, len(existing_ids), 100):
-                topic_ids = existing_ids[idx : idx + 100]
-                if not topic_ids:
+        # 兜底：对分页未覆盖到的已有 topic_id 逐批回查，确保分页中断时改名后的标题也能刷新；
+        # 分页已拿到的话题标题本身就是最新的，不再重复回查。
+        existing_topics = await existing_topics_task if existing_topics_task is not None else []
+        # list_topics 已按 topic_id 升序返回且 (source_group_id, topic_id) 唯一，直接沿用顺序，无需再排序去重。
+        missing_ids = [
+            topic_id for topic_id in (int(row["topic_id"]) for row in existing_topics) if topic_id not in topic_map
+        ]
+        if missing_ids:
+            semaphore = asyncio.Semaphore(TOPIC_BY_ID_CONCURRENCY)
+
+            async def fetch(topic_ids: list[int]) -> list[Any]:
+                async with semaphore:
+                    return await self._get_topics_by_ids_resilient(source_chat_id=source_chat_id, topic_ids=topic_ids)
+
+            chunks = [missing_ids[idx : idx + 100] for idx in range(0, len(missing_ids), 100)]
+            results = await asyncio.gather(*(fetch(chunk) for chunk in chunks), return_exceptions=True)
+            # 按批次顺序合并，结果与逐批串行回查一致。
+            for topic_ids, by_id_chunk in zip(chunks, results):
+                if isinstance(by_id_chunk, BaseException):
+                    self.logger.warning(
+                        "topic_id 批次回查失败，已跳过: %s..%s err=%s",
+                        topic_ids[0],
+                        topic_ids[-1],
+                        by_id_chunk,
+                    )
                     continue
-                by_id_chunk = await self._get_topics_by_ids_resilient(
-                    request_cls=get_topics_by_id_cls,
-                    use_messages_namespace=use_messages_namespace,
-                    source_chat_id=source_chat_id,
-                    topic_ids=topic_ids,
-                )
                 for topic in by_id_chunk:
                     topic_id = int(topic.id)
                     topic_title = str(getattr(topic, "title", "") or topic_id)
                     topic_map[topic_id] = {"topic_id": topic_id, "title": topic_title}
 
-        await self.db.upsert_topics(source_group_id, list(topic_map.values()))
-        return await self.db.list_topics(source_group_id)
+        return await self.db.upsert_topics(source_group_id, list(topic_map.values()))
+
+    async def bulk_sync_topics(self, source_group_ids: list[int]) -> list[dict[str, Any]]:
+        async def sync_one(source_group_id: int) -> dict[str, Any]:
+            async with self._group_sync_semaphore:
+                try:
+                    topics = await self.sync_topics(source_group_id)
+                except Exception as exc:
+                    self.logger.warning("任务组话题同步失败: source_group_id=%s err=%s", source_group_id, exc)
+                    return {"source_group_id": source_group_id, "ok": False, "total": 0, "error": str(exc)}
+            return {"source_group_id": source_group_id, "ok": True, "total": len(topics), "error": None}
+
+        return list(await asyncio.gather(*(sync_one(int(gid)) for gid in source_group_ids)))
 
     async def list_source_groups(self) -> list[dict[str, Any]]:
         return await self.db.list_source_groups()
@@ -1,5 +1,5 @@
 import asyncio
-import json
+import gzip
 import logging
 import os
 import platform
@@ -9,11 +9,17 @@ import stat
 import time
 import zipfile
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from urllib import error as url_error
 from urllib import request as url_request
 
+try:
+    # orjson 直接解析 bytes 且速度快于标准库；未安装时回退到 json（同样接受 bytes）。
+    import orjson as _json  # type: ignore
+except ImportError:  # pragma: no cover - 取决于部署环境
+    import json as _json
+
 from app.config import Settings
 from app.db import Database
 from app.services.app_restart_service import AppRestartService
@@ -21,6 +27,12 @@ from app.services.telegram_manager import TelegramManager
 
 logger = logging.getLogger(__name__)
 
+GITHUB_LATEST_RELEASE_URL = "https://api.github.com/repos/{repository}/releases/latest"
+GITHUB_RELEASE_ACCEPT = "application/vnd.github+json"
+GITHUB_ASSET_ACCEPT = "application/octet-stream"
+# 点击“更新”时允许复用的最近一次检查结果的最大时长，刚检查过就不再重复请求 GitHub。
+CONFIRM_STATUS_MAX_AGE_SECONDS = 10.0
+
 
 @dataclass(slots=True)
 class GitHubReleaseAsset:
@@ -60,19 +72,25 @@ class UpdateService:
         self.restart_service = restart_service or AppRestartService()
         self._status_cache: dict[str, object] | None = None
         self._status_cache_at = 0.0
+        self._status_cache_notified = False
         self._status_lock = asyncio.Lock()
+        # (仓库, ETag, Release)：下次查询带 If-None-Match，未变化时 GitHub 返回 304 且不计入限流。
+        self._release_etag_cache: tuple[str, str, GitHubReleaseInfo] | None = None
 
     @staticmethod
     def _now() -> str:
-        return datetime.now(timezone.utc).isoformat(timespec="seconds")
+        # 与 datetime.now(timezone.utc).isoformat(timespec="seconds") 输出格式一致，但无需构造 datetime 对象。
+        return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
 
     @staticmethod
     def _normalize_tag(value: str | None) -> str:
         return str(value or "").strip().lower().lstrip("v")
 
-    @classmethod
-    def _parse_version_tuple(cls, value: str | None) -> tuple[int, ...] | None:
-        normalized = cls._normalize_tag(value)
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _parse_version_tuple(value: str | None) -> tuple[int, ...] | None:
+        # 当前版本号在进程内不变、最新 tag 也很少变化，解析结果按字符串缓存，轮询时不再重复正则扫描。
+        normalized = UpdateService._normalize_tag(value)
         if not normalized or not normalized[:1].isdigit():
             return None
         parts = re.findall(r"\d+", normalized)
@@ -119,17 +137,26 @@ class UpdateService:
         return headers
 
     def _fetch_latest_release_sync(self, repository: str, timeout_seconds: int) -> GitHubReleaseInfo | None:
-        url = f"https://api.github.com/repos/{repository}/releases/latest"
-        req = url_request.Request(
-            url,
-            headers=self._build_headers(accept="application/vnd.github+json"),
-            method="GET",
-        )
+        url = GITHUB_LATEST_RELEASE_URL.format(repository=repository)
+        headers = self._build_headers(accept=GITHUB_RELEASE_ACCEPT)
+        # Release JSON 含完整更新说明与资产列表，请求 gzip 压缩以减少每次轮询的传输量。
+        headers["Accept-Encoding"] = "gzip"
+        cached = self._release_etag_cache
+        if cached is not None and cached[0] == repository:
+            headers["If-None-Match"] = cached[1]
+        req = url_request.Request(url, headers=headers, method="GET")
         try:
             with url_request.urlopen(req, timeout=timeout_seconds) as response:
-                payload = json.loads(response.read().decode("utf-8"))
+                etag = str(response.headers.get("ETag") or "").strip()
+                raw = response.read()
+                if (response.headers.get("Content-Encoding") or "").lower() == "gzip":
+                    raw = gzip.decompress(raw)
+                payload = _json.loads(raw)
         except url_error.HTTPError as exc:
+            if int(exc.code) == 304 and cached is not None and cached[0] == repository:
+                return cached[2]
             if int(exc.code) == 404:
+                self._release_etag_cache = None
                 return None
             body = exc.read().decode("utf-8", errors="ignore")
             raise RuntimeError(f"GitHub Release 查询失败(status={exc.code}): {body[:200]}") from exc
@@ -146,19 +173,21 @@ class UpdateService:
                 )
             )
 
-        return GitHubReleaseInfo(
+        release = GitHubReleaseInfo(
             tag_name=str(payload.get("tag_name") or "").strip(),
             html_url=str(payload.get("html_url") or "").strip(),
             body=str(payload.get("body") or "").strip(),
             published_at=str(payload.get("published_at") or "").strip(),
             assets=assets,
         )
+        self._release_etag_cache = (repository, etag, release) if etag else None
+        return release
 
     def _download_asset_sync(self, asset_url: str, destination: Path, timeout_seconds: int) -> None:
         destination.parent.mkdir(parents=True, exist_ok=True)
         req = url_request.Request(
             asset_url,
-            headers=self._build_headers(accept="application/octet-stream"),
+            headers=self._build_headers(accept=GITHUB_ASSET_ACCEPT),
             method="GET",
         )
         try:
@@ -258,6 +287,16 @@ class UpdateService:
         current_version = (self.settings.app_version or "dev").strip() or "dev"
         is_docker = self._is_running_in_docker()
         repository = (self.settings.update_repository or "").strip()
+        stored = await self.db.get_settings_bulk(
+            [
+                self.KEY_LAST_ERROR,
+                self.KEY_LAST_CHECK_AT,
+                self.KEY_LAST_NOTIFIED_TAG,
+                self.KEY_LAST_NOTIFIED_AT,
+                self.KEY_LAST_TRIGGER_AT,
+                self.KEY_LAST_APPLIED_TAG,
+            ]
+        )
 
         base: dict[str, object] = {
             "ok": True,
@@ -267,16 +306,15 @@ class UpdateService:
             "is_docker": is_docker,
             "docker_only": bool(self.settings.self_update_docker_only),
             "restart_requested": bool(self.restart_service.restart_requested),
-            "last_error": await self.db.get_setting(self.KEY_LAST_ERROR),
-            "last_check_at": await self.db.get_setting(self.KEY_LAST_CHECK_AT),
-            "last_notified_at": await self.db.get_setting(self.KEY_LAST_NOTIFIED_AT),
-            "last_trigger_at": await self.db.get_setting(self.KEY_LAST_TRIGGER_AT),
-            "last_applied_tag": await self.db.get_setting(self.KEY_LAST_APPLIED_TAG),
+            "last_error": stored[self.KEY_LAST_ERROR],
+            "last_check_at": stored[self.KEY_LAST_CHECK_AT],
+            "last_notified_at": stored[self.KEY_LAST_NOTIFIED_AT],
+            "last_trigger_at": stored[self.KEY_LAST_TRIGGER_AT],
+            "last_applied_tag": stored[self.KEY_LAST_APPLIED_TAG],
         }
 
         if not self.settings.self_update_enabled:
-            await self.db.set_setting(self.KEY_LAST_ERROR, "")
-            await self.db.set_setting(self.KEY_LAST_CHECK_AT, now)
+            await self.db.set_settings_bulk({self.KEY_LAST_ERROR: "", self.KEY_LAST_CHECK_AT: now})
             base.update(
                 {
                     "has_update": False,
@@ -292,8 +330,7 @@ class UpdateService:
 
         if not repository or "/" not in repository:
             error = "UPDATE_REPOSITORY 配置无效，应为 owner/repo"
-            await self.db.set_setting(self.KEY_LAST_ERROR, error)
-            await self.db.set_setting(self.KEY_LAST_CHECK_AT, now)
+            await self.db.set_settings_bulk({self.KEY_LAST_ERROR: error, self.KEY_LAST_CHECK_AT: now})
             base.update(
                 {
                     "ok": False,
@@ -315,8 +352,7 @@ class UpdateService:
             )
         except Exception as exc:
             error = f"更新检查失败: {exc}"
-            await self.db.set_setting(self.KEY_LAST_ERROR, error[:500])
-            await self.db.set_setting(self.KEY_LAST_CHECK_AT, now)
+            await self.db.set_settings_bulk({self.KEY_LAST_ERROR: error[:500], self.KEY_LAST_CHECK_AT: now})
             base.update(
                 {
                     "ok": False,
@@ -332,8 +368,7 @@ class UpdateService:
 
         if release is None or not release.tag_name:
             error = "仓库未找到可用 Release，无法执行面板内更新"
-            await self.db.set_setting(self.KEY_LAST_ERROR, error)
-            await self.db.set_setting(self.KEY_LAST_CHECK_AT, now)
+            await self.db.set_settings_bulk({self.KEY_LAST_ERROR: error, self.KEY_LAST_CHECK_AT: now})
             base.update(
                 {
                     "ok": False,
@@ -364,9 +399,13 @@ class UpdateService:
         can_apply = has_update and not blocked_reason
 
         notified = False
+        updates = {
+            self.KEY_LAST_RELEASE_TAG: release.tag_name,
+            self.KEY_LAST_ERROR: "",
+            self.KEY_LAST_CHECK_AT: now,
+        }
         if send_notify and has_update and self.settings.update_notify_enabled:
-            last_notified_tag = await self.db.get_setting(self.KEY_LAST_NOTIFIED_TAG)
-            if last_notified_tag != release.tag_name:
+            if stored[self.KEY_LAST_NOTIFIED_TAG] != release.tag_name:
                 await self.telegram.send_notification(
                     "🆕 检测到新版本\n"
                     f"当前版本: {current_version}\n"
@@ -374,13 +413,11 @@ class UpdateService:
                     f"仓库: {repository}\n"
                     "请在面板点击“下载更新并重启”执行升级。"
                 )
-                await self.db.set_setting(self.KEY_LAST_NOTIFIED_TAG, release.tag_name)
-                await self.db.set_setting(self.KEY_LAST_NOTIFIED_AT, now)
+                updates[self.KEY_LAST_NOTIFIED_TAG] = release.tag_name
+                updates[self.KEY_LAST_NOTIFIED_AT] = now
                 notified = True
 
-        await self.db.set_setting(self.KEY_LAST_RELEASE_TAG, release.tag_name)
-        await self.db.set_setting(self.KEY_LAST_ERROR, "")
-        await self.db.set_setting(self.KEY_LAST_CHECK_AT, now)
+        await self.db.set_settings_bulk(updates)
 
         base.update(
             {
@@ -405,17 +442,33 @@ class UpdateService:
         )
         return base
 
-    async def _load_status(self, *, force_refresh: bool, send_notify: bool) -> dict[str, object]:
-        ttl_seconds = self._status_cache_ttl_seconds()
+    async def _load_status(
+        self,
+        *,
+        force_refresh: bool,
+        send_notify: bool,
+        max_age_seconds: float | None = None,
+    ) -> dict[str, object]:
+        ttl_seconds = self._status_cache_ttl_seconds() if max_age_seconds is None else max_age_seconds
+        requested_at = time.monotonic()
         if not force_refresh and self._status_cache is not None and (time.monotonic() - self._status_cache_at) < ttl_seconds:
             return dict(self._status_cache)
 
         async with self._status_lock:
             if not force_refresh and self._status_cache is not None and (time.monotonic() - self._status_cache_at) < ttl_seconds:
                 return dict(self._status_cache)
+            # 等锁期间已有检查完成（且覆盖了通知需求）时直接共享其结果，避免并发的强制刷新重复请求 GitHub。
+            if (
+                force_refresh
+                and self._status_cache is not None
+                and self._status_cache_at >= requested_at
+                and (self._status_cache_notified or not send_notify)
+            ):
+                return dict(self._status_cache)
             status = await self._check_status_core(send_notify=send_notify)
             self._status_cache = dict(status)
             self._status_cache_at = time.monotonic()
+            self._status_cache_notified = send_notify
             return dict(status)
 
     def _invalidate_status_cache(self) -> None:
@@ -433,7 +486,11 @@ class UpdateService:
         if running_jobs > 0:
             raise RuntimeError(f"当前有 {running_jobs} 个恢复任务正在执行，请等待完成后再更新")
 
-        status = await self._load_status(force_refresh=True, send_notify=False)
+        status = await self._load_status(
+            force_refresh=False,
+            send_notify=False,
+            max_age_seconds=CONFIRM_STATUS_MAX_AGE_SECONDS,
+        )
         if not bool(status.get("ok")):
             raise RuntimeError(str(status.get("error") or "更新检查失败"))
 
@@ -463,9 +520,13 @@ class UpdateService:
         )
 
         now = self._now()
-        await self.db.set_setting(self.KEY_LAST_APPLIED_TAG, latest_tag)
-        await self.db.set_setting(self.KEY_LAST_TRIGGER_AT, now)
-        await self.db.set_setting(self.KEY_LAST_ERROR, "")
+        await self.db.set_settings_bulk(
+            {
+                self.KEY_LAST_APPLIED_TAG: latest_tag,
+                self.KEY_LAST_TRIGGER_AT: now,
+                self.KEY_LAST_ERROR: "",
+            }
+        )
         self._invalidate_status_cache()
         self.restart_service.request_restart(
             int(self.settings.self_update_restart_delay_seconds),
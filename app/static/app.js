@@ -838,7 +838,7 @@ function wireActions() {
       const result = await api("/api/auth/qr/create", { method: "POST" });
       currentQrSessionId = result.session_id;
       const qrImage = document.getElementById("qr-image");
-      qrImage.src = `data:image/png;base64,${result.qr_image_base64}`;
+      qrImage.src = `/api/auth/qr/${encodeURIComponent(result.session_id)}.png`;
       setText("qr-status", "二维码已生成，请先扫码；可直接提交二级密码，系统会自动等待最多20秒扫码确认。");
     } catch (error) {
       alert(error.message);
@@ -965,6 +965,24 @@ function wireActions() {
     }
   });
 
+  document.getElementById("sync-all-topics-btn").addEventListener("click", async () => {
+    try {
+      const result = await api("/api/source-groups/sync-topics", { method: "POST" });
+      if (currentSourceId) {
+        await refreshTopics();
+      }
+      let message = `全部任务组话题同步完成：成功 ${result.synced ?? 0}，失败 ${result.failed ?? 0}`;
+      const failures = (result.results || []).filter((x) => !x.ok);
+      if (failures.length > 0) {
+        const lines = failures.slice(0, 5).map((x) => `任务组 ${x.source_group_id}: ${x.error || "未知错误"}`);
+        message += `\n失败示例:\n${lines.join("\n")}`;
+      }
+      alert(message);
+    } catch (error) {
+      alert(error.message);
+    }
+  });
+
   document.getElementById("sync-topics-btn").addEventListener("click", async () => {
     try {
       if (!currentSourceId) {
@@ -1,7 +1,11 @@
+import asyncio
+import shutil
 import sys
 from pathlib import Path
 from types import ModuleType
 
+import pytest
+
 if "qrcode" not in sys.modules:
     fake_qrcode = ModuleType("qrcode")
     fake_qrcode.make = lambda *_args, **_kwargs: None
@@ -10,3 +14,20 @@ if "qrcode" not in sys.modules:
 ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+from app.db import Database
+
+
+@pytest.fixture(scope="session")
+def db_template(tmp_path_factory) -> Path:
+    # 建表与迁移只在整个测试会话执行一次，各用例复制这份模板库即可。
+    path = tmp_path_factory.mktemp("db_template") / "template.db"
+    asyncio.run(Database(str(path)).init())
+    return path
+
+
+@pytest.fixture
+def db(db_template: Path, tmp_path: Path):
+    path = tmp_path / "test.db"
+    shutil.copyfile(db_template, path)
+    return Database(str(path))
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.db import Database
+from app.services.bot_channel_sync_service import BotChannelSyncService
+
+
+def _member_update(update_id: int, chat_id: int, status: str, title: str = "频道") -> dict:
+    return {
+        "update_id": update_id,
+        "my_chat_member": {
+            "chat": {"id": chat_id, "type": "channel", "title": title},
+            "new_chat_member": {"status": status},
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_sync_once_batches_writes_and_keeps_last_state(tmp_path):
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    await db.set_setting("bot_updates_offset", "10")
+    await db.upsert_channel(chat_id=-1003, title="old", is_standby=True)
+
+    service = BotChannelSyncService(db, SimpleNamespace(bot_token="fake-token"))
+    updates = [
+        _member_update(10, -1001, "administrator", "A"),
+        _member_update(11, -1002, "administrator", "B"),
+        _member_update(12, -1002, "left", "B"),
+        _member_update(13, -1003, "kicked", "C"),
+    ]
+
+    async def fake_fetch_updates(offset: int, timeout_seconds: int):
+        assert offset == 10
+        return updates
+
+    service._fetch_updates = fake_fetch_updates  # type: ignore[method-assign]
+
+    result = await service.sync_once()
+
+    assert result == {"ok": True, "received": 4, "tracked_channels": 4}
+    standby = await db.list_standby_channels()
+    assert [(row["chat_id"], row["title"]) for row in standby] == [(-1001, "A")]
+    assert await db.get_channel(-1002) is None
+    assert await db.get_channel(-1003) is None
+    assert await db.get_setting("bot_updates_offset") == "14"
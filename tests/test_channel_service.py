@@ -1,4 +1,6 @@
+import asyncio
 import sys
+import time
 from types import ModuleType, SimpleNamespace
 
 import pytest
@@ -8,6 +10,7 @@ if "qrcode" not in sys.modules:
     fake_qrcode.make = lambda *_args, **_kwargs: None
     sys.modules["qrcode"] = fake_qrcode
 
+from app.db import Database
 from app.services.channel_service import ChannelService
 
 
@@ -110,3 +113,62 @@ async def test_check_channel_access_rate_limit_message() -> None:
     assert not ok
     assert "Bot请求过于频繁" in str(error_text)
     assert db.marked == []
+
+
+class RefreshTelegram(FakeTelegram):
+    async def is_bot_authorized(self) -> bool:
+        return True
+
+    async def ensure_bot_connected(self) -> None:
+        return None
+
+
+@pytest.mark.asyncio
+async def test_refresh_standby_channels_skips_recent_admin_checks(tmp_path) -> None:
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    fresh_at = int(time.time())
+    stale_at = fresh_at - 3600
+    await db.upsert_channel(chat_id=-1001, title="fresh", is_standby=True, admin_check_at=fresh_at)
+    await db.upsert_channel(chat_id=-1002, title="stale", is_standby=True, admin_check_at=stale_at)
+
+    service = ChannelService(db, RefreshTelegram())
+    checked: list[int] = []
+
+    async def fake_is_bot_admin(chat_id: int) -> bool:
+        checked.append(chat_id)
+        return False
+
+    service._is_bot_admin = fake_is_bot_admin  # type: ignore[method-assign]
+
+    result = await service.refresh_standby_channels()
+
+    assert checked == [-1002]
+    assert result["checked_permissions"] == 1
+    assert result["skipped_permission_checks"] == 1
+    assert result["removed"] == 1
+    standby = await db.list_standby_channels()
+    assert [row["chat_id"] for row in standby] == [-1001]
+    assert standby[0]["admin_check_at"] == fresh_at
+
+
+@pytest.mark.asyncio
+async def test_check_channel_access_shares_concurrency_limit() -> None:
+    service = ChannelService(FakeDB(), FakeTelegram(), access_check_concurrency=2)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_probe(chat_id: int):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return True, None, None
+
+    service._probe_bot_send_then_delete = fake_probe  # type: ignore[method-assign]
+
+    results = await asyncio.gather(*[service.check_channel_access(-1000 - i) for i in range(6)])
+
+    assert all(ok for ok, _ in results)
+    assert max_in_flight == 2
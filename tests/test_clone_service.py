@@ -1,10 +1,12 @@
+import asyncio
 from pathlib import Path
 from types import SimpleNamespace
 
 import pytest
+from telethon.errors import FloodWaitError
 from telethon.tl.types import DocumentAttributeVideo, InputFile, InputMediaUploadedDocument, InputMediaUploadedPhoto
 
-from app.services.clone_service import CloneService
+from app.services.clone_service import CloneService, PreparedMediaItem
 
 
 class DummyDB:
@@ -72,6 +74,10 @@ class DummyUserClient:
         media_path.write_bytes(f"data-{int(message.id)}".encode("utf-8"))
         return str(media_path)
 
+    async def get_messages(self, _source_chat_id, ids=None, **_kwargs):
+        by_id = {int(message.id): message for message in self.group_messages}
+        return [by_id.get(int(message_id)) for message_id in ids or []]
+
     async def iter_messages(self, _source_chat_id, reverse=False, min_id=0, **_kwargs):
         messages = self.history_messages if reverse else self.group_messages
         for message in messages:
@@ -233,3 +239,172 @@ async def test_clone_topic_history_preserves_album_order_and_text_after_album(mo
 
 async def _collect_progress(container: list[int], checkpoint: int) -> None:
     container.append(checkpoint)
+
+
+class ForwardingUserClient(DummyUserClient):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.forward_calls = []
+
+    async def forward_messages(self, **kwargs):
+        self.forward_calls.append(kwargs)
+        return True
+
+
+@pytest.mark.asyncio
+async def test_clone_topic_history_batches_single_forwards_when_md5_disabled():
+    db = DummyDB(md5_enabled=False)
+    reply_to = SimpleNamespace(reply_to_top_id=100, forum_topic=False)
+    history = [
+        build_message(101, text="第一条", reply_to=reply_to),
+        build_message(102, text="", reply_to=reply_to),
+        build_message(103, text="第三条", media=object(), reply_to=reply_to),
+    ]
+    user = ForwardingUserClient(history_messages=history)
+    tg = SimpleNamespace(bot_client=DummyBotClient(), user_client=user)
+    service = CloneService(tg, db)
+
+    result = await service.clone_topic_history(source_chat_id=-100001, topic_id=100, target_channel=-100777)
+
+    assert result["cloned"] == 2
+    assert result["skipped"] == 1
+    assert result["last_cloned_message_id"] == 103
+    assert len(user.forward_calls) == 1
+    assert user.forward_calls[0]["messages"] == [101, 103]
+
+
+@pytest.mark.asyncio
+async def test_clone_topic_history_writes_checkpoints_in_background_and_keeps_latest():
+    db = DummyDB(md5_enabled=False)
+    reply_to = SimpleNamespace(reply_to_top_id=100, forum_topic=False)
+    history = [build_message(mid, text=f"消息{mid}", reply_to=reply_to) for mid in range(101, 113)]
+    user = ForwardingUserClient(history_messages=history)
+    tg = SimpleNamespace(bot_client=DummyBotClient(), user_client=user)
+    service = CloneService(tg, db)
+    progress_updates = []
+
+    async def slow_progress(checkpoint: int) -> None:
+        await asyncio.sleep(0.01)
+        progress_updates.append(checkpoint)
+
+    result = await service.clone_topic_history(
+        source_chat_id=-100001,
+        topic_id=100,
+        target_channel=-100777,
+        progress_hook=slow_progress,
+    )
+
+    assert result["cloned"] == 12
+    assert progress_updates == sorted(progress_updates)
+    assert progress_updates[-1] == 112
+
+
+def test_in_topic_prefers_reply_to_top_id_and_falls_back_to_forum_reply():
+    top_reply = SimpleNamespace(reply_to_top_id=100, forum_topic=True, reply_to_msg_id=555)
+    forum_reply = SimpleNamespace(reply_to_top_id=None, forum_topic=True, reply_to_msg_id=100)
+
+    assert CloneService.in_topic(build_message(101, reply_to=top_reply), 100)
+    assert not CloneService.in_topic(build_message(101, reply_to=top_reply), 555)
+    assert CloneService.in_topic(build_message(102, reply_to=forum_reply), 100)
+    assert CloneService.in_topic(build_message(100), 100, mid=100)
+    assert not CloneService.in_topic(build_message(103), 100)
+
+
+class FloodOnceUserClient(DummyUserClient):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.send_file_calls = []
+        self.upload_calls = []
+
+    async def upload_file(self, file, file_name=None):
+        self.upload_calls.append(file_name)
+        return InputFile(len(self.upload_calls), 1, file_name or "file", "0" * 32)
+
+    async def send_file(self, **kwargs):
+        self.send_file_calls.append(kwargs)
+        if len(self.send_file_calls) == 1:
+            raise FloodWaitError(request=None, capture=0)
+        return SimpleNamespace(id=len(self.send_file_calls))
+
+
+@pytest.mark.asyncio
+async def test_send_prepared_media_items_reuses_uploads_after_flood_wait(monkeypatch):
+    async def no_sleep(_seconds):
+        return None
+
+    monkeypatch.setattr("app.services.clone_service.asyncio.sleep", no_sleep)
+    user = FloodOnceUserClient()
+    tg = SimpleNamespace(bot_client=DummyBotClient(), user_client=user)
+    service = CloneService(tg, DummyDB(md5_enabled=False))
+    items = [
+        PreparedMediaItem(
+            message=build_message(mid, photo=True),
+            file_path=f"/tmp/photo_{mid}.jpg",
+            thumb_path=None,
+            mime_type="image/jpeg",
+            attributes=[],
+            is_photo=True,
+            supports_streaming=False,
+            caption=f"图{mid}",
+            caption_entities=None,
+            file_bytes=b"data",
+        )
+        for mid in (1, 2)
+    ]
+
+    ok = await service._send_prepared_media_items(items, -100777)
+
+    assert ok is True
+    assert user.upload_calls == ["photo_1.jpg", "photo_2.jpg"]
+    assert len(user.send_file_calls) == 2
+    assert user.send_file_calls[0]["file"] is user.send_file_calls[1]["file"]
+    assert user.send_file_calls[1]["caption"] == ["图1", "图2"]
+
+
+
+class SlowForwardingUserClient(ForwardingUserClient):
+    async def forward_messages(self, **kwargs):
+        await asyncio.sleep(0.01)
+        return await super().forward_messages(**kwargs)
+
+
+async def _clone_with_failing_checkpoint_hook(message_count: int, hook_delay: float):
+    reply_to = SimpleNamespace(reply_to_top_id=100, forum_topic=False)
+    history = [build_message(mid, text=f"消息{mid}", reply_to=reply_to) for mid in range(101, 101 + message_count)]
+    user = SlowForwardingUserClient(history_messages=history)
+    service = CloneService(SimpleNamespace(bot_client=DummyBotClient(), user_client=user), DummyDB(md5_enabled=False))
+    hook_calls = []
+
+    async def stopping_progress(checkpoint: int) -> None:
+        hook_calls.append(checkpoint)
+        # 写入期间更新的断点进入单槽队列，随后模拟手动停止导致的写入失败。
+        await asyncio.sleep(hook_delay)
+        raise RuntimeError("任务已手动停止")
+
+    with pytest.raises(RuntimeError, match="任务已手动停止"):
+        await asyncio.wait_for(
+            service.clone_topic_history(
+                source_chat_id=-100001,
+                topic_id=100,
+                target_channel=-100777,
+                progress_hook=stopping_progress,
+            ),
+            timeout=5,
+        )
+    return user, hook_calls
+
+
+@pytest.mark.asyncio
+async def test_clone_topic_history_does_not_hang_when_hook_fails_during_shutdown():
+    # 循环先结束、写入任务在哨兵入队等待期间失败：不得永久阻塞。
+    _user, hook_calls = await _clone_with_failing_checkpoint_hook(250, hook_delay=0.1)
+
+    assert len(hook_calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_clone_topic_history_aborts_as_soon_as_checkpoint_hook_fails():
+    user, hook_calls = await _clone_with_failing_checkpoint_hook(500, hook_delay=0.02)
+
+    assert len(hook_calls) == 1
+    assert len(user.forward_calls) < 5
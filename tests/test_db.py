@@ -1,13 +1,11 @@
-﻿import pytest
+﻿import aiosqlite
+import pytest
 
 from app.db import Database
 
 
 @pytest.mark.asyncio
-async def test_queue_deduplicate(tmp_path):
-    db = Database(str(tmp_path / "test.db"))
-    await db.init()
-
+async def test_queue_deduplicate(db):
     sg = await db.add_or_update_source_group(chat_id=-1001, title="sg")
     await db.upsert_topics(
         sg["id"],
@@ -33,10 +31,7 @@ async def test_queue_deduplicate(tmp_path):
 
 
 @pytest.mark.asyncio
-async def test_binding_upsert(tmp_path):
-    db = Database(str(tmp_path / "test.db"))
-    await db.init()
-
+async def test_binding_upsert(db):
     sg = await db.add_or_update_source_group(chat_id=-10011, title="sg")
     await db.upsert_topics(
         sg["id"],
@@ -54,10 +49,7 @@ async def test_binding_upsert(tmp_path):
 
 
 @pytest.mark.asyncio
-async def test_banned_and_recovery_list_include_titles(tmp_path):
-    db = Database(str(tmp_path / "test.db"))
-    await db.init()
-
+async def test_banned_and_recovery_list_include_titles(db):
     sg = await db.add_or_update_source_group(chat_id=-100111, title="源任务组")
     await db.upsert_topics(
         sg["id"],
@@ -93,3 +85,105 @@ async def test_banned_and_recovery_list_include_titles(tmp_path):
     assert queue[0]["topic_title"] == "话题名称"
     assert queue[0]["old_channel_title"] == "旧频道名称"
     assert queue[0]["new_channel_title"] == "新频道名称"
+
+
+@pytest.mark.asyncio
+async def test_channel_prefetch_helpers(db):
+    sg = await db.add_or_update_source_group(chat_id=-100211, title="sg")
+    await db.upsert_topics(sg["id"], [{"topic_id": 1, "title": "t1"}, {"topic_id": 2, "title": "t2"}])
+    await db.upsert_channel(chat_id=-100311, title="bound", is_standby=True)
+    await db.upsert_channel(chat_id=-100312, title="inactive", is_standby=True)
+    await db.upsert_binding(sg["id"], 1, -100311)
+    await db.upsert_binding(sg["id"], 2, -100312)
+    await db.set_binding_active(sg["id"], 2, False)
+
+    channels_map = await db.get_channels_map()
+    assert set(channels_map) == {-100311, -100312}
+    assert channels_map[-100311]["title"] == "bound"
+    assert await db.get_bound_channel_ids() == {-100311}
+
+
+@pytest.mark.asyncio
+async def test_init_migrates_iso_admin_check_at_to_epoch(tmp_path):
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    await db.upsert_channel(chat_id=-100411, title="legacy", is_standby=True)
+    async with aiosqlite.connect(db.db_path) as conn:
+        await conn.execute(
+            "UPDATE channels SET admin_check_at=? WHERE chat_id=?",
+            ("2024-01-02T03:04:05+00:00", -100411),
+        )
+        await conn.commit()
+
+    await db.init()
+
+    row = await db.get_channel(-100411)
+    assert int(row["admin_check_at"]) == 1704164645
+
+
+@pytest.mark.asyncio
+async def test_bulk_banned_and_enqueue_recoveries(db):
+    sg = await db.add_or_update_source_group(chat_id=-100511, title="sg")
+    await db.upsert_topics(sg["id"], [{"topic_id": 1, "title": "t1"}, {"topic_id": 2, "title": "t2"}])
+    existing_queue_id = await db.enqueue_recovery(
+        source_group_id=sg["id"],
+        topic_id=1,
+        old_channel_chat_id=-100611,
+        reason="old",
+    )
+
+    await db.add_banned_channel(source_group_id=sg["id"], topic_id=1, channel_chat_id=-100611, reason="old")
+    await db.add_banned_channels_bulk(
+        [
+            (sg["id"], 1, -100611, "again"),
+            (sg["id"], 2, -100612, "new"),
+        ]
+    )
+    results = await db.enqueue_recoveries_bulk(
+        [
+            (sg["id"], 1, -100611, "again"),
+            (sg["id"], 2, -100612, "new"),
+            (sg["id"], 2, -100612, "dup"),
+        ]
+    )
+
+    banned = await db.list_banned_channels()
+    assert sorted((row["channel_chat_id"], row["reason"]) for row in banned) == [(-100612, "new"), (-100611, "again")]
+    assert results[0] == (existing_queue_id, False)
+    assert results[1][1] is True
+    assert results[2] == (results[1][0], False)
+
+
+@pytest.mark.asyncio
+async def test_resolve_binding_for_event(db):
+    sg = await db.add_or_update_source_group(chat_id=-100711, title="sg")
+    await db.upsert_topics(sg["id"], [{"topic_id": 5, "title": "t5"}, {"topic_id": 6, "title": "t6"}])
+    await db.upsert_binding(sg["id"], 5, -100811)
+
+    resolved = await db.resolve_binding_for_event(-100711, 5)
+    assert resolved["source_group_id"] == sg["id"]
+    assert resolved["source_title"] == "sg"
+    assert resolved["topic_title"] == "t5"
+    assert resolved["binding_active"] == 1
+    assert resolved["channel_chat_id"] == -100811
+    assert await db.resolve_binding_for_event(-100711, 6) is None
+    assert await db.resolve_binding_for_event(-100999, 5) is None
+
+
+@pytest.mark.asyncio
+async def test_upsert_topics_returns_all_group_topics(db):
+    sg = await db.add_or_update_source_group(chat_id=-10081, title="sg")
+    await db.upsert_topics(sg["id"], [{"topic_id": 3, "title": "t3"}])
+    result = await db.upsert_topics(sg["id"], [{"topic_id": 1, "title": "t1"}, {"topic_id": 3, "title": "t3-new"}])
+
+    assert [(row["topic_id"], row["title"]) for row in result] == [(1, "t1"), (3, "t3-new")]
+    assert result == await db.list_topics(sg["id"])
+
+
+@pytest.mark.asyncio
+async def test_settings_bulk_roundtrip(db):
+    await db.set_setting("a", "old")
+    await db.set_settings_bulk({"a": "1", "b": "2"})
+
+    assert await db.get_settings_bulk(["a", "b", "missing"]) == {"a": "1", "b": "2", "missing": None}
+    assert await db.get_setting("a") == "1"
@@ -15,15 +15,20 @@ class DummyDB:
     def __init__(self) -> None:
         self.banned_calls: list[dict] = []
         self.enqueue_calls: list[dict] = []
-
-    async def get_source_group_by_chat_id(self, chat_id: int):
-        return {"id": 3, "enabled": 1, "title": "源群"}
-
-    async def get_topic(self, source_group_id: int, topic_id: int):
-        return {"enabled": 1, "title": f"话题{topic_id}"}
-
-    async def get_binding(self, source_group_id: int, topic_id: int):
-        return {"active": 1, "channel_chat_id": -100123456}
+        self.resolve_calls = 0
+        self.binding_version = 0
+
+    async def resolve_binding_for_event(self, chat_id: int, topic_id: int):
+        self.resolve_calls += 1
+        return {
+            "source_group_id": 3,
+            "source_title": "源群",
+            "source_enabled": 1,
+            "topic_title": f"话题{topic_id}",
+            "topic_enabled": 1,
+            "binding_active": 1,
+            "channel_chat_id": -100123456,
+        }
 
     async def add_banned_channel(self, **kwargs):
         self.banned_calls.append(kwargs)
@@ -89,3 +94,19 @@ async def test_clone_send_error_enqueues_recovery_and_notifies():
     assert len(db.enqueue_calls) == 1
     assert len(tg.notifications) == 1
     assert "实时克隆发现频道失效" in tg.notifications[0]
+
+
+@pytest.mark.asyncio
+async def test_binding_resolution_is_cached_until_bindings_change():
+    db = DummyDB()
+    clone = DummyCloneService()
+    service = ListenerService(db, DummyTelegram(), clone)
+
+    await service.on_new_message(build_event("第一条", message_id=9527))
+    await service.on_new_message(build_event("第二条", message_id=9527))
+    assert db.resolve_calls == 1
+    assert len(clone.calls) == 2
+
+    db.binding_version += 1
+    await service.on_new_message(build_event("第三条", message_id=9527))
+    assert db.resolve_calls == 2
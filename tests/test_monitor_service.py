@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+from telethon import errors as tg_errors
+
+from app.services.monitor_service import MonitorService, is_channel_unavailable_error
+
+
+class DummyDB:
+    def __init__(self, bindings):
+        self.bindings = bindings
+        self.banned = []
+        self.enqueued = []
+
+    async def list_active_bindings(self):
+        return list(self.bindings)
+
+    async def add_banned_channels_bulk(self, rows):
+        self.banned.extend(rows)
+
+    async def enqueue_recoveries_bulk(self, rows):
+        results = []
+        for row in rows:
+            self.enqueued.append(row)
+            results.append((len(self.enqueued), True))
+        return results
+
+
+class DummyChannelService:
+    def __init__(self, results):
+        self.results = results
+        self.checked = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def check_channel_access(self, channel_chat_id: int):
+        self.checked.append(channel_chat_id)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        result = self.results[channel_chat_id]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    @staticmethod
+    def is_transient_probe_error_text(error_text):
+        return "timeout" in str(error_text or "")
+
+
+class DummyTelegram:
+    def __init__(self):
+        self.notifications = []
+
+    async def send_notification(self, text: str):
+        self.notifications.append(text)
+
+
+def build_binding(topic_id: int, channel_chat_id: int, source_enabled: int = 1):
+    return {
+        "source_group_id": 1,
+        "topic_id": topic_id,
+        "channel_chat_id": channel_chat_id,
+        "source_enabled": source_enabled,
+    }
+
+
+@pytest.mark.asyncio
+async def test_scan_once_checks_channels_concurrently_and_keeps_binding_order():
+    db = DummyDB(
+        [
+            build_binding(10, -1001),
+            build_binding(11, -1002),
+            build_binding(12, -1003),
+            build_binding(13, -1004),
+            build_binding(14, -1005, source_enabled=0),
+        ]
+    )
+    channel_service = DummyChannelService(
+        {
+            -1001: (True, None),
+            -1002: (False, "ChannelPrivateError"),
+            -1003: (False, "request timeout"),
+            -1004: RuntimeError("boom"),
+        }
+    )
+    telegram = DummyTelegram()
+    service = MonitorService(db, telegram, channel_service, interval_seconds=60)
+
+    result = await service.scan_once()
+
+    assert channel_service.max_in_flight > 1
+    assert result == {
+        "scanned": 5,
+        "skipped_source_disabled": 1,
+        "transient_errors": 2,
+        "skipped_backoff": 0,
+        "unavailable": 1,
+        "enqueued": 1,
+        "already_queued": 0,
+    }
+    assert db.banned == [(1, 11, -1002, "ChannelPrivateError")]
+    assert len(telegram.notifications) == 1
+    assert db.enqueued == [(1, 11, -1002, "ChannelPrivateError")]
+
+
+def test_is_channel_unavailable_error_matches_types_and_keywords():
+    assert is_channel_unavailable_error(tg_errors.ChannelPrivateError(request=None))
+    assert is_channel_unavailable_error(RuntimeError("CHAT_WRITE_FORBIDDEN"))
+    assert is_channel_unavailable_error(RuntimeError("The channel couldn't be displayed on your device"))
+    assert not is_channel_unavailable_error(RuntimeError("connection reset by peer"))
+
+
+@pytest.mark.asyncio
+async def test_scan_once_checks_each_channel_once_for_shared_bindings():
+    db = DummyDB([build_binding(10, -1001), build_binding(11, -1001), build_binding(12, -1002)])
+    channel_service = DummyChannelService({-1001: (False, "ChannelPrivateError"), -1002: (True, None)})
+    service = MonitorService(db, DummyTelegram(), channel_service, interval_seconds=60)
+
+    result = await service.scan_once()
+
+    assert sorted(channel_service.checked) == [-1002, -1001]
+    assert result["unavailable"] == 2
+    assert [row[1] for row in db.enqueued] == [10, 11]
+
+
+@pytest.mark.asyncio
+async def test_scan_once_backs_off_failing_channels_and_resets_on_success():
+    db = DummyDB([build_binding(10, -1001), build_binding(11, -1002)])
+    channel_service = DummyChannelService({-1001: (False, "request timeout"), -1002: (True, None)})
+    service = MonitorService(db, DummyTelegram(), channel_service, interval_seconds=60)
+
+    for _ in range(3):
+        await service.scan_once()
+    assert channel_service.checked.count(-1001) == 3
+
+    channel_service.checked.clear()
+    skipped = 0
+    for _ in range(4):
+        skipped += (await service.scan_once())["skipped_backoff"]
+    assert channel_service.checked.count(-1002) == 4
+    assert channel_service.checked.count(-1001) == 2
+    assert skipped == 2
+
+    channel_service.results[-1001] = (True, None)
+    for _ in range(2):
+        await service.scan_once()
+    channel_service.checked.clear()
+    await service.scan_once()
+    await service.scan_once()
+    assert channel_service.checked.count(-1001) == 2
+
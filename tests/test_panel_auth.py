@@ -1,14 +1,8 @@
+import hashlib
+import hmac
 from dataclasses import dataclass
-from importlib.util import module_from_spec, spec_from_file_location
-from pathlib import Path
 
-PANEL_AUTH_PATH = Path(__file__).resolve().parent.parent / "app" / "services" / "panel_auth_service.py"
-spec = spec_from_file_location("panel_auth_service", PANEL_AUTH_PATH)
-if spec is None or spec.loader is None:
-    raise RuntimeError(f"无法加载模块: {PANEL_AUTH_PATH}")
-module = module_from_spec(spec)
-spec.loader.exec_module(module)
-PanelAuthService = module.PanelAuthService
+from app.services.panel_auth_service import PanelAuthService
 
 
 @dataclass
@@ -35,3 +29,22 @@ def test_token_valid_and_expired_and_tampered():
     exp, sign = token.split(".", 1)
     tampered = f"{exp}.{sign[:-1]}0"
     assert service.verify_session_token(tampered, current_ts=105) is False
+
+
+def test_token_signature_matches_plain_hmac():
+    service = PanelAuthService(DummySettings(panel_password="secret", panel_session_ttl_seconds=10))
+
+    token = service.build_session_token(current_ts=100)
+    expected = hmac.new(b"secret", b"110", hashlib.sha256).hexdigest()
+    assert token == f"110.{expected}"
+    assert service.build_session_token(current_ts=100) == token
+
+
+def test_verify_reuses_cached_signature_per_expiry():
+    service = PanelAuthService(DummySettings(panel_password="secret", panel_session_ttl_seconds=10))
+    token = service.build_session_token(current_ts=100)
+    exp, sign = token.split(".", 1)
+
+    assert service._signature_cache == {exp: sign}
+    service._mac_proto = None
+    assert service.verify_session_token(token, current_ts=105) is True
@@ -1,13 +1,10 @@
-﻿import pytest
+﻿import time
 
-from app.db import Database
+import pytest
 
 
 @pytest.mark.asyncio
-async def test_recovery_claim_and_retry(tmp_path):
-    db = Database(str(tmp_path / "test.db"))
-    await db.init()
-
+async def test_recovery_claim_and_retry(db):
     sg = await db.add_or_update_source_group(chat_id=-10030, title="sg")
     await db.upsert_topics(sg["id"], [{"topic_id": 200, "title": "topic"}])
 
@@ -29,7 +26,10 @@ async def test_recovery_claim_and_retry(tmp_path):
     assert row["status"] == "pending"
     assert row["retry_count"] == 1
 
-    claimed2 = await db.claim_next_recovery()
+    assert 30 <= row["next_retry_at"] - int(time.time()) <= 70
+    assert await db.claim_next_recovery() is None
+
+    claimed2 = await db.claim_next_recovery(now_ts=int(row["next_retry_at"]))
     assert claimed2 is not None
     await db.mark_recovery_failed(queue_id, retry_count=2, error_text="err2", max_retry=3)
     row2 = [x for x in await db.list_recovery_queue() if x["id"] == queue_id][0]
@@ -37,10 +37,7 @@ async def test_recovery_claim_and_retry(tmp_path):
 
 
 @pytest.mark.asyncio
-async def test_recovery_checkpoint_and_done(tmp_path):
-    db = Database(str(tmp_path / "test.db"))
-    await db.init()
-
+async def test_recovery_checkpoint_and_done(db):
     sg = await db.add_or_update_source_group(chat_id=-10031, title="sg2")
     await db.upsert_topics(sg["id"], [{"topic_id": 201, "title": "topic2"}])
 
@@ -67,3 +64,21 @@ async def test_recovery_checkpoint_and_done(tmp_path):
     assert row["status"] == "done"
     assert row["new_channel_chat_id"] == -10051
     assert row["last_cloned_message_id"] == 12345
+
+
+@pytest.mark.asyncio
+async def test_claim_next_recoveries_claims_in_queue_order(db):
+    sg = await db.add_or_update_source_group(chat_id=-10032, title="sg3")
+    await db.upsert_topics(sg["id"], [{"topic_id": tid, "title": f"t{tid}"} for tid in (301, 302, 303)])
+    queue_ids = [
+        await db.enqueue_recovery(source_group_id=sg["id"], topic_id=tid, old_channel_chat_id=-10060 - tid, reason="x")
+        for tid in (301, 302, 303)
+    ]
+
+    claimed = await db.claim_next_recoveries(2)
+    assert [row["id"] for row in claimed] == queue_ids[:2]
+    assert all(row["status"] == "running" for row in claimed)
+
+    rest = await db.claim_next_recoveries(5)
+    assert [row["id"] for row in rest] == queue_ids[2:]
+    assert await db.claim_next_recoveries(5) == []
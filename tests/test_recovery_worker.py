@@ -1,3 +1,4 @@
+import asyncio
 from types import SimpleNamespace
 
 import pytest
@@ -110,3 +111,84 @@ async def test_recovery_worker_calls_clone_service_and_updates_checkpoint():
     assert db.deleted_queue_ids == [41]
     assert len(channel_service.calls) == 1
     assert any("频道恢复完成" in message for message in telegram.notifications)
+
+
+@pytest.mark.asyncio
+async def test_channel_title_is_cached_until_invalidated():
+    class CountingDB(DummyDB):
+        def __init__(self):
+            super().__init__()
+            self.channel_lookups = 0
+
+        async def get_channel(self, channel_chat_id: int):
+            self.channel_lookups += 1
+            return await super().get_channel(channel_chat_id)
+
+    db = CountingDB()
+    settings = SimpleNamespace(recovery_max_retry=3)
+    worker = RecoveryWorker(db, DummyTelegram(), DummyCloneService(), DummyChannelService(), settings)
+
+    assert await worker._get_channel_title(-100300) == "频道-100300"
+    assert await worker._get_channel_title(-100300) == "频道-100300"
+    assert db.channel_lookups == 1
+
+    worker.invalidate_channel_title(-100300)
+    await worker._get_channel_title(-100300)
+    assert db.channel_lookups == 2
+
+
+class BatchDB(DummyDB):
+    def __init__(self, topic_ids: list[int]):
+        super().__init__()
+        self.pending = list(topic_ids)
+        self.next_id = 41
+        self.running = 0
+        self.max_running = 0
+
+    async def claim_next_recovery(self):
+        if not self.pending:
+            return None
+        topic_id = self.pending.pop(0)
+        job = await super().claim_next_recovery()
+        job.update({"id": self.next_id, "topic_id": topic_id})
+        self.next_id += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        return job
+
+    async def delete_recovery_task(self, queue_id: int):
+        self.running -= 1
+        await super().delete_recovery_task(queue_id)
+
+
+@pytest.mark.asyncio
+async def test_run_batch_processes_claimed_jobs_in_order():
+    db = BatchDB([99, 100])
+    clone_service = DummyCloneService()
+    settings = SimpleNamespace(recovery_max_retry=3)
+    worker = RecoveryWorker(db, DummyTelegram(), clone_service, DummyChannelService(), settings)
+
+    results = await worker.run_batch(2)
+
+    assert results == [True, True]
+    assert [call["topic_id"] for call in clone_service.calls] == [99, 100]
+    assert db.deleted_queue_ids == [41, 42]
+
+
+@pytest.mark.asyncio
+async def test_run_batch_claims_no_more_than_concurrency_at_once():
+    class SlowCloneService(DummyCloneService):
+        async def clone_topic_history(self, **kwargs):
+            await asyncio.sleep(0)
+            return await super().clone_topic_history(**kwargs)
+
+    db = BatchDB([99, 100, 101, 102, 103])
+    clone_service = SlowCloneService()
+    settings = SimpleNamespace(recovery_max_retry=3)
+    worker = RecoveryWorker(db, DummyTelegram(), clone_service, DummyChannelService(), settings)
+
+    results = await worker.run_batch(4, concurrency=2)
+
+    assert results == [True] * 4
+    assert db.max_running == 2
+    assert db.pending == [103]
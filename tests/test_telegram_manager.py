@@ -1,8 +1,24 @@
+import asyncio
+import sqlite3
+import time
+from types import SimpleNamespace
+
 import pytest
 
 pytest.importorskip("qrcode")
 
-from app.services.telegram_manager import TelegramManager
+from telethon import errors as tg_errors
+
+from app.services import telegram_manager
+from app.services.telegram_manager import PendingQRLogin, TelegramManager
+
+
+@pytest.fixture
+def manager(tmp_path) -> TelegramManager:
+    settings = SimpleNamespace(
+        sessions_dir=str(tmp_path), api_id=1, api_hash="hash", bot_token="", notify_chat_id=-100
+    )
+    return TelegramManager(settings)
 
 
 def test_normalize_chat_ref_from_tme_c_message_link() -> None:
@@ -15,3 +31,386 @@ def test_normalize_chat_ref_from_username_link() -> None:
     chat_ref = "https://t.me/example_group/123"
     normalized = TelegramManager.normalize_chat_ref(chat_ref)
     assert normalized == "@example_group"
+
+
+def test_normalize_chat_ref_plain_values_and_mixed_case_link() -> None:
+    assert TelegramManager.normalize_chat_ref(" -100123 ") == -100123
+    assert TelegramManager.normalize_chat_ref("example") == "@example"
+    assert TelegramManager.normalize_chat_ref("HTTPS://T.ME/Example/") == "@Example"
+    assert TelegramManager.normalize_chat_ref("https://t.me/c/12ab/1") == "@c"
+
+
+@pytest.mark.asyncio
+async def test_get_cached_entity_reuses_entity_until_invalidated(manager) -> None:
+    calls: list[int] = []
+
+    async def fake_get_entity(chat_id: int):
+        calls.append(chat_id)
+        return SimpleNamespace(id=chat_id, title=f"频道{len(calls)}")
+
+    manager.bot_client.get_entity = fake_get_entity  # type: ignore[method-assign]
+
+    first = await manager.get_cached_entity(-100123)
+    second = await manager.get_cached_entity(-100123)
+    manager.invalidate_entity(-100123)
+    third = await manager.get_cached_entity(-100123)
+
+    assert first is second
+    assert third.title == "频道2"
+    assert calls == [-100123, -100123]
+
+
+@pytest.mark.asyncio
+async def test_password_sign_in_locks_per_qr_session(manager) -> None:
+    release = asyncio.Event()
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_ensure_user_connected() -> None:
+        return None
+
+    async def fake_sign_in(password: str):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await release.wait()
+        in_flight -= 1
+
+    manager.ensure_user_connected = fake_ensure_user_connected  # type: ignore[method-assign]
+    manager.user_client.sign_in = fake_sign_in  # type: ignore[method-assign]
+    for session_id in ("a", "b"):
+        manager._pending_qr[session_id] = PendingQRLogin(
+            session_id=session_id,
+            created_at=time.monotonic(),
+            qr_login=None,
+            status="need_password",
+        )
+        manager._qr_locks[session_id] = asyncio.Lock()
+
+    tasks = [asyncio.create_task(manager.sign_in_with_password_only("pw", sid)) for sid in ("a", "b")]
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert max_in_flight == 2
+    assert manager._qr_locks["a"].locked()
+
+    release.set()
+    results = await asyncio.gather(*tasks)
+    assert all(result["ok"] for result in results)
+    assert manager._qr_locks == {}
+
+
+@pytest.mark.asyncio
+async def test_auth_status_caches_get_me_until_reset(manager) -> None:
+    calls: list[str] = []
+
+    async def authorized() -> bool:
+        return True
+
+    async def user_get_me():
+        calls.append("user")
+        return SimpleNamespace(id=1, username="u", first_name="U")
+
+    async def bot_get_me():
+        calls.append("bot")
+        return SimpleNamespace(id=2, username="b", first_name="B")
+
+    manager.is_user_authorized = authorized  # type: ignore[method-assign]
+    manager.is_bot_authorized = authorized  # type: ignore[method-assign]
+    manager.user_client.get_me = user_get_me  # type: ignore[method-assign]
+    manager.bot_client.get_me = bot_get_me  # type: ignore[method-assign]
+
+    first = await manager.get_auth_status()
+    second = await manager.get_auth_status()
+    assert first == second
+    assert first["user"]["username"] == "u"
+    assert calls == ["user", "bot"]
+
+    manager._user_me_cache = None
+    await manager.get_auth_status()
+    assert calls == ["user", "bot", "user"]
+
+
+@pytest.mark.asyncio
+async def test_check_qr_login_times_out_without_cancelling_watcher(manager) -> None:
+    pending = PendingQRLogin(session_id="s", created_at=time.monotonic(), qr_login=None)
+    pending.wait_task = asyncio.create_task(asyncio.sleep(10))
+    manager._pending_qr["s"] = pending
+
+    result = await manager.check_qr_login("s", timeout_seconds=0)
+
+    assert result == {"ok": True, "status": "pending"}
+    assert not pending.wait_task.done()
+    pending.wait_task.cancel()
+
+
+def test_render_qr_png_returns_png_bytes(monkeypatch) -> None:
+    class FakeImage:
+        def save(self, buffer, format: str) -> None:
+            assert format == "PNG"
+            buffer.write(b"\x89PNG-data")
+
+    monkeypatch.setattr(telegram_manager, "segno", None)
+    monkeypatch.setattr(telegram_manager.qrcode, "make", lambda url: FakeImage())
+
+    encoded = TelegramManager._render_qr_png("tg://login?token=abc")
+
+    assert encoded == b"\x89PNG-data"
+
+
+@pytest.mark.asyncio
+async def test_resolve_chat_caches_per_client(manager) -> None:
+    calls: list[tuple[str, object]] = []
+
+    async def connected() -> None:
+        return None
+
+    def fake_get_entity(kind: str):
+        async def get_entity(ref):
+            calls.append((kind, ref))
+            return SimpleNamespace(kind=kind, ref=ref)
+
+        return get_entity
+
+    manager.ensure_user_connected = connected  # type: ignore[method-assign]
+    manager.ensure_bot_connected = connected  # type: ignore[method-assign]
+    manager.user_client.get_entity = fake_get_entity("user")  # type: ignore[method-assign]
+    manager.bot_client.get_entity = fake_get_entity("bot")  # type: ignore[method-assign]
+
+    first = await manager.resolve_chat("https://t.me/example")
+    second = await manager.resolve_chat("@example")
+    bot_entity = await manager.resolve_chat("@example", prefer_user=False)
+
+    assert first is second
+    assert bot_entity.kind == "bot"
+    assert calls == [("user", "@example"), ("bot", "@example")]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_qr_pollers_wake_on_state_event(manager) -> None:
+    scanned = asyncio.Event()
+
+    async def fake_wait():
+        await scanned.wait()
+
+    qr_login = SimpleNamespace(wait=fake_wait)
+    pending = PendingQRLogin(session_id="s", created_at=time.monotonic(), qr_login=qr_login)
+    manager._pending_qr["s"] = pending
+    pending.wait_task = asyncio.create_task(manager._watch_qr_login("s"))
+
+    pollers = [asyncio.create_task(manager.check_qr_login("s", timeout_seconds=5)) for _ in range(3)]
+    await asyncio.sleep(0)
+    scanned.set()
+    results = await asyncio.gather(*pollers)
+
+    assert results[0] == {"ok": True, "status": "authorized"}
+    assert pending.state_event.is_set()
+
+
+def test_purge_session_files_removes_existing_and_ignores_missing(tmp_path) -> None:
+    base = tmp_path / "user.session"
+    base.write_bytes(b"x")
+    (tmp_path / "user.session-wal").write_bytes(b"x")
+
+    TelegramManager._purge_session_files(str(base))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_cleanup_cancels_all_expired_qr_sessions(manager) -> None:
+    stale = time.monotonic() - 600
+    for session_id, created_at in (("old-1", stale), ("old-2", stale), ("fresh", time.monotonic())):
+        pending = PendingQRLogin(session_id=session_id, created_at=created_at, qr_login=None)
+        pending.wait_task = asyncio.create_task(asyncio.sleep(10))
+        manager._pending_qr[session_id] = pending
+
+    old_tasks = [manager._pending_qr[sid].wait_task for sid in ("old-1", "old-2")]
+    await manager.cleanup()
+
+    assert list(manager._pending_qr) == ["fresh"]
+    assert all(task.cancelled() for task in old_tasks)
+    manager._pending_qr["fresh"].wait_task.cancel()
+
+
+def test_get_qr_png_returns_bytes_for_live_sessions_only(manager) -> None:
+    manager._pending_qr["s"] = PendingQRLogin(
+        session_id="s",
+        created_at=time.monotonic(),
+        qr_login=None,
+        qr_png=b"\x89PNG",
+    )
+
+    assert manager.get_qr_png("s") == b"\x89PNG"
+    assert manager.get_qr_png("missing") is None
+
+
+def test_is_broken_session_storage_matches_sqlite_corruption() -> None:
+    assert TelegramManager._is_broken_session_storage(sqlite3.OperationalError("File is not a database"))
+    assert TelegramManager._is_broken_session_storage(RuntimeError("no such table: sessions"))
+    assert not TelegramManager._is_broken_session_storage(RuntimeError("file is not a database"))
+    assert not TelegramManager._is_broken_session_storage(sqlite3.OperationalError("database is locked"))
+
+
+def test_render_qr_png_prefers_segno(monkeypatch) -> None:
+    calls: list[tuple[str, dict]] = []
+
+    class FakeQR:
+        def save(self, buffer, **kwargs) -> None:
+            calls.append(("save", kwargs))
+            buffer.write(b"\x89PNG-segno")
+
+    def fake_make(url: str, error: str):
+        calls.append(("make", {"url": url, "error": error}))
+        return FakeQR()
+
+    monkeypatch.setattr(telegram_manager, "segno", SimpleNamespace(make=fake_make))
+
+    assert TelegramManager._render_qr_png("tg://login?token=abc") == b"\x89PNG-segno"
+    assert calls[0] == ("make", {"url": "tg://login?token=abc", "error": "m"})
+    assert calls[1][1]["kind"] == "png"
+
+
+@pytest.mark.asyncio
+async def test_sign_in_with_code_maps_known_errors(manager) -> None:
+    async def connected() -> None:
+        return None
+
+    async def fail_sign_in(**_kwargs):
+        raise tg_errors.PhoneCodeInvalidError(request=None)
+
+    manager.ensure_user_connected = connected  # type: ignore[method-assign]
+    manager.user_client.sign_in = fail_sign_in  # type: ignore[method-assign]
+
+    result = await manager.sign_in_with_code("+100", "12345")
+    result["error"] = "changed"
+
+    assert await manager.sign_in_with_code("+100", "12345") == {
+        "ok": False,
+        "need_password": False,
+        "error": "验证码错误",
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_qr_login_reuses_clean_unauthorized_session(manager) -> None:
+    resets: list[int] = []
+    authorized = False
+
+    async def fake_reset() -> None:
+        resets.append(1)
+
+    async def fake_is_user_authorized() -> bool:
+        return authorized
+
+    async def fake_qr_login():
+        async def wait():
+            await asyncio.sleep(10)
+
+        return SimpleNamespace(url="tg://login?token=x", wait=wait)
+
+    manager.reset_user_session = fake_reset  # type: ignore[method-assign]
+    manager.is_user_authorized = fake_is_user_authorized  # type: ignore[method-assign]
+    manager.user_client.qr_login = fake_qr_login  # type: ignore[method-assign]
+    manager._render_qr_png = lambda url: b"png"  # type: ignore[method-assign]
+
+    first = await manager.create_qr_login()
+    await manager.create_qr_login()
+    assert resets == []
+    assert first["session_id"] not in manager._pending_qr
+
+    authorized = True
+    await manager.create_qr_login()
+    assert resets == [1]
+    await manager._clear_pending_qr()
+
+
+@pytest.mark.asyncio
+async def test_auth_status_checks_user_and_bot_concurrently(manager) -> None:
+    started: list[str] = []
+    both_started = asyncio.Event()
+
+    def make_check(kind: str):
+        async def check() -> bool:
+            started.append(kind)
+            if len(started) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=1)
+            return False
+
+        return check
+
+    async def failing_bot_check() -> bool:
+        await make_check("bot")()
+        raise RuntimeError("bot offline")
+
+    manager.is_user_authorized = make_check("user")  # type: ignore[method-assign]
+    manager.is_bot_authorized = failing_bot_check  # type: ignore[method-assign]
+
+    status = await manager.get_auth_status()
+
+    assert sorted(started) == ["bot", "user"]
+    assert status["user_authorized"] is False
+    assert status["bot_error"] == "bot offline"
+    assert status["user"] is None and status["bot"] is None
+
+
+@pytest.mark.asyncio
+async def test_pending_qr_expires_without_cleanup(manager, monkeypatch) -> None:
+
+    async def fake_is_user_authorized() -> bool:
+        return False
+
+    async def fake_qr_login():
+        async def wait():
+            await asyncio.sleep(10)
+
+        return SimpleNamespace(url="tg://login?token=x", wait=wait)
+
+    monkeypatch.setattr(telegram_manager, "QR_LOGIN_TTL_SECONDS", 0.01)
+    manager.is_user_authorized = fake_is_user_authorized  # type: ignore[method-assign]
+    manager.user_client.qr_login = fake_qr_login  # type: ignore[method-assign]
+    manager._render_qr_png = lambda url: b"png"  # type: ignore[method-assign]
+
+    created = await manager.create_qr_login()
+    pending = manager._pending_qr[created["session_id"]]
+    await asyncio.sleep(0.05)
+
+    assert manager._pending_qr == {}
+    assert manager._qr_locks == {}
+    assert pending.wait_task is not None and pending.wait_task.done()
+    assert not manager._qr_expiry_tasks
+
+
+@pytest.mark.asyncio
+async def test_send_notification_queues_and_coalesces_messages(manager) -> None:
+    sent: list[tuple[int, str]] = []
+
+    async def fake_ensure_bot_connected() -> None:
+        return None
+
+    async def fake_send_message(chat_id: int, message: str) -> None:
+        sent.append((chat_id, message))
+
+    manager.ensure_bot_connected = fake_ensure_bot_connected  # type: ignore[method-assign]
+    manager.bot_client.send_message = fake_send_message  # type: ignore[method-assign]
+    manager._notify_queue = asyncio.Queue(maxsize=2)
+    manager._notify_worker = asyncio.create_task(manager._notification_worker(manager._notify_queue))
+
+    await manager.send_notification("first")
+    await manager.send_notification("second")
+    await manager.send_notification("dropped")
+    assert sent == []
+
+    await manager._stop_notification_worker()
+    assert sent == [(-100, "first\n\nsecond")]
+    assert manager._notify_worker is None
+
+
+def test_batch_notifications_respects_message_limit(monkeypatch) -> None:
+    monkeypatch.setattr(telegram_manager, "NOTIFY_MESSAGE_MAX_CHARS", 10)
+
+    assert TelegramManager._batch_notifications(["abcd", "efgh", "ijklmnopqrst", "u"]) == [
+        "abcd\n\nefgh",
+        "ijklmnopqrst",
+        "u",
+    ]
@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+from telethon.crypto import AuthKey
+from telethon.sessions import SQLiteSession
+from telethon.tl import types
+
+from app.services import telegram_session
+from app.services.telegram_session import AsyncSQLiteSession
+
+
+@pytest.mark.asyncio
+async def test_session_round_trips_through_sqlite_file(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(telegram_session, "SESSION_FLUSH_DELAY_SECONDS", 0)
+    name = str(tmp_path / "user")
+    session = AsyncSQLiteSession(name)
+    session.set_dc(2, "149.154.167.51", 443)
+    session.auth_key = AuthKey(data=b"k" * 256)
+    await session.save()
+
+    session.process_entities(types.contacts.ResolvedPeer(None, [types.InputPeerUser(0, 777)], []))
+    assert session.get_entity_rows_by_id(0) == (0, 777)
+    await session.close()
+
+    legacy = SQLiteSession(name)
+    assert legacy.dc_id == 2
+    assert legacy.auth_key.key == b"k" * 256
+    assert legacy.get_entity_rows_by_id(0) == (0, 777)
+    legacy.close()
+
+    reloaded = AsyncSQLiteSession(name)
+    assert reloaded.server_address == "149.154.167.51"
+    assert reloaded.get_entity_rows_by_id(0) == (0, 777)
+
+
+@pytest.mark.asyncio
+async def test_discard_drops_pending_entities(tmp_path) -> None:
+    name = str(tmp_path / "user")
+    session = AsyncSQLiteSession(name)
+    await session.save()
+    session.process_entities(types.contacts.ResolvedPeer(None, [types.InputPeerUser(0, 1)], []))
+
+    session.discard()
+    await session.delete()
+
+    assert not (tmp_path / "user.session").exists()
+
+
+@pytest.mark.asyncio
+async def test_flush_switches_session_file_to_wal(tmp_path) -> None:
+    session = AsyncSQLiteSession(str(tmp_path / "bot"))
+    await session.save()
+
+    conn = sqlite3.connect(tmp_path / "bot.session")
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        conn.close()
@@ -0,0 +1,30 @@
+import pytest
+
+from app.services.token_bucket import TokenBucket
+
+
+def test_token_bucket_aimd_rate_bounds() -> None:
+    bucket = TokenBucket(refill_rate=20.0, min_rate=2.0, max_rate=20.0, increase_step=1.0, decrease_factor=0.5)
+
+    bucket.on_flood_wait()
+    assert bucket.refill_rate == 10.0
+    for _ in range(10):
+        bucket.on_flood_wait()
+    assert bucket.refill_rate == 2.0
+
+    bucket.on_success()
+    assert bucket.refill_rate == 3.0
+    for _ in range(100):
+        bucket.on_success()
+    assert bucket.refill_rate == 20.0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_acquire_consumes_burst_capacity() -> None:
+    bucket = TokenBucket(capacity=2, refill_rate=1000.0, max_rate=1000.0)
+
+    await bucket.acquire()
+    await bucket.acquire()
+    await bucket.acquire()
+
+    assert bucket._tokens < 1
@@ -0,0 +1,148 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import topic_service
+from app.services.topic_service import TopicService
+
+
+class FakeDB:
+    def __init__(self):
+        self.upserted = []
+
+    async def get_source_group_by_id(self, source_group_id: int):
+        return {"id": source_group_id, "chat_id": -100555}
+
+    async def list_topics(self, source_group_id: int):
+        return list(self.upserted)
+
+    async def upsert_topics(self, source_group_id: int, topics):
+        self.upserted = list(topics)
+        return list(self.upserted)
+
+
+class PagedClient:
+    def __init__(self, total: int):
+        self.total = total
+        self.requests = []
+
+    async def __call__(self, request):
+        self.requests.append(request)
+        start = request.offset_topic or self.total + 1
+        ids = [topic_id for topic_id in range(start - 1, 0, -1)][:100]
+        topics = [SimpleNamespace(id=topic_id, title=f"t{topic_id}", top_message=topic_id * 10) for topic_id in ids]
+        messages = [
+            SimpleNamespace(id=topic_id * 10, date=datetime.fromtimestamp(topic_id, tz=timezone.utc)) for topic_id in ids
+        ]
+        return SimpleNamespace(topics=topics, messages=messages)
+
+
+@pytest.mark.asyncio
+async def test_sync_topics_paginates_past_large_forums(tmp_path):
+    db = FakeDB()
+    client = PagedClient(total=250)
+    telegram = SimpleNamespace(user_client=client)
+    service = TopicService(db, telegram, str(tmp_path / "avatars"))
+
+    result = await service.sync_topics(1)
+
+    assert len(result) == 250
+    assert len(client.requests) == 3
+    second = client.requests[1]
+    assert (second.offset_topic, second.offset_id) == (151, 1510)
+    assert second.offset_date == datetime.fromtimestamp(151, tz=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_sync_topics_requeries_existing_ids_concurrently(tmp_path):
+    db = FakeDB()
+    db.upserted = [{"topic_id": topic_id, "title": "old"} for topic_id in range(1, 351)]
+    in_flight = 0
+    max_in_flight = 0
+
+    class ByIdClient:
+        async def __call__(self, request):
+            nonlocal in_flight, max_in_flight
+            if not hasattr(request, "topics"):
+                return SimpleNamespace(topics=[], messages=[])
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return SimpleNamespace(topics=[SimpleNamespace(id=topic_id, title=f"new{topic_id}") for topic_id in request.topics])
+
+    service = TopicService(db, SimpleNamespace(user_client=ByIdClient()), str(tmp_path / "avatars"))
+
+    result = await service.sync_topics(1)
+
+    assert max_in_flight == 4
+    assert [row["topic_id"] for row in result] == list(range(1, 351))
+    assert all(row["title"] == f"new{row['topic_id']}" for row in result)
+
+
+@pytest.mark.asyncio
+async def test_sync_topics_skips_by_id_fallback_for_paginated_topics(tmp_path):
+    db = FakeDB()
+    db.upserted = [{"topic_id": topic_id, "title": "old"} for topic_id in range(1, 251)]
+    client = PagedClient(total=250)
+    service = TopicService(db, SimpleNamespace(user_client=client), str(tmp_path / "avatars"))
+
+    result = await service.sync_topics(1)
+
+    assert len(client.requests) == 3
+    assert all(not hasattr(request, "topics") for request in client.requests)
+    assert all(row["title"] == f"t{row['topic_id']}" for row in result)
+
+
+@pytest.mark.asyncio
+async def test_bulk_sync_topics_bounds_concurrency_and_reports_failures(tmp_path, monkeypatch):
+    monkeypatch.setattr(topic_service, "SYNC_TOPICS_GROUP_CONCURRENCY", 2)
+    service = TopicService(FakeDB(), SimpleNamespace(user_client=None), str(tmp_path / "avatars"))
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_sync_topics(source_group_id: int):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if source_group_id == 3:
+            raise ValueError("任务组不存在")
+        return [{"topic_id": 1, "title": "t"}] * source_group_id
+
+    service.sync_topics = fake_sync_topics  # type: ignore[method-assign]
+
+    results = await service.bulk_sync_topics([1, 2, 3, 4])
+
+    assert max_in_flight == 2
+    assert [(item["source_group_id"], item["ok"], item["total"]) for item in results] == [
+        (1, True, 1),
+        (2, True, 2),
+        (3, False, 0),
+        (4, True, 4),
+    ]
+    assert results[2]["error"] == "任务组不存在"
+
+
+@pytest.mark.asyncio
+async def test_sync_topics_skips_existing_topics_read_without_by_id_request(tmp_path):
+    class CountingDB(FakeDB):
+        def __init__(self):
+            super().__init__()
+            self.list_calls = 0
+
+        async def list_topics(self, source_group_id: int):
+            self.list_calls += 1
+            return await super().list_topics(source_group_id)
+
+    db = CountingDB()
+    service = TopicService(db, SimpleNamespace(user_client=PagedClient(total=5)), str(tmp_path / "avatars"))
+    service._make_get_topics_by_id = None
+
+    result = await service.sync_topics(1)
+
+    assert len(result) == 5
+    assert db.list_calls == 0
@@ -1,11 +1,18 @@
+import asyncio
+import gzip
+import io
+import json
 import shutil
+import threading
 import zipfile
 from pathlib import Path
+from urllib import error as url_error
 
 import pytest
 
 from app.config import Settings
 from app.db import Database
+from app.services import update_service
 from app.services.update_service import GitHubReleaseAsset, GitHubReleaseInfo, UpdateService
 
 
@@ -167,4 +174,118 @@ async def test_confirm_and_trigger_update_returns_without_restart_when_latest(tm
 
     assert result["ok"] is True
     assert result["triggered"] is False
-    assert restart_service.restart_requested is False
\ No newline at end of file
+    assert restart_service.restart_requested is False
+
+
+def test_fetch_latest_release_requests_and_decodes_gzip(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    service = UpdateService(None, build_settings(tmp_path), DummyTelegram(), DummyRestartService())
+    payload = {"tag_name": "v1.1.0", "html_url": "u", "body": "notes", "published_at": "p", "assets": []}
+    seen_headers: dict[str, str] = {}
+
+    class FakeResponse:
+        headers = {"Content-Encoding": "gzip"}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *_exc):
+            return False
+
+        def read(self) -> bytes:
+            return gzip.compress(json.dumps(payload).encode("utf-8"))
+
+    def fake_urlopen(req, timeout):
+        seen_headers.update(req.headers)
+        return FakeResponse()
+
+    monkeypatch.setattr(update_service.url_request, "urlopen", fake_urlopen)
+
+    release = service._fetch_latest_release_sync("owner/repo", 5)
+
+    assert seen_headers["Accept-encoding"] == "gzip"
+    assert release is not None and release.tag_name == "v1.1.0"
+
+
+def test_fetch_latest_release_reuses_cached_release_on_not_modified(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    service = UpdateService(None, build_settings(tmp_path), DummyTelegram(), DummyRestartService())
+    payload = {"tag_name": "v1.1.0", "html_url": "u", "body": "notes", "published_at": "p", "assets": []}
+    sent_etags: list[str | None] = []
+
+    class FakeResponse:
+        headers = {"ETag": '"abc"'}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *_exc):
+            return False
+
+        def read(self) -> bytes:
+            return json.dumps(payload).encode("utf-8")
+
+    def fake_urlopen(req, timeout):
+        etag = req.headers.get("If-none-match")
+        sent_etags.append(etag)
+        if etag == '"abc"':
+            raise url_error.HTTPError(req.full_url, 304, "Not Modified", {}, io.BytesIO(b""))
+        return FakeResponse()
+
+    monkeypatch.setattr(update_service.url_request, "urlopen", fake_urlopen)
+
+    first = service._fetch_latest_release_sync("owner/repo", 5)
+    second = service._fetch_latest_release_sync("owner/repo", 5)
+
+    assert sent_etags == [None, '"abc"']
+    assert second is first
+
+
+@pytest.mark.asyncio
+async def test_confirm_reuses_fresh_status_instead_of_refetching(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    settings = build_settings(tmp_path, app_version="v1.1.0")
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    service = UpdateService(db, settings, DummyTelegram(), DummyRestartService())
+    fetches: list[str] = []
+
+    def fake_fetch(repository, _timeout):
+        fetches.append(repository)
+        return build_release(tag_name="v1.1.0")
+
+    monkeypatch.setattr(service, "_fetch_latest_release_sync", fake_fetch)
+    monkeypatch.setattr(service, "_is_running_in_docker", lambda: True)
+
+    await service.check_and_notify()
+    result = await service.confirm_and_trigger_update()
+
+    assert result["triggered"] is False
+    assert len(fetches) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_forced_checks_share_one_fetch(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    settings = build_settings(tmp_path)
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    telegram = DummyTelegram()
+    service = UpdateService(db, settings, telegram, DummyRestartService())
+    fetches: list[str] = []
+    release_gate = threading.Event()
+
+    def slow_fetch(repository, _timeout):
+        fetches.append(repository)
+        release_gate.wait(timeout=5)
+        return build_release()
+
+    monkeypatch.setattr(service, "_fetch_latest_release_sync", slow_fetch)
+    monkeypatch.setattr(service, "_is_running_in_docker", lambda: True)
+
+    first = asyncio.create_task(service.check_and_notify())
+    await asyncio.sleep(0.05)
+    second = asyncio.create_task(service.check_and_notify())
+    await asyncio.sleep(0.05)
+    release_gate.set()
+    results = await asyncio.gather(first, second)
+
+    assert len(fetches) == 1
+    assert results[0]["latest_tag"] == results[1]["latest_tag"] == "v1.1.0"
+    assert len(telegram.messages) == 1